@@ -0,0 +1,160 @@
+"""
+后端接口压测
+分别以开发模式（Werkzeug，python sau_backend.py）和生产模式（uvicorn，python sau_asgi.py）启动后端，
+用多个保持连接的客户端线程循环请求只读接口，输出每秒请求数和延迟 p50 / p99。
+
+用法：python -m benchmarks.http_benchmark --modes dev,asgi --clients 32 --duration 15
+      python -m benchmarks.http_benchmark --url http://127.0.0.1:5409   # 测已在运行的后端
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 各模式的启动脚本，端口由参数传入
+SERVERS = {
+    'dev': "import sys, sau_backend; sau_backend.start_services(); "
+           "sau_backend.app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)",
+    'asgi': "import sys, uvicorn, sau_asgi; "
+            "uvicorn.run(sau_asgi.app, host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')",
+}
+
+DEFAULT_PATHS = '/getFiles,/getAccounts,/getJobs,/metrics'
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/metrics')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load(host, port, paths, clients, duration):
+    """clients 个线程在 duration 秒内轮流请求 paths，返回 (各请求耗时列表, 出错数, 实际秒数)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        samples, failed, index = [], 0, offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            samples.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(samples)
+            errors[0] += failed
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.monotonic() - start
+
+
+def summarize(name, latencies, errors, elapsed):
+    row = {
+        'mode': name,
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    print(f"{name:>6}: {row['requests_per_second']} 请求/秒, p50 {row['p50_ms']} ms, p99 {row['p99_ms']} ms, "
+          f"共 {row['requests']} 个请求, 出错 {row['errors']}")
+    return row
+
+
+def bench_mode(mode, args, paths):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-c', SERVERS[mode], str(port)], cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready('127.0.0.1', port):
+            raise RuntimeError(f"{mode} 模式的后端未能启动")
+        # 预热：建立数据库连接池、加载模板等
+        run_load('127.0.0.1', port, paths, 2, 1)
+        return summarize(mode, *run_load('127.0.0.1', port, paths, args.clients, args.duration))
+    finally:
+        process.terminate()
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后端接口压测（开发模式 / 生产模式）")
+    parser.add_argument('--modes', default='dev,asgi', help=f"逗号分隔，可选 {','.join(SERVERS)}")
+    parser.add_argument('--url', help="直接压测已在运行的后端，忽略 --modes")
+    parser.add_argument('--paths', default=DEFAULT_PATHS, help="逗号分隔的 GET 接口")
+    parser.add_argument('--clients', type=int, default=32, help="并发客户端数")
+    parser.add_argument('--duration', type=float, default=15, help="每个模式压测的秒数")
+    parser.add_argument('--output', help="把结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    report = []
+    if args.url:
+        target = urlsplit(args.url)
+        report.append(summarize(target.netloc, *run_load(target.hostname, target.port or 80, paths,
+                                                         args.clients, args.duration)))
+    else:
+        for mode in [name.strip() for name in args.modes.split(',') if name.strip()]:
+            if mode not in SERVERS:
+                parser.error(f"unknown mode: {mode}")
+            report.append(bench_mode(mode, args, paths))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
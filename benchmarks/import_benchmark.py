@@ -0,0 +1,113 @@
+"""
+启动耗时测试
+用 python -X importtime 在子进程中导入后端和命令行入口，统计导入总耗时和最慢的模块，
+并检查后端在响应 /getFiles 之前没有导入 playwright。
+
+用法：python -m benchmarks.import_benchmark --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 要测量的入口模块
+TARGETS = ('sau_backend', 'cli_main')
+
+# 这些模块只应在真正上传、登录或校验账号时才被导入
+HEAVY_MODULES = ('playwright', 'xhs', 'loguru')
+
+# 在子进程中执行：导入后端并请求一次 /getFiles，输出此时已导入的重量级模块
+_PROBE = f"""
+import json, sys
+import sau_backend
+sau_backend.db.migrate()
+status = sau_backend.app.test_client().get('/getFiles').status_code
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(json.dumps({{'status': status, 'loaded': loaded}}))
+"""
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 {模块名: (自身耗时, 累计耗时)}，单位微秒"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        modules[parts[2].strip()] = (int(parts[0]), int(parts[1]))
+    return modules
+
+
+def measure(target):
+    """在干净的子进程中导入一次 target，返回 (总耗时微秒, {模块名: (自身, 累计)})"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    modules = parse_importtime(result.stderr)
+    if result.returncode != 0 or target not in modules:
+        raise RuntimeError(f"导入 {target} 失败:\n{result.stderr[-2000:]}")
+    return modules[target][1], modules
+
+
+def probe_backend():
+    """导入后端并请求 /getFiles，返回子进程报告的 {'status', 'loaded'}"""
+    result = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"后端检查失败:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后端和命令行的导入耗时")
+    parser.add_argument('--targets', default=','.join(TARGETS), help="逗号分隔的入口模块")
+    parser.add_argument('--repeat', type=int, default=5, help="每个入口测量的次数，取中位数")
+    parser.add_argument('--top', type=int, default=10, help="列出累计耗时最长的模块数")
+    parser.add_argument('--output', help="把结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    report = {}
+    for target in [name.strip() for name in args.targets.split(',') if name.strip()]:
+        totals, slowest = [], None
+        for _ in range(max(1, args.repeat)):
+            total, modules = measure(target)
+            totals.append(total)
+            slowest = modules
+        median = statistics.median(totals)
+        heavy = [name for name in HEAVY_MODULES if name in slowest]
+        top = sorted(slowest.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+        report[target] = {
+            'median_ms': round(median / 1000, 1),
+            'min_ms': round(min(totals) / 1000, 1),
+            'heavy_modules': heavy,
+            'top': [{'module': name, 'self_ms': round(own / 1000, 1), 'cumulative_ms': round(cumulative / 1000, 1)}
+                    for name, (own, cumulative) in top],
+        }
+        print(f"{target}: 中位数 {report[target]['median_ms']} ms（{len(totals)} 次，最快 {report[target]['min_ms']} ms）"
+              f"，已导入的重量级模块: {', '.join(heavy) or '无'}")
+        for row in report[target]['top']:
+            print(f"  {row['cumulative_ms']:>9} ms  {row['self_ms']:>8} ms  {row['module']}")
+
+    if 'sau_backend' in report:
+        probe = probe_backend()
+        report['getFiles'] = probe
+        if probe['loaded']:
+            print(f"[WARN] /getFiles 返回 {probe['status']}，此时已导入: {', '.join(probe['loaded'])}")
+        else:
+            print(f"[OK] /getFiles 返回 {probe['status']}，未导入 {', '.join(HEAVY_MODULES)}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    if report.get('getFiles', {}).get('loaded'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    os.chdir(ROOT)
+    main()
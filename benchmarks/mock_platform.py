@@ -0,0 +1,359 @@
+"""
+本地模拟创作者平台服务器
+提供抖音、快手、视频号、小红书、TikTok 上传页面的最小复刻，只包含上传器依赖的选择器、上传进度标志、
+发布按钮和发布成功后的跳转地址；视频文件由页面真实 POST 到本服务器，可配置上传耗时、上传失败率和拒绝率。
+
+单独运行：python -m benchmarks.mock_platform --port 18080 --upload-delay 2
+配合 PLATFORM_BASE_URL_OVERRIDES（见 overrides()）让上传器在不访问真实平台的情况下完整走一遍流程
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 平台路径前缀 -> 真实平台域名
+PLATFORM_ORIGINS = {
+    'douyin': 'https://creator.douyin.com',
+    'kuaishou': 'https://cp.kuaishou.com',
+    'tencent': 'https://channels.weixin.qq.com',
+    'xiaohongshu': 'https://creator.xiaohongshu.com',
+    'tiktok': 'https://www.tiktok.com',
+}
+
+# 所有页面共用的脚本：把选中的文件 POST 到 /__mock/upload，服务器按配置延迟后返回是否成功
+COMMON_SCRIPT = """
+<script>
+function mockUpload(file, done) {
+  fetch('/__mock/upload', {method: 'POST', body: file}).then(r => r.json()).then(r => done(r.ok)).catch(() => done(false));
+}
+function mockPublish(next) {
+  fetch('/__mock/publish', {method: 'POST'}).then(() => { location.href = next; });
+}
+</script>
+"""
+
+DOUYIN_UPLOAD_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>抖音创作者中心</title></head><body>
+<div id="app"><div class="container-upload"><input type="file" id="video-input"></div></div>
+%(script)s
+<script>
+document.getElementById('video-input').addEventListener('change', function (e) {
+  const file = e.target.files[0];
+  history.pushState({}, '', '/creator-micro/content/publish?enter_from=publish_page');
+  document.getElementById('app').innerHTML = `
+    <div class="title-row"><div class="label"><span>作品标题</span></div><div><input type="text" class="title-input"></div></div>
+    <div class="zone-container" contenteditable="true"></div>
+    <div class="progress-div"><div class="progress-text">上传中</div><input type="file" class="upload-btn-input"></div>
+    <div id="upload-state"></div>
+    <button type="button" id="publish">发布</button>`;
+  function start(f) {
+    document.querySelector('.progress-text').textContent = '上传中';
+    mockUpload(f, function (ok) {
+      if (ok) {
+        document.getElementById('upload-state').innerHTML = '<div class="long-card-done"><div>重新上传</div></div>';
+        document.querySelector('.progress-text').textContent = '上传完成';
+      } else {
+        document.querySelector('.progress-text').textContent = '上传失败';
+      }
+    });
+  }
+  document.querySelector('.upload-btn-input').addEventListener('change', ev => start(ev.target.files[0]));
+  document.getElementById('publish').addEventListener('click', function () {
+    if (document.querySelector('.long-card-done')) mockPublish('/creator-micro/content/manage');
+  });
+  start(file);
+});
+</script></body></html>"""
+
+KUAISHOU_UPLOAD_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>快手创作者服务平台</title></head><body>
+<div id="app"><button type="button" class="_upload-btn_mock">上传视频</button><input type="file" id="video-input" style="display:none"></div>
+%(script)s
+<script>
+document.querySelector("button[class^='_upload-btn']").addEventListener('click', () => document.getElementById('video-input').click());
+document.getElementById('video-input').addEventListener('change', function (e) {
+  const file = e.target.files[0];
+  document.getElementById('app').innerHTML = `
+    <div class="form"><label>描述</label><div class="editor" contenteditable="true"></div></div>
+    <div id="progress"><span>上传中</span></div>
+    <div class="footer"><div id="publish">发布</div><div id="confirm-slot"></div></div>`;
+  mockUpload(file, function () { document.getElementById('progress').innerHTML = '<span>已上传</span>'; });
+  document.getElementById('publish').addEventListener('click', function () {
+    if (document.getElementById('progress').textContent.indexOf('已上传') < 0) return;
+    document.getElementById('confirm-slot').innerHTML = '<button type="button" id="confirm">确认发布</button>';
+    document.getElementById('confirm').addEventListener('click', () => mockPublish('/article/manage/video?status=2&from=publish'));
+  });
+});
+</script></body></html>"""
+
+TENCENT_UPLOAD_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>视频号助手</title></head><body>
+<div id="app">
+  <input type="file" id="video-input">
+  <div class="media-status-content"></div>
+  <div class="input-editor" contenteditable="true"></div>
+  <div class="form-btns"><button type="button" id="publish" class="weui-desktop-btn weui-desktop-btn_disabled">发表</button><button type="button">保存草稿</button></div>
+  <div id="dialog"></div>
+</div>
+%(script)s
+<script>
+const publish = document.getElementById('publish');
+const statusBox = document.querySelector('.media-status-content');
+function start(file) {
+  publish.classList.add('weui-desktop-btn_disabled');
+  statusBox.innerHTML = '<div class="status-msg">上传中</div>';
+  mockUpload(file, function (ok) {
+    if (ok) {
+      statusBox.innerHTML = '<div class="status-msg">上传完成</div>';
+      publish.classList.remove('weui-desktop-btn_disabled');
+    } else {
+      statusBox.innerHTML = '<div class="status-msg error">上传失败</div><div class="tag-inner" id="delete">删除</div>';
+      document.getElementById('delete').addEventListener('click', function () {
+        document.getElementById('dialog').innerHTML = '<button type="button" id="confirm-delete">删除</button>';
+        document.getElementById('confirm-delete').addEventListener('click', function () {
+          document.getElementById('dialog').innerHTML = '';
+          statusBox.innerHTML = '';
+        });
+      });
+    }
+  });
+}
+document.getElementById('video-input').addEventListener('change', e => start(e.target.files[0]));
+publish.addEventListener('click', function () {
+  if (!publish.classList.contains('weui-desktop-btn_disabled')) mockPublish('/platform/post/list');
+});
+</script></body></html>"""
+
+XIAOHONGSHU_UPLOAD_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>小红书创作服务平台</title></head><body>
+<div class="upload-content-wrapper">
+  <input type="file" class="upload-input" id="video-input">
+  <div class="preview-new-box"><div class="stage" id="stage"></div></div>
+</div>
+<div class="plugin title-container"><input type="text" class="d-text"></div>
+<div class="ql-editor" contenteditable="true"></div>
+<button type="button" id="publish">发布</button>
+%(script)s
+<script>
+document.getElementById('video-input').addEventListener('change', function (e) {
+  document.getElementById('stage').textContent = '上传中';
+  mockUpload(e.target.files[0], function (ok) {
+    document.getElementById('stage').textContent = ok ? '上传成功' : '上传失败';
+  });
+});
+document.getElementById('publish').addEventListener('click', function () {
+  if (document.getElementById('stage').textContent === '上传成功') mockPublish('/publish/success?source=mock');
+});
+</script></body></html>"""
+
+TIKTOK_HOME_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>TikTok</title></head><body>
+<div data-e2e="nav-more-menu">More</div>
+</body></html>"""
+
+TIKTOK_UPLOAD_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>TikTok Studio</title></head><body>
+<div class="upload-container">
+  <button type="button" id="select">Select video</button>
+</div>
+<input type="file" id="video-input" style="display:none">
+%(script)s
+<script>
+document.getElementById('select').addEventListener('click', () => document.getElementById('video-input').click());
+function start(file) {
+  const post = document.getElementById('post');
+  post.setAttribute('disabled', '');
+  mockUpload(file, function (ok) {
+    if (ok) {
+      post.removeAttribute('disabled');
+      return;
+    }
+    const retry = document.createElement('button');
+    retry.setAttribute('aria-label', 'Select file');
+    retry.textContent = 'Retry';
+    document.body.appendChild(retry);
+    retry.addEventListener('click', function () {
+      retry.remove();
+      document.getElementById('video-input').click();
+    });
+  });
+}
+document.getElementById('video-input').addEventListener('change', function (e) {
+  if (!document.getElementById('post')) {
+    document.querySelector('.upload-container').innerHTML = `
+      <div class="public-DraftEditor-content" contenteditable="true"></div>
+      <div class="button-group"><button type="button" id="post" disabled>Post</button><button type="button">Discard</button></div>`;
+    document.getElementById('post').addEventListener('click', () => mockPublish('/tiktokstudio/content'));
+  }
+  start(e.target.files[0]);
+});
+</script></body></html>"""
+
+TIKTOK_CONTENT_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>TikTok Studio</title></head><body>
+<div data-tt="components_PostTable_Container">
+  <div data-tt="components_PostInfoCell_Container"><a href="/@mock/video/%(video_id)s">video</a></div>
+</div>
+</body></html>"""
+
+DONE_PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>发布成功</title></head><body><div>发布成功</div></body></html>"""
+
+# (平台, 路径) -> 页面模板；未列出的路径返回发布成功页
+PAGES = {
+    ('douyin', '/creator-micro/content/upload'): DOUYIN_UPLOAD_PAGE,
+    ('kuaishou', '/article/publish/video'): KUAISHOU_UPLOAD_PAGE,
+    ('tencent', '/platform/post/create'): TENCENT_UPLOAD_PAGE,
+    ('xiaohongshu', '/publish/publish'): XIAOHONGSHU_UPLOAD_PAGE,
+    ('tiktok', '/'): TIKTOK_HOME_PAGE,
+    ('tiktok', '/tiktokstudio/upload'): TIKTOK_UPLOAD_PAGE,
+    ('tiktok', '/tiktokstudio/content'): TIKTOK_CONTENT_PAGE,
+}
+
+
+class MockStats(object):
+    """模拟服务器的计数，供压测脚本核对"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.uploads = 0
+        self.upload_failures = 0
+        self.upload_bytes = 0
+        self.publishes = 0
+        self.rejected = 0
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'uploads': self.uploads,
+                'upload_failures': self.upload_failures,
+                'upload_bytes': self.upload_bytes,
+                'publishes': self.publishes,
+                'rejected': self.rejected,
+            }
+
+
+class MockPlatformHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # 压测时不输出访问日志
+        pass
+
+    def _split(self):
+        path, _, query = self.path.partition('?')
+        platform, _, rest = path.lstrip('/').partition('/')
+        return platform, '/' + rest, query
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8'):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        platform, path, _ = self._split()
+        if platform == '__mock' and path == '/stats':
+            return self._send(200, json.dumps(server.stats.to_dict()), 'application/json')
+        if platform not in PLATFORM_ORIGINS:
+            return self._send(404, 'not found')
+        page = PAGES.get((platform, path), DONE_PAGE)
+        if page is not DONE_PAGE and server.roll(server.reject_rate):
+            with server.stats.lock:
+                server.stats.rejected += 1
+            return self._send(503, '<html><body>service unavailable</body></html>')
+        return self._send(200, page % {'script': COMMON_SCRIPT, 'video_id': int(time.time() * 1000)})
+
+    def do_POST(self):
+        server = self.server
+        _, path, _ = self._split()
+        length = int(self.headers.get('Content-Length') or 0)
+        # 分块读取并丢弃，模拟真实的文件传输
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+        if path == '/__mock/upload':
+            if server.upload_delay:
+                time.sleep(server.upload_delay)
+            ok = not server.roll(server.fail_rate)
+            with server.stats.lock:
+                server.stats.uploads += 1
+                server.stats.upload_bytes += length
+                if not ok:
+                    server.stats.upload_failures += 1
+            return self._send(200, json.dumps({'ok': ok}), 'application/json')
+        if path == '/__mock/publish':
+            with server.stats.lock:
+                server.stats.publishes += 1
+            return self._send(200, json.dumps({'ok': True}), 'application/json')
+        return self._send(404, 'not found')
+
+
+class MockPlatformServer(ThreadingHTTPServer):
+    """
+    模拟平台服务器
+    :param upload_delay: 收到文件后额外等待的秒数，模拟平台转码
+    :param fail_rate: 上传失败的概率，上传器会走各自的重新上传流程（快手、小红书没有重传流程，失败后会等到超时）
+    :param reject_rate: 上传页面返回 503 的概率，对应的任务会失败
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, upload_delay=0.0, fail_rate=0.0, reject_rate=0.0, seed=None):
+        super().__init__((host, port), MockPlatformHandler)
+        self.upload_delay = upload_delay
+        self.fail_rate = fail_rate
+        self.reject_rate = reject_rate
+        self.stats = MockStats()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._thread = None
+
+    def roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._random_lock:
+            return self._random.random() < rate
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def overrides(self):
+        """返回可直接用于 PLATFORM_BASE_URL_OVERRIDES 的映射"""
+        return {origin: f"{self.base_url}/{platform}" for platform, origin in PLATFORM_ORIGINS.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-platform", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟创作者平台服务器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--upload-delay', type=float, default=0.0, help="收到文件后额外等待的秒数")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="上传失败的概率")
+    parser.add_argument('--reject-rate', type=float, default=0.0, help="上传页面返回 503 的概率")
+    args = parser.parse_args()
+
+    server = MockPlatformServer(args.host, args.port, args.upload_delay, args.fail_rate, args.reject_rate)
+    print(f"[OK] 模拟平台服务器已启动: {server.base_url}")
+    print("PLATFORM_BASE_URL_OVERRIDES = " + json.dumps(server.overrides(), indent=4))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
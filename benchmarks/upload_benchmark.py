@@ -0,0 +1,197 @@
+"""
+端到端上传压测
+启动本地模拟平台服务器，通过 PLATFORM_BASE_URL_OVERRIDES 把上传器的请求转发过去，
+在不同并发数下用发布引擎执行 DouYinVideo / KSVideo / TencentVideo / XiaoHongShuVideo（可选 TiktokVideo），
+输出每分钟完成任务数、任务耗时 p50/p95 和峰值内存（本进程 + 浏览器子进程）。
+
+用法：python -m benchmarks.upload_benchmark --jobs 16 --concurrency 1,2,4,8 --upload-delay 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.mock_platform import MockPlatformServer
+from utils.settings import PLATFORM_BASE_URL_OVERRIDES
+from myUtils.publish_engine import PublishEngine, PublishJob
+from uploader.registry import get_platform
+
+# 可参与压测的平台
+PLATFORMS = ('douyin', 'kuaishou', 'tencent', 'xiaohongshu', 'tiktok')
+
+
+def make_uploader(platform, file_path, account_file):
+    spec = get_platform(platform)
+    return spec.id, spec.uploader("benchmark video", str(file_path), ["benchmark", "sau"], 0, str(account_file))
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _proc_rss(pid):
+    """读取 /proc/<pid>/status 中的 VmRSS（字节），非 Linux 或进程已退出时返回 0"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def tree_rss(pid=None):
+    """进程及其所有子进程（浏览器）的 RSS 之和"""
+    stack = [pid or os.getpid()]
+    total = 0
+    while stack:
+        current = stack.pop()
+        total += _proc_rss(current)
+        stack.extend(_children(current))
+    return total
+
+
+class PeakRssSampler(object):
+    """后台线程定期采样进程树的 RSS，记录峰值"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.peak = max(self.peak, tree_rss())
+            self._stopped.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stopped.set()
+        self._thread.join()
+        if not self.peak and sys.platform != 'win32':
+            import resource  # 仅 Unix 可用
+
+            # 无 /proc 时退回 getrusage（只能得到整个运行期间的峰值）
+            usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+            self.peak = usage if sys.platform == 'darwin' else usage * 1024
+        return False
+
+
+def prepare_workdir(workdir, platforms, jobs, accounts, file_size):
+    """生成测试视频和空的 cookie 文件，返回 [(平台, 视频, cookie)] 共 jobs 个组合"""
+    videos = []
+    for index in range(min(jobs, 8)):
+        video = workdir / f"video_{index}.mp4"
+        with open(video, 'wb') as f:
+            f.write(os.urandom(file_size))
+        videos.append(video)
+    cookies = {}
+    for platform in platforms:
+        for index in range(accounts):
+            cookie = workdir / f"{platform}_{index}.json"
+            cookie.write_text(json.dumps({"cookies": [], "origins": []}))
+            cookies.setdefault(platform, []).append(cookie)
+    combos = []
+    for index in range(jobs):
+        platform = platforms[index % len(platforms)]
+        account_list = cookies[platform]
+        combos.append((platform, videos[index % len(videos)], account_list[(index // len(platforms)) % len(account_list)]))
+    return combos
+
+
+async def run_level(combos, concurrency):
+    jobs = []
+    for platform, video, cookie in combos:
+        platform_id, uploader = make_uploader(platform, video, cookie)
+        jobs.append(PublishJob(platform_id, video, cookie, uploader))
+    engine = PublishEngine(max_concurrency=concurrency, max_per_platform=concurrency)
+    start = time.monotonic()
+    results = await engine.run(jobs)
+    return results, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端上传压测（本地模拟平台）")
+    parser.add_argument('--platforms', default='douyin,kuaishou,tencent,xiaohongshu',
+                        help=f"逗号分隔，可选 {','.join(PLATFORMS)}")
+    parser.add_argument('--jobs', type=int, default=16, help="每个并发等级执行的任务数")
+    parser.add_argument('--accounts', type=int, default=4, help="每个平台的账号数（同一账号的任务串行执行）")
+    parser.add_argument('--concurrency', default='1,2,4,8', help="逗号分隔的并发等级")
+    parser.add_argument('--file-size', type=int, default=5 * 1024 * 1024, help="测试视频大小（字节）")
+    parser.add_argument('--upload-delay', type=float, default=1.0, help="模拟平台处理上传的额外秒数")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="模拟上传失败的概率")
+    parser.add_argument('--reject-rate', type=float, default=0.0, help="模拟上传页面不可用的概率")
+    parser.add_argument('--output', help="把结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    platforms = [name.strip() for name in args.platforms.split(',') if name.strip()]
+    for name in platforms:
+        if name not in PLATFORMS:
+            parser.error(f"unknown platform: {name}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    server = MockPlatformServer(upload_delay=args.upload_delay, fail_rate=args.fail_rate,
+                                reject_rate=args.reject_rate, seed=0).start()
+    PLATFORM_BASE_URL_OVERRIDES.clear()
+    PLATFORM_BASE_URL_OVERRIDES.update(server.overrides())
+    print(f"[OK] 模拟平台服务器: {server.base_url}")
+
+    report = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="sau-bench-") as tmp:
+            combos = prepare_workdir(Path(tmp), platforms, args.jobs, args.accounts, args.file_size)
+            for level in levels:
+                with PeakRssSampler() as sampler:
+                    results, wall = asyncio.run(run_level(combos, level))
+                elapsed = [result.elapsed for result in results if result.success]
+                row = {
+                    'concurrency': level,
+                    'jobs': len(results),
+                    'succeeded': len(elapsed),
+                    'failed': len(results) - len(elapsed),
+                    'wall_seconds': round(wall, 2),
+                    'jobs_per_minute': round(len(elapsed) / wall * 60, 2) if wall else 0,
+                    'p50_seconds': round(percentile(elapsed, 50), 2),
+                    'p95_seconds': round(percentile(elapsed, 95), 2),
+                    'peak_rss_mb': round(sampler.peak / 1024 / 1024, 1),
+                }
+                report.append(row)
+                print(f"并发 {level:>3}: {row['succeeded']}/{row['jobs']} 成功, {row['jobs_per_minute']} 任务/分钟, "
+                      f"p50 {row['p50_seconds']}s, p95 {row['p95_seconds']}s, 峰值内存 {row['peak_rss_mb']} MB")
+                for result in results:
+                    if not result.success:
+                        print(f"  [失败] {result.job.platform} {Path(str(result.job.account_file)).name}: {result.error}")
+    finally:
+        server.stop()
+
+    print("模拟平台统计: " + json.dumps(server.stats.to_dict(), ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
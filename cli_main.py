@@ -1,18 +1,15 @@
 import argparse
 import asyncio
 from datetime import datetime
-from os.path import exists
+from os.path import exists, getsize
 from pathlib import Path
 
 from conf import BASE_DIR
-from uploader.douyin_uploader.main import douyin_setup, DouYinVideo
-from uploader.ks_uploader.main import ks_setup, KSVideo
-from uploader.tencent_uploader.main import weixin_setup, TencentVideo
-from uploader.tk_uploader.main_chrome import tiktok_setup, TiktokVideo
-from utils.base_social_media import get_supported_social_media, get_cli_action, SOCIAL_MEDIA_DOUYIN, \
-    SOCIAL_MEDIA_TENCENT, SOCIAL_MEDIA_TIKTOK, SOCIAL_MEDIA_KUAISHOU
+from uploader.registry import get_platform
+from utils.base_social_media import get_supported_social_media, get_cli_action
 from utils.constant import TencentZoneTypes
 from utils.files_times import get_title_and_hashtags
+from utils.media_info import MediaInfoError, probe
 
 
 def parse_schedule(schedule_raw):
@@ -55,17 +52,13 @@ async def main():
     account_file = Path(BASE_DIR / "cookies" / f"{args.platform}_{args.account_name}.json")
     account_file.parent.mkdir(exist_ok=True)
 
+    # 只导入所选平台的上传器
+    platform = get_platform(args.platform)
+
     # 根据 action 处理不同的逻辑
     if args.action == 'login':
         print(f"Logging in with account {args.account_name} on platform {args.platform}")
-        if args.platform == SOCIAL_MEDIA_DOUYIN:
-            await douyin_setup(str(account_file), handle=True)
-        elif args.platform == SOCIAL_MEDIA_TIKTOK:
-            await tiktok_setup(str(account_file), handle=True)
-        elif args.platform == SOCIAL_MEDIA_TENCENT:
-            await weixin_setup(str(account_file), handle=True)
-        elif args.platform == SOCIAL_MEDIA_KUAISHOU:
-            await ks_setup(str(account_file), handle=True)
+        await platform.setup(str(account_file), handle=True)
     elif args.action == 'upload':
         title, tags = get_title_and_hashtags(args.video_file)
         video_file = args.video_file
@@ -77,23 +70,24 @@ async def main():
             print("Scheduling videos...")
             publish_date = parse_schedule(args.schedule)
 
-        if args.platform == SOCIAL_MEDIA_DOUYIN:
-            await douyin_setup(account_file, handle=False)
-            app = DouYinVideo(title, video_file, tags, publish_date, account_file)
-        elif args.platform == SOCIAL_MEDIA_TIKTOK:
-            await tiktok_setup(account_file, handle=True)
-            app = TiktokVideo(title, video_file, tags, publish_date, account_file)
-        elif args.platform == SOCIAL_MEDIA_TENCENT:
-            await weixin_setup(account_file, handle=True)
-            category = TencentZoneTypes.LIFESTYLE.value  # 标记原创需要否则不需要传
-            app = TencentVideo(title, video_file, tags, publish_date, account_file, category)
-        elif args.platform == SOCIAL_MEDIA_KUAISHOU:
-            await ks_setup(account_file, handle=True)
-            app = KSVideo(title, video_file, tags, publish_date, account_file)
-        else:
-            print("Wrong platform, please check your input")
-            exit()
+        # 先按视频元数据检查平台限制，开启 MEDIA_LIMITS_STRICT 时不符合就不再启动浏览器
+        try:
+            problems = platform.check_media_or_raise(probe(video_file), getsize(video_file) / (1024 * 1024))
+        except MediaInfoError as e:
+            print(f"[WARN] 无法读取视频元数据，跳过时长和编码检查: {e}")
+            problems = []
+        for problem in problems:
+            print(f"[WARN] {problem}")
 
+        # 上传时不弹出扫码登录，cookie 不存在或已失效时提示先执行 login
+        if not await platform.setup(account_file, handle=False):
+            print(f"[ERROR] cookie 文件不存在或已失效，请先执行 login: {account_file}")
+            return
+        for warning in platform.validate(video_file, account_file, title, tags):
+            print(f"[WARN] {warning}")
+        # 标记原创需要传 category，不支持的平台会忽略该参数
+        options = {'category': TencentZoneTypes.LIFESTYLE.value}
+        app = platform.build(title, video_file, tags, publish_date, account_file, options)
         await app.main()
 
 
@@ -4,3 +4,89 @@ BASE_DIR = Path(__file__).parent.resolve()
 XHS_SERVER = "http://127.0.0.1:11901"
 LOCAL_CHROME_PATH = ""   # change me necessary！ for example C:/Program Files/Google/Chrome/Application/chrome.exe
 LOCAL_CHROME_HEADLESS = True
+
+# 浏览器池：常驻浏览器数量、每个浏览器最多同时打开的上下文数、每个浏览器累计使用多少次后回收重启
+BROWSER_POOL_SIZE = 2
+BROWSER_POOL_MAX_CONTEXTS = 4
+BROWSER_POOL_RECYCLE_AFTER = 50
+
+# 并发发布：全局最多同时执行的发布任务数、单个平台最多同时执行的任务数（同一账号始终串行）
+PUBLISH_MAX_CONCURRENCY = 4
+PUBLISH_MAX_PER_PLATFORM = 2
+
+# 发布任务队列的后台工作线程数
+PUBLISH_QUEUE_WORKERS = 2
+
+# 账号 cookie 校验结果的缓存时间（秒）和并发校验数
+ACCOUNT_CHECK_TTL = 30 * 60
+ACCOUNT_CHECK_CONCURRENCY = 5
+
+# 扫码登录会话的超时时间（秒）和 SSE 心跳间隔（秒）
+LOGIN_SESSION_TIMEOUT = 300
+LOGIN_HEARTBEAT_INTERVAL = 15
+
+# 小红书签名服务为每个 a1 cookie 保留的预热页面数
+XHS_SIGN_PAGES_PER_A1 = 2
+# 等待单个视频上传并发布完成的总超时（秒）
+UPLOAD_WAIT_TIMEOUT = 30 * 60
+# 上传/发布失败或超时时是否保存调试截图（保存到 logs/screenshots）
+DEBUG_SCREENSHOTS = False
+# 分片上传默认分片大小（字节），需小于后端 MAX_CONTENT_LENGTH
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# 分片上传会话超过该时长（秒）未活动则清理临时文件
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+# SQLite 等待写锁的超时时间（秒）
+SQLITE_BUSY_TIMEOUT = 30
+# SQLite 连接池保留的空闲连接数
+SQLITE_POOL_SIZE = 8
+# 素材文件夹监控支持的视频格式
+SUPPORTED_VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.flv', '.wmv', '.webm', '.m4v')
+# 是否同时监控子文件夹
+WATCH_RECURSIVE = False
+# 文件大小和修改时间保持不变超过该时长（秒）才视为写入完成
+WATCH_DEBOUNCE_SECONDS = 2
+# 统一检查待导入文件状态的间隔（秒）
+WATCH_SWEEP_INTERVAL = 1
+# 并发导入素材的线程数
+WATCH_IMPORT_WORKERS = 4
+# 每批写入数据库的素材数量
+WATCH_IMPORT_BATCH_SIZE = 20
+# 监控文件夹素材导入方式：hardlink 硬链接 / reflink 写时复制 / move 移动 / reference 原地引用（符号链接）/ copy 复制
+# hardlink、reflink 在跨文件系统或不支持时自动退回复制。默认 reflink，素材与原文件互不影响；
+# hardlink / reference 与原文件共用数据，原地修改原文件会改变素材库中的视频，而记录的内容哈希不会更新
+WATCH_IMPORT_MODE = 'reflink'
+# 监控文件夹已处理文件索引在内存中缓存的条目数
+WATCH_INDEX_CACHE_SIZE = 10000
+# 定时发布方式：local 由本地调度器在发布时间到达时再发布 / platform 使用各平台自带的定时发布
+PUBLISH_SCHEDULE_MODE = 'local'
+# 各平台每个账号每天最多定时发布的视频数（1 小红书 / 2 视频号 / 3 抖音 / 4 快手），与 videosPerDay 取较小值
+PLATFORM_DAILY_LIMITS = {1: 3, 2: 5, 3: 5, 4: 5}
+# 定时发布时间随机向后偏移的最大分钟数（每个账号抽取一次，该账号的全部发布时间偏移相同），0 表示准点发布
+SCHEDULE_JITTER_MINUTES = 0
+# 日志模式：async 由后台线程写日志（调用方只入队）/ sync 在调用线程中直接写入，可用环境变量 SAU_LOG_MODE 覆盖
+LOG_MODE = 'async'
+# 异常日志是否输出完整调用栈和变量值（可能包含 cookie 等敏感信息，仅调试时开启），可用环境变量 SAU_LOG_DIAGNOSE 覆盖
+LOG_DIAGNOSE = False
+# 业务日志文件是否写成 JSON Lines，便于程序解析，可用环境变量 SAU_LOG_JSON 覆盖
+LOG_JSON = False
+# 把平台域名的请求转发到其他地址，仅用于本地模拟服务器和性能测试，例如 {"https://creator.douyin.com": "http://127.0.0.1:18080/douyin"}
+PLATFORM_BASE_URL_OVERRIDES = {}
+# 后端监听地址和端口（python sau_backend.py 开发模式与 python sau_asgi.py 生产模式共用）
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 5409
+# 生产模式下执行同步接口的线程数
+SERVER_THREADS = 16
+# 退出时等待执行中的发布任务完成的最长秒数，超时未完成的任务下次启动时重新执行
+SHUTDOWN_DRAIN_TIMEOUT = 120
+# /getFile 视频预览的浏览器缓存秒数，过期后凭 ETag 重新验证（素材文件名含 uuid，内容不会变化）
+FILE_CACHE_MAX_AGE = 24 * 60 * 60
+# 后端部署在支持 X-Sendfile 的 Apache / lighttpd 之后时设为 True，由前置服务器用 sendfile 发送 /getFile 的视频文件
+USE_X_SENDFILE = False
+# 读取素材视频元数据（时长、分辨率、编码）的进程数
+MEDIA_PROBE_WORKERS = 2
+# 生成素材缩略图（需要安装 ffmpeg）的线程数
+THUMBNAIL_WORKERS = 2
+# 发布到支持自定义封面的平台（抖音、TikTok）且未指定封面时，使用素材缩略图作为封面
+USE_THUMBNAIL_AS_COVER = True
+# 视频超出平台时长、大小或编码限制（见 uploader/registry.py，按公开规则估计）时是否直接判为失败；False 时只输出提示，仍尝试上传
+MEDIA_LIMITS_STRICT = False
@@ -0,0 +1,94 @@
+"""
+账号 cookie 校验模块
+并发校验账号 cookie，校验结果缓存在 user_info 的 last_checked / last_valid 列中，
+缓存过期后由后台线程统一刷新，接口直接返回缓存结果
+"""
+
+import asyncio
+import threading
+import time
+
+from utils.settings import ACCOUNT_CHECK_TTL, ACCOUNT_CHECK_CONCURRENCY
+from myUtils.db import db
+from utils.metrics import cookie_check_seconds, platform_name
+
+
+class AccountChecker(object):
+    """账号校验器，同一时刻最多只有一轮后台刷新"""
+
+    def __init__(self, ttl=ACCOUNT_CHECK_TTL, concurrency=ACCOUNT_CHECK_CONCURRENCY):
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def is_refreshing(self):
+        return self._refreshing
+
+    def is_stale(self, last_checked, now=None):
+        now = now or time.time()
+        return last_checked is None or now - last_checked >= self.ttl
+
+    async def check_accounts(self, accounts):
+        """
+        并发校验一组账号，返回 [(id, 是否有效)]
+        :param accounts: [(id, type, filePath)]
+        """
+        # 延迟导入：后端启动时不加载 playwright，第一次校验账号时才导入
+        from myUtils.auth import check_cookie
+        from utils.browser_pool import use_browser_pool
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check_one(account_id, account_type, file_path):
+            async with semaphore:
+                try:
+                    with cookie_check_seconds.time(platform=platform_name(account_type)):
+                        return account_id, bool(await check_cookie(account_type, file_path))
+                except Exception as e:
+                    print(f"[ERROR] 校验账号 {account_id} 失败: {e}")
+                    return account_id, False
+
+        # 一个浏览器，每个账号一个上下文
+        async with use_browser_pool(headless=True, size=1, max_contexts=self.concurrency):
+            return await asyncio.gather(*(check_one(*account) for account in accounts))
+
+    def save_results(self, results):
+        """一次事务批量写回校验结果"""
+        now = int(time.time())
+        with db.connect() as conn:
+            conn.executemany('''
+                UPDATE user_info SET status = ?, last_valid = ?, last_checked = ? WHERE id = ?
+            ''', [(int(valid), int(valid), now, account_id) for account_id, valid in results])
+
+    def refresh(self, accounts):
+        """同步校验并写回结果"""
+        results = asyncio.run(self.check_accounts(accounts))
+        self.save_results(results)
+        print(f"[OK] 已校验 {len(results)} 个账号")
+        return results
+
+    def refresh_in_background(self, accounts):
+        """在后台线程刷新，已有刷新在进行时直接返回 False"""
+        if not accounts:
+            return False
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh(accounts)
+            except Exception as e:
+                print(f"[ERROR] 后台校验账号失败: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="account-checker", daemon=True).start()
+        return True
+
+
+# 全局账号校验器实例
+account_checker = AccountChecker()
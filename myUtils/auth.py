@@ -2,20 +2,13 @@ import asyncio
 import configparser
 import os
 
-from playwright.async_api import async_playwright
-from xhs import XhsClient
-
 from conf import BASE_DIR
-from utils.base_social_media import set_init_script
+from utils.browser_pool import pooled_context
 from utils.log import tencent_logger, kuaishou_logger, douyin_logger
 from pathlib import Path
-from uploader.xhs_uploader.main import sign_local
 
 async def cookie_auth_douyin(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file, headless=True) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -34,15 +27,10 @@ async def cookie_auth_douyin(account_file):
                 return True
         except:
             douyin_logger.error("[+] 等待5秒 cookie 失效")
-            await context.close()
-            await browser.close()
             return False
 
 async def cookie_auth_tencent(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file, headless=True) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -56,10 +44,7 @@ async def cookie_auth_tencent(account_file):
             return True
 
 async def cookie_auth_ks(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file, headless=True) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -75,10 +60,7 @@ async def cookie_auth_ks(account_file):
 
 
 async def cookie_auth_xhs(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file, headless=True) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -87,8 +69,6 @@ async def cookie_auth_xhs(account_file):
             await page.wait_for_url("https://creator.xiaohongshu.com/creator-micro/content/upload", timeout=5000)
         except:
             print("[+] 等待5秒 cookie 失效")
-            await context.close()
-            await browser.close()
             return False
         # 2024.06.17 抖音创作者中心改版
         if await page.get_by_text('手机号登录').count() or await page.get_by_text('扫码登录').count():
@@ -100,21 +80,12 @@ async def cookie_auth_xhs(account_file):
 
 
 async def check_cookie(type,file_path):
-    match type:
-        # 小红书
-        case 1:
-            return await cookie_auth_xhs(Path(BASE_DIR / "cookiesFile" / file_path))
-        # 视频号
-        case 2:
-            return await cookie_auth_tencent(Path(BASE_DIR / "cookiesFile" / file_path))
-        # 抖音
-        case 3:
-            return await cookie_auth_douyin(Path(BASE_DIR / "cookiesFile" / file_path))
-        # 快手
-        case 4:
-            return await cookie_auth_ks(Path(BASE_DIR / "cookiesFile" / file_path))
-        case _:
-            return False
+    # 平台对应的校验函数由注册表在首次使用时导入
+    from uploader.registry import platforms
+    spec = platforms.get(type)
+    if spec is None or not spec.supports('cookie_checker'):
+        return False
+    return await spec.cookie_checker(Path(BASE_DIR / "cookiesFile" / file_path))
 
 # a = asyncio.run(check_cookie(1,"3a6cfdc0-3d51-11f0-8507-44e51723d63c.json"))
 # print(a)
@@ -0,0 +1,189 @@
+"""
+分片断点续传上传模块
+客户端先调用 init 创建上传会话，再按分片序号逐个上传原始字节：
+每个分片直接流式写入 videoFile/.uploading 下预分配文件的对应偏移位置，不在内存中缓存整个文件；
+已收到的分片记录在 SQLite 中，断线后可通过状态接口查询缺失分片继续上传，全部到齐后 complete 落盘、计算内容哈希并写入 file_records
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+from utils.settings import BASE_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_SESSION_TTL
+from myUtils.db import db
+from myUtils.file_index import hash_file, register_file
+
+# 分片大小上下限（单个分片请求仍受 MAX_CONTENT_LENGTH 限制）
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# 写入分片时每次从请求流读取的字节数
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# 上传会话状态
+UPLOAD_UPLOADING = 'uploading'
+UPLOAD_COMPLETED = 'completed'
+UPLOAD_CANCELLED = 'cancelled'
+
+class ChunkUploadError(Exception):
+    """客户端请求参数错误（分片序号越界、长度不符、会话状态不对等）"""
+
+
+class ChunkUploadManager(object):
+    """分片上传会话管理器"""
+
+    def __init__(self, database=db, upload_dir=None, chunk_size=UPLOAD_CHUNK_SIZE, session_ttl=UPLOAD_SESSION_TTL):
+        self.db = database
+        self.upload_dir = Path(upload_dir or BASE_DIR / "videoFile")
+        self.temp_dir = self.upload_dir / ".uploading"
+        self.chunk_size = min(max(chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+        self.session_ttl = session_ttl
+
+    def _part_path(self, upload_id):
+        return self.temp_dir / f"{upload_id}.part"
+
+    def init(self, filename, total_size, chunk_size=None):
+        """创建上传会话并预分配临时文件，返回会话状态"""
+        filename = os.path.basename(filename or '')
+        if not filename:
+            raise ChunkUploadError("filename is required")
+        if total_size is None or total_size <= 0:
+            raise ChunkUploadError("filesize must be positive")
+        chunk_size = min(max(chunk_size or self.chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+        total_chunks = (total_size + chunk_size - 1) // chunk_size
+
+        # 与 /uploadSave 相同的 uuid_文件名 命名方式
+        upload_id = uuid.uuid4().hex
+        final_filename = f"{uuid.uuid1()}_{filename}"
+
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        # truncate 生成稀疏文件，不实际写入 total_size 字节
+        with open(self._part_path(upload_id), 'wb') as f:
+            f.truncate(total_size)
+
+        with self.db.connect() as conn:
+            conn.execute('''
+                INSERT INTO upload_sessions (id, filename, file_path, total_size, chunk_size, total_chunks, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (upload_id, filename, final_filename, total_size, chunk_size, total_chunks, UPLOAD_UPLOADING))
+        print(f"[OK] 创建上传会话 {upload_id}: {filename} ({total_size} bytes, {total_chunks} 片)")
+        return self.status(upload_id)
+
+    def _get_session(self, conn, upload_id):
+        return conn.execute('SELECT * FROM upload_sessions WHERE id = ?', (upload_id,)).fetchone()
+
+    def status(self, upload_id):
+        """返回会话信息与已收到的分片序号，会话不存在时返回 None"""
+        with self.db.connect() as conn:
+            session = self._get_session(conn, upload_id)
+            if session is None:
+                return None
+            received = [row[0] for row in conn.execute('''
+                SELECT chunk_index FROM upload_chunks WHERE upload_id = ? ORDER BY chunk_index
+            ''', (upload_id,))]
+        data = dict(session)
+        data['received'] = received
+        data['received_bytes'] = sum(self._chunk_length(session, index) for index in received)
+        if session['status'] == UPLOAD_COMPLETED:
+            data['progress'] = 1
+        else:
+            data['progress'] = round(len(received) / session['total_chunks'], 4)
+        return data
+
+    @staticmethod
+    def _chunk_length(session, index):
+        start = index * session['chunk_size']
+        return min(session['chunk_size'], session['total_size'] - start)
+
+    def write_chunk(self, upload_id, index, stream, content_length):
+        """
+        把一个分片流式写入临时文件的对应偏移，重复上传同一分片会覆盖写入
+        :param stream: 请求体的文件对象（如 request.stream）
+        :param content_length: 请求体长度，必须等于该分片的期望长度
+        :return: 会话状态；会话不存在时返回 None
+        """
+        with self.db.connect() as conn:
+            session = self._get_session(conn, upload_id)
+        if session is None:
+            return None
+        if session['status'] != UPLOAD_UPLOADING:
+            raise ChunkUploadError(f"upload is {session['status']}")
+        if index < 0 or index >= session['total_chunks']:
+            raise ChunkUploadError(f"chunk index out of range: 0 ~ {session['total_chunks'] - 1}")
+        expected = self._chunk_length(session, index)
+        if content_length != expected:
+            raise ChunkUploadError(f"chunk {index} must be {expected} bytes, got {content_length}")
+
+        written = 0
+        with open(self._part_path(upload_id), 'r+b') as f:
+            f.seek(index * session['chunk_size'])
+            while written < expected:
+                buffer = stream.read(min(COPY_BUFFER_SIZE, expected - written))
+                if not buffer:
+                    break
+                f.write(buffer)
+                written += len(buffer)
+        if written != expected:
+            # 连接中断导致分片不完整，不记录，客户端重传该分片即可
+            raise ChunkUploadError(f"chunk {index} incomplete: {written}/{expected} bytes")
+
+        with self.db.connect() as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO upload_chunks (upload_id, chunk_index) VALUES (?, ?)
+            ''', (upload_id, index))
+            conn.execute('UPDATE upload_sessions SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (upload_id,))
+        return self.status(upload_id)
+
+    def complete(self, upload_id):
+        """所有分片到齐后把临时文件移动到 videoFile 并写入 file_records，返回与 /uploadSave 相同的数据"""
+        data = self.status(upload_id)
+        if data is None:
+            return None
+        if data['status'] == UPLOAD_COMPLETED:
+            return {"filename": data['filename'], "filepath": data['file_path']}
+        if data['status'] != UPLOAD_UPLOADING:
+            raise ChunkUploadError(f"upload is {data['status']}")
+        missing = data['total_chunks'] - len(data['received'])
+        if missing:
+            raise ChunkUploadError(f"{missing} chunks missing")
+
+        final_path = self.upload_dir / data['file_path']
+        os.replace(self._part_path(upload_id), final_path)
+        # 分片乱序到达，只能在合并完成后分块计算内容哈希；内容已存在时复用已有素材记录
+        record, duplicate = register_file(data['filename'], final_path, hash_file(final_path), data['total_size'])
+        with self.db.connect() as conn:
+            conn.execute('''
+                UPDATE upload_sessions SET status = ?, file_path = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (UPLOAD_COMPLETED, record['file_path'], upload_id))
+            conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+        print(f"[OK] 分片上传完成并已记录: {record['file_path']}")
+        return {"filename": record['filename'], "filepath": record['file_path'], "duplicate": duplicate}
+
+    def cancel(self, upload_id):
+        """取消上传中的会话并删除临时文件"""
+        with self.db.connect() as conn:
+            cursor = conn.execute('''
+                UPDATE upload_sessions SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?
+            ''', (UPLOAD_CANCELLED, upload_id, UPLOAD_UPLOADING))
+            cancelled = cursor.rowcount > 0
+            if cancelled:
+                conn.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+        if cancelled:
+            self._part_path(upload_id).unlink(missing_ok=True)
+        return cancelled
+
+    def cleanup_expired(self):
+        """清理超过 session_ttl 未活动的上传会话及其临时文件"""
+        with self.db.connect() as conn:
+            rows = conn.execute('''
+                SELECT id FROM upload_sessions
+                WHERE status = ? AND updated_at < datetime('now', ?)
+            ''', (UPLOAD_UPLOADING, f"-{int(self.session_ttl)} seconds")).fetchall()
+        for row in rows:
+            self.cancel(row['id'])
+        if rows:
+            print(f"[OK] 已清理 {len(rows)} 个过期的上传会话")
+        return len(rows)
+
+
+# 全局分片上传管理器实例
+chunk_upload_manager = ChunkUploadManager()
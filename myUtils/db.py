@@ -0,0 +1,296 @@
+"""
+SQLite 数据访问模块
+所有模块通过 db.connect() 复用连接池中的连接（WAL、synchronous=NORMAL、busy_timeout），
+连接保留各自的预编译语句缓存，不再每次请求都重新建立连接；
+表结构由 MIGRATIONS 按版本号（PRAGMA user_version）在启动时依次升级
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from queue import LifoQueue, Empty, Full
+
+from utils.settings import BASE_DIR, SQLITE_BUSY_TIMEOUT, SQLITE_POOL_SIZE
+from utils.metrics import sqlite_seconds
+
+DB_PATH = Path(BASE_DIR / "db" / "database.db")
+
+# 每个连接缓存的预编译语句数量
+STATEMENT_CACHE_SIZE = 256
+
+# 由触发器维护数据版本号（table_versions）的表
+VERSIONED_TABLES = ('file_records', 'user_info')
+
+
+def _add_column(conn, table, column, definition):
+    """旧数据库可能已通过其他方式加过该列，先检查再添加"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _migrate_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_info (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type INTEGER NOT NULL,
+            filePath TEXT NOT NULL,  -- 存储文件路径
+            userName TEXT NOT NULL,
+            status INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS file_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, -- 唯一标识每条记录
+            filename TEXT NOT NULL,               -- 文件名
+            filesize REAL,                        -- 文件大小（单位：MB）
+            upload_time DATETIME DEFAULT CURRENT_TIMESTAMP, -- 上传时间，默认当前时间
+            file_path TEXT                        -- 文件路径
+        )
+    ''')
+
+
+def _migrate_account_check_columns(conn):
+    _add_column(conn, 'user_info', 'last_checked', 'INTEGER')  # 最近一次 cookie 校验时间（时间戳，秒）
+    _add_column(conn, 'user_info', 'last_valid', 'INTEGER')  # 最近一次 cookie 校验结果
+
+
+def _migrate_publish_jobs(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS publish_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type INTEGER,                         -- 平台标识
+            payload TEXT NOT NULL,                -- /postVideo 请求体（JSON）
+            status TEXT NOT NULL DEFAULT 'pending', -- pending / running / success / failed / cancelled
+            total INTEGER DEFAULT 0,              -- (文件, 账号) 子任务总数
+            finished INTEGER DEFAULT 0,           -- 已完成的子任务数（含失败）
+            failed INTEGER DEFAULT 0,             -- 失败的子任务数
+            result TEXT,                          -- 各子任务的执行结果（JSON）
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migrate_upload_sessions(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,                  -- 上传会话 id
+            filename TEXT NOT NULL,               -- 原始文件名
+            file_path TEXT NOT NULL,              -- 完成后在 videoFile 下的文件名
+            total_size INTEGER NOT NULL,          -- 文件总字节数
+            chunk_size INTEGER NOT NULL,          -- 分片字节数（最后一片可能更小）
+            total_chunks INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'uploading', -- uploading / completed / cancelled
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS upload_chunks (
+            upload_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            PRIMARY KEY (upload_id, chunk_index)
+        )
+    ''')
+
+
+def _migrate_content_hash(conn):
+    _add_column(conn, 'file_records', 'content_hash', 'TEXT')  # 文件内容 sha256，用于去重
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_content_hash ON file_records(content_hash)')
+
+
+def _migrate_lookup_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_info_type ON user_info(type)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_info_file_path ON user_info(filePath)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_filename ON file_records(filename)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_publish_jobs_status ON publish_jobs(status, id)')
+
+
+def _migrate_watched_files(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS watched_files (
+            source_path TEXT PRIMARY KEY,         -- 监控文件夹中源文件的绝对路径
+            size INTEGER NOT NULL,                -- 处理时的文件字节数
+            mtime_ns INTEGER NOT NULL,            -- 处理时的修改时间（纳秒）
+            content_hash TEXT,                    -- 文件内容 sha256
+            file_record_id INTEGER,               -- 对应的 file_records.id
+            processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migrate_scheduled_jobs(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_at INTEGER NOT NULL,              -- 发布时间（时间戳，秒）
+            payload TEXT NOT NULL,                -- 到期后写入发布任务队列的请求体（JSON）
+            status TEXT NOT NULL DEFAULT 'pending', -- pending / dispatched / cancelled
+            job_id INTEGER,                       -- 到期后生成的 publish_jobs.id
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_status_run_at ON scheduled_jobs(status, run_at)')
+
+
+def _migrate_scheduled_jobs_account(conn):
+    _add_column(conn, 'scheduled_jobs', 'account', 'TEXT')  # 发布账号（cookie 文件名），用于按账号排期
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_account_run_at ON scheduled_jobs(account, run_at)')
+
+
+def _migrate_listing(conn):
+    # 素材 uuid（file_path 中第一个下划线之前的部分）改为存储列，列表接口不再逐行拆分字符串
+    _add_column(conn, 'file_records', 'uuid', 'TEXT')
+    conn.execute('''
+        UPDATE file_records SET uuid = CASE
+            WHEN instr(file_path, '_') > 0 THEN substr(file_path, 1, instr(file_path, '_') - 1)
+            ELSE IFNULL(file_path, '') END
+        WHERE uuid IS NULL
+    ''')
+    # 列表接口的排序与过滤索引（键集分页按 (排序列, id) 翻页）
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_filesize ON file_records(filesize)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_records_upload_time ON file_records(upload_time)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_info_user_name ON user_info(userName)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_info_status ON user_info(status)')
+    # 每张表的数据版本号，由触发器在增删改时递增，用于生成列表接口的 ETag
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        conn.execute('INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+            ''')
+
+
+def _migrate_media_info(conn):
+    # 视频元数据，由 myUtils/media_probe.py 在素材登记后读取
+    _add_column(conn, 'file_records', 'duration', 'REAL')  # 时长（秒）
+    _add_column(conn, 'file_records', 'width', 'INTEGER')  # 显示宽度（已按旋转信息交换宽高）
+    _add_column(conn, 'file_records', 'height', 'INTEGER')
+    _add_column(conn, 'file_records', 'video_codec', 'TEXT')  # 视频编码，如 h264 / hevc
+    _add_column(conn, 'file_records', 'audio_codec', 'TEXT')  # 音频编码，如 aac
+    _add_column(conn, 'file_records', 'bitrate', 'INTEGER')  # 平均码率（bit/s）
+    _add_column(conn, 'file_records', 'probed_at', 'INTEGER')  # 读取时间（时间戳），NULL 表示尚未读取
+
+
+# (版本号, 说明, 升级函数)，只能追加，不要修改已发布的版本
+MIGRATIONS = [
+    (1, "user_info / file_records 基础表", _migrate_base_tables),
+    (2, "user_info 账号校验缓存列", _migrate_account_check_columns),
+    (3, "publish_jobs 发布任务表", _migrate_publish_jobs),
+    (4, "upload_sessions / upload_chunks 分片上传表", _migrate_upload_sessions),
+    (5, "file_records.content_hash 内容哈希列", _migrate_content_hash),
+    (6, "常用查询索引", _migrate_lookup_indexes),
+    (7, "watched_files 监控文件夹已处理文件索引", _migrate_watched_files),
+    (8, "scheduled_jobs 本地定时发布表", _migrate_scheduled_jobs),
+    (9, "scheduled_jobs.account 按账号排期", _migrate_scheduled_jobs_account),
+    (10, "file_records.uuid 列、列表排序索引与 table_versions 数据版本号", _migrate_listing),
+    (11, "file_records 视频元数据列", _migrate_media_info),
+]
+
+
+class Database(object):
+    """SQLite 连接池，连接在线程间复用，同一时刻只被一个线程持有"""
+
+    def __init__(self, path=DB_PATH, pool_size=SQLITE_POOL_SIZE, busy_timeout=SQLITE_BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        # 后进先出，优先复用刚归还、语句缓存最热的连接
+        self._idle = LifoQueue(maxsize=max(1, pool_size))
+        self._migrate_lock = threading.Lock()
+        self._migrated = False
+
+    def _create(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._create()
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            # 并发高峰时临时多建的连接，用完即关
+            conn.close()
+
+    @contextmanager
+    def connect(self):
+        """
+        取出一个连接，退出时自动提交（异常时回滚）并归还连接池
+        用法与 `with sqlite3.connect(...) as conn` 相同，但不会关闭连接
+        """
+        if not self._migrated:
+            self.migrate()
+        conn = self._acquire()
+        start = time.perf_counter()
+        try:
+            with conn:
+                yield conn
+        except sqlite3.ProgrammingError:
+            # 连接可能已损坏（例如被误关闭），不再放回连接池
+            conn = None
+            raise
+        finally:
+            sqlite_seconds.observe(time.perf_counter() - start)
+            if conn is not None:
+                self._release(conn)
+
+    def migrate(self):
+        """按版本号依次执行尚未执行的迁移，返回当前版本号"""
+        with self._migrate_lock:
+            if self._migrated:
+                return MIGRATIONS[-1][0]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._acquire()
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                for target, description, upgrade in MIGRATIONS:
+                    if target <= version:
+                        continue
+                    # 每个版本单独一个事务（DDL 默认不开启事务，需显式 BEGIN），失败时不会留下半升级的表结构
+                    with conn:
+                        conn.execute('BEGIN IMMEDIATE')
+                        upgrade(conn)
+                        conn.execute(f'PRAGMA user_version = {int(target)}')
+                    version = target
+                    print(f"[OK] 数据库已升级到版本 {target}: {description}")
+            finally:
+                self._release(conn)
+            self._migrated = True
+            return version
+
+    def close(self):
+        """关闭连接池中所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+
+# 全局数据库实例
+db = Database()
@@ -0,0 +1,156 @@
+"""
+素材内容哈希与去重模块
+保存上传文件时边写边计算 sha256（按块读取，不把整个文件读入内存），
+哈希值存入 file_records.content_hash 并建立索引；内容已存在的素材直接复用已有记录和文件，不再重复存储
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+
+from conf import BASE_DIR
+from myUtils.db import db
+from myUtils.media_probe import media_prober
+from myUtils.thumbnails import thumbnail_generator
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+
+# 计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """分块计算文件的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_uuid(stored_name):
+    """素材 uuid：保存的文件名（uuid_原文件名）中第一个下划线之前的部分"""
+    return (stored_name or '').split('_', 1)[0]
+
+
+def save_with_hash(stream, dest_path):
+    """
+    把可读流写入 dest_path，同时计算 sha256
+    :return: (哈希值, 写入字节数)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def find_by_hash(content_hash, conn=None):
+    """按内容哈希查找素材记录（走 content_hash 索引），仅返回文件仍存在的记录"""
+    if conn is None:
+        with db.connect() as conn:
+            return find_by_hash(content_hash, conn)
+    rows = conn.execute('''
+        SELECT * FROM file_records WHERE content_hash = ? ORDER BY id
+    ''', (content_hash,)).fetchall()
+    for row in rows:
+        if row['file_path'] and (VIDEO_DIR / row['file_path']).exists():
+            return dict(row)
+    return None
+
+
+def register_file(filename, stored_path, content_hash, size=None, remove_duplicate=True):
+    """
+    登记一个已保存到 videoFile 的素材文件
+    内容已存在时删除刚保存的文件，返回已有记录；否则插入新记录，并在后台读取视频元数据、生成缩略图
+    :param stored_path: 刚保存的文件路径（位于 videoFile 下）
+    :param remove_duplicate: 内容重复时是否删除 stored_path（文件原本就在 videoFile 中时应传 False）
+    :return: (记录字典, 是否重复)
+    """
+    return register_files([(filename, stored_path, content_hash, size, remove_duplicate)])[0]
+
+
+def register_files(entries):
+    """
+    在一个事务中批量登记素材文件，规则同 register_file
+    :param entries: [(filename, stored_path, content_hash, size, remove_duplicate)]
+    :return: [(记录字典, 是否重复)]
+    """
+    results = []
+    with db.connect() as conn:
+        # 先取得写锁再查重：监控文件夹导入、/uploadSave 和分片上传可能同时登记相同内容，
+        # 默认的延迟事务下两边都会查不到已有记录而各插入一条
+        conn.execute('BEGIN IMMEDIATE')
+        for filename, stored_path, content_hash, size, remove_duplicate in entries:
+            stored_path = Path(stored_path)
+            if size is None:
+                size = stored_path.stat().st_size
+            # 同一批次中先插入的记录在本连接内可见，批次内的重复文件同样会被去重
+            existing = find_by_hash(content_hash, conn)
+            if existing is not None:
+                if remove_duplicate and existing['file_path'] != stored_path.name:
+                    # 与已有素材共用同一份文件
+                    stored_path.unlink(missing_ok=True)
+                print(f"[INFO] 素材内容已存在，复用记录 {existing['id']}: {existing['file_path']}")
+                results.append((existing, True))
+                continue
+            filesize = round(float(size) / (1024 * 1024), 2)
+            cursor = conn.execute('''
+                INSERT INTO file_records (filename, filesize, file_path, content_hash, uuid)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (filename, filesize, stored_path.name, content_hash, file_uuid(stored_path.name)))
+            results.append(({
+                'id': cursor.lastrowid,
+                'filename': filename,
+                'filesize': filesize,
+                'file_path': stored_path.name,
+                'content_hash': content_hash,
+                'uuid': file_uuid(stored_path.name),
+            }, False))
+    # 事务提交后再读取元数据，回调中的 UPDATE 才能找到新记录
+    added = [record for record, duplicate in results if not duplicate]
+    media_prober.submit_records(added)
+    thumbnail_generator.submit_records(added)
+    return results
+
+
+def backfill_hashes():
+    """为旧记录补算内容哈希"""
+    with db.connect() as conn:
+        rows = conn.execute('''
+            SELECT id, file_path FROM file_records WHERE content_hash IS NULL AND file_path IS NOT NULL
+        ''').fetchall()
+    updates = []
+    hashed = []
+    for record_id, file_path in rows:
+        path = VIDEO_DIR / file_path
+        if not path.is_file():
+            continue
+        try:
+            content_hash = hash_file(path)
+        except OSError as e:
+            print(f"[ERROR] 计算素材哈希失败 {file_path}: {e}")
+            continue
+        updates.append((content_hash, record_id))
+        hashed.append({'content_hash': content_hash, 'file_path': file_path})
+    if updates:
+        with db.connect() as conn:
+            conn.executemany('UPDATE file_records SET content_hash = ? WHERE id = ?', updates)
+        print(f"[OK] 已为 {len(updates)} 条素材记录补算内容哈希")
+        # 缩略图按内容哈希存放，启动时的缩略图补全会跳过这些尚无哈希的记录，补算后在这里提交
+        thumbnail_generator.submit_records(hashed)
+    return len(updates)
+
+
+def backfill_hashes_in_background():
+    """在后台线程补算旧记录的哈希，避免阻塞启动"""
+    def run():
+        try:
+            backfill_hashes()
+        except Exception as e:
+            print(f"[ERROR] 补算素材哈希失败: {e}")
+
+    threading.Thread(target=run, name="file-hash-backfill", daemon=True).start()
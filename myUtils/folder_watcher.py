@@ -1,102 +1,242 @@
 """
 素材文件夹监控模块
 使用 watchdog 实时监控指定文件夹的视频文件变化，并自动导入到数据库
+事件回调只把文件登记到待处理集合（按路径去抖），由后台线程定期统一 stat 判断文件是否写入完成，
+稳定的文件交给线程池并发导入，同一批文件在一个事务中写入数据库，不阻塞 watchdog 的事件线程
 """
 
 import os
-import sqlite3
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from threading import Thread
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from conf import BASE_DIR, SUPPORTED_VIDEO_EXTENSIONS
+from utils.settings import (BASE_DIR, SUPPORTED_VIDEO_EXTENSIONS, WATCH_RECURSIVE, WATCH_DEBOUNCE_SECONDS,
+                            WATCH_SWEEP_INTERVAL, WATCH_IMPORT_WORKERS, WATCH_IMPORT_BATCH_SIZE, WATCH_IMPORT_MODE)
+from myUtils.file_index import hash_file, find_by_hash, register_files
+from myUtils.import_strategy import IMPORT_MOVE, import_file
+from myUtils.watched_index import WatchedFileIndex, scan_folder
+
+
+class PendingFile(object):
+    """等待写入完成的文件"""
+
+    def __init__(self, now):
+        self.size = None
+        self.mtime = None
+        self.changed_at = now  # 最近一次观察到变化的时间
+
 
 class MaterialFileHandler(FileSystemEventHandler):
     """素材文件事件处理器"""
 
-    def __init__(self, video_dir):
+    def __init__(self, video_dir, index=None, debounce=WATCH_DEBOUNCE_SECONDS, sweep_interval=WATCH_SWEEP_INTERVAL,
+                 workers=WATCH_IMPORT_WORKERS, batch_size=WATCH_IMPORT_BATCH_SIZE, import_mode=WATCH_IMPORT_MODE):
         super().__init__()
         self.video_dir = Path(video_dir)
-        self.processed_files = set()  # 已处理的文件集合，避免重复处理
+        self.import_mode = import_mode
+        self.index = index or WatchedFileIndex()  # 已处理的源文件索引，避免重复处理
+        self.debounce = debounce
+        self.sweep_interval = sweep_interval
+        self.batch_size = max(1, batch_size)
+        self._pending = {}  # 路径 -> PendingFile
+        self._importing = set()  # 已提交到线程池、尚未导入完成的路径
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="material-import")
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="material-sweeper", daemon=True)
+        self._sweeper.start()
 
     def on_created(self, event):
         """当文件被创建时触发"""
+        if not event.is_directory:
+            self.enqueue(event.src_path)
+
+    def on_modified(self, event):
+        """文件仍在写入时会持续触发，刷新去抖时间"""
+        if not event.is_directory:
+            self.enqueue(event.src_path)
+
+    def on_moved(self, event):
+        """文件被重命名或移动到监控目录中（例如下载完成后去掉临时后缀）"""
         if event.is_directory:
             return
+        with self._lock:
+            self._pending.pop(str(Path(event.src_path)), None)
+        self.enqueue(event.dest_path)
 
-        file_path = Path(event.src_path)
+    def enqueue(self, file_path):
+        """登记待导入的文件，重复事件只会刷新同一条记录"""
+        file_path = Path(file_path)
 
         # 检查是否是支持的视频文件
         if file_path.suffix.lower() not in SUPPORTED_VIDEO_EXTENSIONS:
             return
-
-        # 避免重复处理
-        if str(file_path) in self.processed_files:
+        # 跳过分片上传的临时目录
+        if ".uploading" in file_path.parts:
             return
 
-        # 等待文件完全写入（避免文件正在复制时就开始处理）
-        time.sleep(1)
+        key = str(file_path)
+        with self._lock:
+            if key in self._importing:
+                return
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = PendingFile(time.monotonic())
+            else:
+                pending.changed_at = time.monotonic()
 
-        # 检查文件是否完全写入（文件大小不再变化）
-        if not self._wait_for_file_stable(file_path):
-            print(f"[WARN] 文件 {file_path.name} 可能未完全复制，跳过")
+    def _sweep_loop(self):
+        while not self._stopped.wait(self.sweep_interval):
+            try:
+                self._sweep()
+            except Exception as e:
+                print(f"[ERROR] 检查待导入文件失败: {e}")
+
+    def _sweep(self):
+        """统一 stat 一次所有待处理文件，大小和修改时间在去抖时间内不变即视为写入完成"""
+        with self._lock:
+            items = list(self._pending.items())
+        if not items:
             return
 
-        print(f"[INFO] 检测到新视频文件: {file_path.name}")
-        self.import_to_database(file_path)
-        self.processed_files.add(str(file_path))
+        now = time.monotonic()
+        ready = []
+        removed = []
+        for key, pending in items:
+            try:
+                st = os.stat(key)
+            except FileNotFoundError:
+                removed.append(key)
+                continue
+            if (st.st_size, st.st_mtime_ns) != (pending.size, pending.mtime):
+                pending.size, pending.mtime = st.st_size, st.st_mtime_ns
+                pending.changed_at = now
+            elif st.st_size > 0 and now - pending.changed_at >= self.debounce:
+                # 避免重复处理：大小和修改时间与索引记录一致的文件已经导入过
+                if self.index.is_processed(key, st.st_size, st.st_mtime_ns):
+                    removed.append(key)
+                else:
+                    ready.append(key)
+
+        with self._lock:
+            for key in removed:
+                self._pending.pop(key, None)
+            for key in ready:
+                self._pending.pop(key, None)
+                self._importing.add(key)
 
-    def _wait_for_file_stable(self, file_path, max_wait=10):
-        """等待文件大小稳定，确保文件已完全写入"""
+        for start in range(0, len(ready), self.batch_size):
+            batch = [Path(key) for key in ready[start:start + self.batch_size]]
+            for file_path in batch:
+                print(f"[INFO] 检测到新视频文件: {file_path.name}")
+            self._executor.submit(self._import_batch, batch)
+
+    def _import_batch(self, file_paths):
         try:
-            last_size = -1
-            wait_time = 0
-            while wait_time < max_wait:
-                current_size = file_path.stat().st_size
-                if current_size == last_size and current_size > 0:
-                    return True
-                last_size = current_size
-                time.sleep(0.5)
-                wait_time += 0.5
-            return False
-        except Exception as e:
-            print(f"[ERROR] 检查文件稳定性失败: {e}")
-            return False
+            self.import_to_database(*file_paths)
+        finally:
+            with self._lock:
+                for file_path in file_paths:
+                    self._importing.discard(str(file_path))
+
+    def _prepare(self, file_path, batch_hashes):
+        """
+        计算内容哈希并按导入策略把文件放入 videoFile
+        :param batch_hashes: 本批次已准备导入的内容哈希，批次内重复的文件不再导入
+        :return: (源文件信息, register_files 所需的条目, 已有记录, 实际导入方式)，内容已存在时条目为 None
+        """
+        st = file_path.stat()
+        content_hash = hash_file(file_path)
+        source = (file_path, st.st_size, st.st_mtime_ns, content_hash)
+        if file_path.parent == self.video_dir:
+            return source, (file_path.name, file_path, content_hash, st.st_size, False), None, None
 
-    def import_to_database(self, file_path):
-        """将文件导入到数据库"""
+        # 先查重再导入，重复的素材不产生任何链接或复制，move 模式下也不会移走原文件
+        if content_hash in batch_hashes:
+            print(f"[INFO] 素材内容与同批次文件重复，跳过导入: {file_path.name}")
+            return source, None, None, None
+        existing = find_by_hash(content_hash)
+        if existing is not None:
+            print(f"[INFO] 素材内容已存在，跳过导入: {file_path.name}")
+            return source, None, existing, None
+        batch_hashes.add(content_hash)
+
+        # 生成 UUID 和新文件名
+        uuid_v1 = uuid.uuid1()
+        new_file_path = self.video_dir / f"{uuid_v1}_{file_path.name}"
+        mode = import_file(file_path, new_file_path, self.import_mode)
+        print(f"[INFO] 文件已导入到: {new_file_path}（{mode}）")
+
+        # 登记时发现内容重复（其他来源同时登记了相同内容）则删除刚导入的链接或副本；
+        # move 模式下这是用户唯一的一份文件，不删除，登记后移回原位置
+        return source, (file_path.name, new_file_path, content_hash, st.st_size, mode != IMPORT_MOVE), None, mode
+
+    @staticmethod
+    def _restore(source_path, stored_path):
+        """把 move 模式下重复的文件移回监控文件夹"""
         try:
-            # 生成 UUID 和新文件名
-            uuid_v1 = uuid.uuid1()
-            new_filename = f"{uuid_v1}_{file_path.name}"
-            new_file_path = self.video_dir / new_filename
-
-            # 如果文件不在 videoFile 目录，则复制过去
-            if file_path.parent != self.video_dir:
-                import shutil
-                shutil.copy2(file_path, new_file_path)
-                print(f"[INFO] 文件已复制到: {new_file_path}")
+            import_file(stored_path, source_path, IMPORT_MOVE)
+        except OSError as e:
+            print(f"[WARN] 重复素材未能移回原位置，保留在 {stored_path}: {e}")
+
+    def import_to_database(self, *file_paths):
+        """将文件导入到数据库，多个文件在同一个事务中写入，并记录到已处理文件索引"""
+        entries = []
+        sources = []
+        modes = []
+        processed = []
+        batch_duplicates = []  # 与同批次文件内容相同、未导入的源文件
+        batch_hashes = set()
+        for file_path in file_paths:
+            try:
+                source, entry, existing, mode = self._prepare(Path(file_path), batch_hashes)
+            except Exception as e:
+                print(f"[ERROR] 导入素材失败 {file_path}: {e}")
+                continue
+            if existing is not None:
+                processed.append(source + (existing['id'],))
+            elif entry is None:
+                batch_duplicates.append(source)
             else:
-                new_file_path = file_path
-                new_filename = file_path.name
-
-            # 计算文件大小 (MB)
-            filesize = round(new_file_path.stat().st_size / (1024 * 1024), 2)
-
-            # 插入数据库
-            with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO file_records (filename, filesize, file_path)
-                    VALUES (?, ?, ?)
-                ''', (file_path.name, filesize, new_filename))
-                conn.commit()
-                print(f"[OK] 素材已导入数据库: {file_path.name} ({filesize} MB)")
+                entries.append(entry)
+                sources.append(source)
+                modes.append(mode)
 
+        try:
+            results = register_files(entries) if entries else []
         except Exception as e:
             print(f"[ERROR] 导入素材失败: {e}")
+            results = []
+            sources = []
+        record_ids = {}
+        for source, entry, mode, (record, duplicate) in zip(sources, entries, modes, results):
+            processed.append(source + (record['id'],))
+            record_ids[source[3]] = record['id']
+            if duplicate:
+                print(f"[INFO] 素材内容已存在，跳过导入: {entry[0]}")
+                if mode == IMPORT_MOVE:
+                    self._restore(source[0], entry[1])
+            else:
+                print(f"[OK] 素材已导入数据库: {entry[0]} ({record['filesize']} MB)")
+        processed.extend(source + (record_ids[source[3]],) for source in batch_duplicates if source[3] in record_ids)
+
+        try:
+            self.index.record_many(processed)
+        except Exception as e:
+            print(f"[ERROR] 记录已处理文件失败: {e}")
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending) + len(self._importing)
+
+    def stop(self):
+        """停止后台检查线程和导入线程池，已开始的导入会执行完"""
+        self._stopped.set()
+        self._sweeper.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
 
 
 class FolderWatcher:
@@ -104,12 +244,15 @@ class FolderWatcher:
 
     def __init__(self):
         self.observer = None
+        self.handler = None
         self.watch_path = None
+        self.recursive = False
         self.is_running = False
         self.video_dir = Path(BASE_DIR / "videoFile")
+        self.index = WatchedFileIndex()
 
-    def start_watching(self, folder_path):
-        """开始监控指定文件夹"""
+    def start_watching(self, folder_path, recursive=None):
+        """开始监控指定文件夹，recursive 为 None 时使用配置 WATCH_RECURSIVE"""
         if self.is_running:
             print("[WARN] 监控已在运行中")
             return False
@@ -120,15 +263,16 @@ class FolderWatcher:
 
         try:
             self.watch_path = folder_path
-            event_handler = MaterialFileHandler(self.video_dir)
+            self.recursive = WATCH_RECURSIVE if recursive is None else bool(recursive)
+            self.handler = MaterialFileHandler(self.video_dir, self.index)
             self.observer = Observer()
-            self.observer.schedule(event_handler, folder_path, recursive=False)
+            self.observer.schedule(self.handler, folder_path, recursive=self.recursive)
             self.observer.start()
             self.is_running = True
-            print(f"[OK] 开始监控文件夹: {folder_path}")
+            print(f"[OK] 开始监控文件夹: {folder_path}{'（包含子文件夹）' if self.recursive else ''}")
 
             # 首次启动时扫描现有文件
-            self._scan_existing_files(folder_path, event_handler)
+            self._scan_existing_files(folder_path, self.handler)
 
             return True
         except Exception as e:
@@ -136,31 +280,16 @@ class FolderWatcher:
             return False
 
     def _scan_existing_files(self, folder_path, handler):
-        """扫描现有文件并导入"""
+        """遍历一次目录并与已处理文件索引比对，新增或有变化的文件交给处理器排队导入"""
         try:
-            folder = Path(folder_path)
-            for file_path in folder.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_VIDEO_EXTENSIONS:
-                    # 检查文件是否已在数据库中
-                    if not self._file_exists_in_db(file_path.name):
-                        print(f"[INFO] 发现现有文件: {file_path.name}")
-                        handler.import_to_database(file_path)
-                        handler.processed_files.add(str(file_path))
+            files = scan_folder(folder_path, SUPPORTED_VIDEO_EXTENSIONS, self.recursive)
+            changed = self.index.diff(folder_path, files)
+            for file_path in changed:
+                handler.enqueue(file_path)
+            print(f"[INFO] 扫描到 {len(files)} 个视频文件，其中 {len(changed)} 个待导入")
         except Exception as e:
             print(f"[ERROR] 扫描现有文件失败: {e}")
 
-    def _file_exists_in_db(self, filename):
-        """检查文件是否已在数据库中"""
-        try:
-            with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM file_records WHERE filename = ?', (filename,))
-                count = cursor.fetchone()[0]
-                return count > 0
-        except Exception as e:
-            print(f"[ERROR] 查询数据库失败: {e}")
-            return False
-
     def stop_watching(self):
         """停止监控"""
         if not self.is_running:
@@ -171,6 +300,8 @@ class FolderWatcher:
             if self.observer:
                 self.observer.stop()
                 self.observer.join()
+            if self.handler:
+                self.handler.stop()
             self.is_running = False
             print("[OK] 已停止监控")
             return True
@@ -182,7 +313,9 @@ class FolderWatcher:
         """获取监控状态"""
         return {
             'is_running': self.is_running,
-            'watch_path': self.watch_path
+            'watch_path': self.watch_path,
+            'recursive': self.recursive,
+            'pending': self.handler.pending_count() if self.handler and self.is_running else 0,
         }
 
 
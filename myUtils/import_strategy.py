@@ -0,0 +1,107 @@
+"""
+素材导入策略模块
+把监控文件夹中的视频放入 videoFile，同一文件系统上优先使用 O(1) 的元数据操作：
+hardlink 硬链接、reflink 写时复制克隆、move 移动、reference 在 videoFile 中建立指向原文件的符号链接；
+都不可用时才完整复制，复制使用 copy_file_range / sendfile 在内核中按大块完成，不经过用户态缓冲
+"""
+
+import errno
+import os
+import shutil
+
+from utils.settings import WATCH_IMPORT_MODE
+
+IMPORT_HARDLINK = 'hardlink'
+IMPORT_REFLINK = 'reflink'
+IMPORT_MOVE = 'move'
+IMPORT_REFERENCE = 'reference'
+IMPORT_COPY = 'copy'
+IMPORT_MODES = (IMPORT_HARDLINK, IMPORT_REFLINK, IMPORT_MOVE, IMPORT_REFERENCE, IMPORT_COPY)
+
+# Linux FICLONE ioctl（btrfs / xfs / 部分 overlayfs 支持）
+FICLONE = 0x40049409
+# 内核复制时每次调用的字节数
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def reflink(src_path, dest_path):
+    """写时复制克隆，文件系统不支持时抛出 OSError"""
+    import fcntl  # 仅 Unix 可用
+
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dest.close()
+            os.unlink(dest_path)
+            raise
+
+
+def fast_copy(src_path, dest_path):
+    """完整复制文件，优先在内核中完成（copy_file_range > sendfile），都不支持时退回 shutil"""
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        size = os.fstat(src.fileno()).st_size
+        for copy in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+            if copy is None:
+                continue
+            try:
+                offset = 0
+                while offset < size:
+                    if copy is os.sendfile:
+                        sent = os.sendfile(dest.fileno(), src.fileno(), offset, min(COPY_CHUNK_SIZE, size - offset))
+                    else:
+                        sent = os.copy_file_range(src.fileno(), dest.fileno(), min(COPY_CHUNK_SIZE, size - offset),
+                                                  offset, offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                if offset == size:
+                    break
+            except OSError as e:
+                # 跨文件系统或内核不支持，换下一种方式从头复制
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP):
+                    raise
+            dest.seek(0)
+            dest.truncate()
+        else:
+            src.seek(0)
+            shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+    shutil.copystat(src_path, dest_path)
+
+
+def import_file(src_path, dest_path, mode=WATCH_IMPORT_MODE):
+    """
+    按 mode 把 src_path 放到 dest_path，失败时依次降级，最终退回完整复制
+    :return: 实际使用的导入方式
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"unknown import mode: {mode}")
+
+    if mode == IMPORT_REFERENCE:
+        os.symlink(os.path.abspath(src_path), dest_path)
+        return IMPORT_REFERENCE
+    if mode == IMPORT_MOVE:
+        try:
+            os.rename(src_path, dest_path)
+            return IMPORT_MOVE
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # 跨文件系统移动：复制后删除原文件
+        fast_copy(src_path, dest_path)
+        os.unlink(src_path)
+        return IMPORT_MOVE
+    if mode == IMPORT_HARDLINK:
+        try:
+            os.link(src_path, dest_path)
+            return IMPORT_HARDLINK
+        except OSError as e:
+            print(f"[WARN] 无法创建硬链接（{e}），尝试写时复制")
+    if mode in (IMPORT_HARDLINK, IMPORT_REFLINK):
+        try:
+            reflink(src_path, dest_path)
+            return IMPORT_REFLINK
+        except (OSError, ImportError) as e:
+            print(f"[WARN] 文件系统不支持写时复制（{e}），改为复制文件")
+    fast_copy(src_path, dest_path)
+    return IMPORT_COPY
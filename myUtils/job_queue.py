@@ -0,0 +1,247 @@
+"""
+发布任务队列模块
+/postVideo 和 /postVideoBatch 只负责把请求写入 SQLite 中的 publish_jobs 表并立即返回任务 id，
+由后台工作线程池逐个取出执行。任务状态保存在数据库中，后端重启后未完成的任务会继续执行
+"""
+
+import json
+import threading
+import time
+
+from utils.settings import PUBLISH_QUEUE_WORKERS
+from myUtils.db import db
+from utils.metrics import registry
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_SUCCESS = 'success'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+class JobQueue(object):
+    """基于 SQLite 的持久化发布任务队列"""
+
+    def __init__(self, database=db, workers=PUBLISH_QUEUE_WORKERS, poll_interval=5):
+        self.db = database
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval  # 空闲时兜底轮询间隔，用于发现其他进程写入的任务
+        self.is_running = False
+        self._threads = []
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._executing = set()  # 本进程工作线程正在执行的任务 id（含执行中被取消、尚未结束的任务）
+
+    def start(self):
+        """恢复中断的任务并启动工作线程"""
+        if self.is_running:
+            return
+        with self.db.connect() as conn:
+            # 上次退出时仍在执行的任务重新排队
+            conn.execute('''
+                UPDATE publish_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE status = ?
+            ''', (JOB_PENDING, JOB_RUNNING))
+        self._stopping = False
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"publish-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.is_running = True
+        print(f"[OK] 发布任务队列已启动，工作线程数: {self.workers}")
+
+    def stop(self, timeout=None):
+        """
+        通知工作线程在当前任务结束后退出，最多等待 timeout 秒；
+        返回仍在执行任务的线程数，这些任务下次启动时会重新执行
+        """
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        busy = sum(1 for thread in self._threads if thread.is_alive())
+        self._threads = []
+        self.is_running = False
+        return busy
+
+    def notify(self):
+        """唤醒空闲的工作线程"""
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def enqueue(self, payload, conn=None):
+        """写入一个发布任务，返回任务 id"""
+        return self.enqueue_many([payload], conn)[0]
+
+    def enqueue_many(self, payloads, conn=None):
+        """
+        写入一批发布任务，返回任务 id 列表
+        :param conn: 传入时在调用方的事务中写入，不唤醒工作线程，调用方提交后需调用 notify()
+        """
+        # 写入前整体检查，避免写入一部分后才失败
+        for index, payload in enumerate(payloads):
+            if not isinstance(payload, dict):
+                raise ValueError(f"第 {index + 1} 个发布任务不是 JSON 对象")
+        if conn is None:
+            with self.db.connect() as conn:
+                ids = self.enqueue_many(payloads, conn)
+            self.notify()
+            return ids
+        ids = []
+        for payload in payloads:
+            cursor = conn.execute('''
+                INSERT INTO publish_jobs (type, payload, status) VALUES (?, ?, ?)
+            ''', (payload.get('type'), json.dumps(payload, ensure_ascii=False), JOB_PENDING))
+            ids.append(cursor.lastrowid)
+        return ids
+
+    def list_jobs(self, status=None, limit=50, offset=0):
+        with self.db.connect() as conn:
+            if status:
+                rows = conn.execute('''
+                    SELECT * FROM publish_jobs WHERE status = ? ORDER BY id DESC LIMIT ? OFFSET ?
+                ''', (status, limit, offset)).fetchall()
+            else:
+                rows = conn.execute('''
+                    SELECT * FROM publish_jobs ORDER BY id DESC LIMIT ? OFFSET ?
+                ''', (limit, offset)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get_job(self, job_id):
+        with self.db.connect() as conn:
+            row = conn.execute('SELECT * FROM publish_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def cancel(self, job_id):
+        """取消排队中或执行中的任务；执行中的任务会跳过尚未开始的子任务"""
+        with self.db.connect() as conn:
+            cursor = conn.execute('''
+                UPDATE publish_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status IN (?, ?)
+            ''', (JOB_CANCELLED, job_id, JOB_PENDING, JOB_RUNNING))
+            return cursor.rowcount > 0
+
+    def retry(self, job_id):
+        """把失败或已取消的任务重新放回队列；执行中被取消、工作线程尚未结束的任务不能重试"""
+        with self.db.connect() as conn:
+            # 与 _claim 互斥，_executing 在认领任务的事务中登记
+            conn.execute('BEGIN IMMEDIATE')
+            if job_id in self._executing:
+                return False
+            cursor = conn.execute('''
+                UPDATE publish_jobs
+                SET status = ?, finished = 0, failed = 0, result = NULL, error = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status IN (?, ?)
+            ''', (JOB_PENDING, job_id, JOB_FAILED, JOB_CANCELLED))
+            retried = cursor.rowcount > 0
+        if retried:
+            self.notify()
+        return retried
+
+    def pending_count(self):
+        with self.db.connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM publish_jobs WHERE status = ?', (JOB_PENDING,)).fetchone()[0]
+
+    def active_counts(self):
+        """排队中和执行中的任务数，返回 {(状态,): 数量}"""
+        with self.db.connect() as conn:
+            rows = conn.execute('''
+                SELECT status, COUNT(*) AS count FROM publish_jobs WHERE status IN (?, ?) GROUP BY status
+            ''', (JOB_PENDING, JOB_RUNNING)).fetchall()
+        counts = {(JOB_PENDING,): 0, (JOB_RUNNING,): 0}
+        counts.update({(row['status'],): row['count'] for row in rows})
+        return counts
+
+    def _claim(self):
+        """原子地取出最早的一个排队任务并标记为执行中"""
+        with self.db.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT * FROM publish_jobs WHERE status = ? ORDER BY id LIMIT 1
+            ''', (JOB_PENDING,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('''
+                UPDATE publish_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (JOB_RUNNING, row['id']))
+            self._executing.add(row['id'])
+            return dict(row)
+
+    def _worker_loop(self):
+        while not self._stopping:
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"[ERROR] 读取发布任务失败: {e}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(self.poll_interval)
+                continue
+            try:
+                self._run(job)
+            finally:
+                self._executing.discard(job['id'])
+
+    def _is_cancelled(self, job_id):
+        with self.db.connect() as conn:
+            row = conn.execute('SELECT status FROM publish_jobs WHERE id = ?', (job_id,)).fetchone()
+        return row is None or row['status'] == JOB_CANCELLED
+
+    def _record_progress(self, job_id, result):
+        with self.db.connect() as conn:
+            conn.execute('''
+                UPDATE publish_jobs
+                SET finished = finished + 1, failed = failed + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (0 if result.success else 1, job_id))
+
+    def _run(self, job):
+        # 延迟导入，避免队列模块加载时就引入全部上传器
+        from myUtils.postVideo import post_video_by_payload
+
+        job_id = job['id']
+        payload = json.loads(job['payload'])
+        total = len(payload.get('fileList', [])) * len(payload.get('accountList', []))
+        with self.db.connect() as conn:
+            conn.execute('UPDATE publish_jobs SET total = ? WHERE id = ?', (total, job_id))
+        print(f"[INFO] 开始执行发布任务 {job_id}，子任务数: {total}")
+
+        try:
+            results = post_video_by_payload(
+                payload,
+                on_result=lambda result: self._record_progress(job_id, result),
+                is_cancelled=lambda: self._is_cancelled(job_id),
+            )
+            status = JOB_SUCCESS if all(result.success for result in results) else JOB_FAILED
+            result_json = json.dumps([result.to_dict() for result in results], ensure_ascii=False)
+            error = None
+        except Exception as e:
+            status, result_json, error = JOB_FAILED, None, str(e)
+
+        with self.db.connect() as conn:
+            # 执行过程中被取消的任务保持 cancelled 状态
+            conn.execute('''
+                UPDATE publish_jobs
+                SET status = CASE WHEN status = ? THEN status ELSE ? END,
+                    result = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (JOB_CANCELLED, status, result_json, error, job_id))
+        print(f"[OK] 发布任务 {job_id} 执行结束: {status}")
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['payload'] = json.loads(job['payload']) if job.get('payload') else None
+        job['result'] = json.loads(job['result']) if job.get('result') else None
+        job['progress'] = round(job['finished'] / job['total'], 4) if job.get('total') else 0
+        return job
+
+
+# 全局发布任务队列实例
+job_queue = JobQueue()
+
+registry.gauge('sau_publish_queue_jobs', '发布任务队列中排队和执行中的任务数', job_queue.active_counts, labels=('status',))
@@ -0,0 +1,147 @@
+"""
+素材与账号列表查询模块
+在 SQL 中完成过滤、排序和键集分页（按 (排序列, id) 翻页，翻到深处也不需要 OFFSET 扫描），
+并根据 table_versions 中的数据版本号生成 ETag：数据未变化时接口无需查询即可返回 304
+"""
+
+import base64
+import hashlib
+import json
+
+from myUtils.db import db
+
+# 每页最大条数
+MAX_PAGE_SIZE = 500
+
+
+class ListQueryError(ValueError):
+    """列表查询参数有误"""
+
+
+class ListSpec(object):
+    """一张表的列表查询规则"""
+
+    def __init__(self, table, sorts, filters, keyword_column, default_sort='id'):
+        self.table = table
+        self.sorts = sorts  # 接口排序字段 -> 列名
+        self.filters = filters  # 接口过滤字段 -> 列名（等值过滤）
+        self.keyword_column = keyword_column  # keyword 模糊匹配的列
+        self.default_sort = default_sort
+
+
+FILES = ListSpec(
+    'file_records',
+    sorts={'id': 'id', 'name': 'filename', 'size': 'filesize', 'upload_time': 'upload_time'},
+    filters={'uuid': 'uuid', 'hash': 'content_hash'},
+    keyword_column='filename',
+)
+
+ACCOUNTS = ListSpec(
+    'user_info',
+    sorts={'id': 'id', 'name': 'userName', 'platform': 'type', 'status': 'status'},
+    filters={'platform': 'type', 'status': 'status'},
+    keyword_column='userName',
+)
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id], separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ListQueryError("cursor 无效")
+
+
+def table_version(table, conn=None):
+    """表的数据版本号，每次增删改都会变化"""
+    if conn is None:
+        with db.connect() as conn:
+            return table_version(table, conn)
+    row = conn.execute('SELECT version FROM table_versions WHERE name = ?', (table,)).fetchone()
+    return row[0] if row else 0
+
+
+def list_etag(spec, params):
+    """由数据版本号和查询参数生成 ETag，不需要查询列表本身"""
+    query = json.dumps(sorted(params.items()), ensure_ascii=False)
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]
+    return f"{spec.table}-{table_version(spec.table)}-{digest}"
+
+
+def _where(spec, params):
+    clauses, args = [], []
+    for name, column in spec.filters.items():
+        if params.get(name) not in (None, ''):
+            clauses.append(f"{column} = ?")
+            args.append(params[name])
+    keyword = params.get('keyword')
+    if keyword:
+        clauses.append(f"{spec.keyword_column} LIKE ? ESCAPE '\\'")
+        escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        args.append(f"%{escaped}%")
+    return clauses, args
+
+
+def _after_cursor(column, descending, value, row_id):
+    """键集分页条件：排在游标 (value, row_id) 之后的行；SQLite 中 NULL 升序在前、降序在后"""
+    if descending:
+        if value is None:
+            return f"({column} IS NULL AND id < ?)", [row_id]
+        return f"({column} < ? OR {column} IS NULL OR ({column} = ? AND id < ?))", [value, value, row_id]
+    if value is None:
+        return f"({column} IS NOT NULL OR id > ?)", [row_id]
+    return f"({column} > ? OR ({column} = ? AND id > ?))", [value, value, row_id]
+
+
+def list_rows(spec, params):
+    """
+    查询列表
+    :param params: keyword、各过滤字段、sort、order（asc / desc）、limit、cursor
+    :return: 不分页（未传 limit 和 cursor）时返回全部行；否则返回 (行列表, 下一页游标或 None, 过滤后的总数)
+    """
+    sort = params.get('sort') or spec.default_sort
+    if sort not in spec.sorts:
+        raise ListQueryError(f"不支持的排序字段: {sort}，可选 {', '.join(spec.sorts)}")
+    column = spec.sorts[sort]
+    order = (params.get('order') or 'asc').lower()
+    if order not in ('asc', 'desc'):
+        raise ListQueryError("order 只能是 asc 或 desc")
+    descending = order == 'desc'
+    clauses, args = _where(spec, params)
+    direction = 'DESC' if descending else 'ASC'
+    order_by = f"ORDER BY {column} {direction}, id {direction}" if column != 'id' else f"ORDER BY id {direction}"
+
+    paged = params.get('limit') is not None or params.get('cursor')
+    with db.connect() as conn:
+        if not paged:
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            return conn.execute(f"SELECT * FROM {spec.table} {where} {order_by}", args).fetchall()
+
+        try:
+            limit = min(max(1, int(params.get('limit') or 50)), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ListQueryError("limit 必须是整数")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        total = conn.execute(f"SELECT COUNT(*) FROM {spec.table} {where}", args).fetchone()[0]
+        page_clauses, page_args = list(clauses), list(args)
+        if params.get('cursor'):
+            value, row_id = decode_cursor(params['cursor'])
+            clause, extra = _after_cursor(column, descending, value, row_id)
+            page_clauses.append(clause)
+            page_args.extend(extra)
+        where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ''
+        # 多取一行用于判断是否还有下一页
+        rows = conn.execute(f"SELECT * FROM {spec.table} {where} {order_by} LIMIT ?",
+                            page_args + [limit + 1]).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[column], last['id'])
+    return rows, next_cursor, total
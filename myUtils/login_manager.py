@@ -0,0 +1,169 @@
+"""
+扫码登录会话管理模块
+所有登录流程运行在同一个共享事件循环中，二维码和状态通过队列推送给 SSE 流：
+阻塞等待消息并定期发送心跳，登录进入终态（200/500）或会话超时后关闭流并清理会话
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from queue import Queue, Empty
+
+from utils.settings import LOGIN_SESSION_TIMEOUT, LOGIN_HEARTBEAT_INTERVAL
+from utils.async_loop import background_loop
+
+# 登录流程的终态消息
+TERMINAL_STATES = ("200", "500")
+
+
+def _login_handler(type):
+    # 登录函数由平台注册表在首次使用时导入，登录相关模块会引入 playwright
+    from uploader.registry import platforms
+    spec = platforms.get(str(type))
+    if spec is None or not spec.supports('login'):
+        return None
+    return spec.login
+
+
+class SessionQueue(Queue):
+    """线程安全的消息队列，put 时额外唤醒 astream 中等待的协程"""
+
+    def __init__(self):
+        super().__init__()
+        self._waiters = set()  # (事件循环, asyncio.Event)
+
+    def watch(self, loop, event):
+        with self.mutex:
+            self._waiters.add((loop, event))
+
+    def unwatch(self, loop, event):
+        with self.mutex:
+            self._waiters.discard((loop, event))
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        with self.mutex:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+
+class LoginSession(object):
+    """一次扫码登录会话"""
+
+    def __init__(self, type, user_name):
+        self.id = uuid.uuid4().hex
+        self.type = type
+        self.user_name = user_name
+        self.queue = SessionQueue()
+        self.created_at = time.monotonic()
+        self.future = None
+
+
+class LoginSessionManager(object):
+    """扫码登录会话管理器"""
+
+    def __init__(self, timeout=LOGIN_SESSION_TIMEOUT, heartbeat=LOGIN_HEARTBEAT_INTERVAL):
+        self.timeout = timeout
+        self.heartbeat = heartbeat
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self, type, user_name):
+        """在共享事件循环中启动登录流程，返回会话；平台不支持时返回 None"""
+        handler = _login_handler(type)
+        if handler is None:
+            return None
+        session = LoginSession(type, user_name)
+        with self._lock:
+            self._sessions[session.id] = session
+        session.future = background_loop.submit(handler(user_name, session.queue))
+        session.future.add_done_callback(lambda future: self._on_done(session, future))
+        return session
+
+    @staticmethod
+    def _on_done(session, future):
+        # 登录流程异常退出时补发失败状态，避免 SSE 流一直等到超时
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[ERROR] 登录流程异常: {future.exception()}")
+            session.queue.put("500")
+
+    def stream(self, session):
+        """SSE 流生成器：推送二维码与状态，空闲时发送心跳，终态或超时后结束"""
+        deadline = session.created_at + self.timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"[WARN] 登录会话超时: {session.user_name}")
+                    yield "data: 500\n\n"
+                    break
+                try:
+                    msg = session.queue.get(timeout=min(self.heartbeat, remaining))
+                except Empty:
+                    # SSE 注释行，仅用于保活
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {msg}\n\n"
+                if msg in TERMINAL_STATES:
+                    break
+        finally:
+            # 正常结束、超时或客户端断开时都会走到这里
+            self.close(session)
+
+    async def astream(self, session):
+        """stream 的异步版本，供生产模式的 ASGI 服务器直接推送，等待期间不占用线程"""
+        deadline = session.created_at + self.timeout
+        idle_since = time.monotonic()
+        loop = asyncio.get_running_loop()
+        arrived = asyncio.Event()
+        session.queue.watch(loop, arrived)
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    print(f"[WARN] 登录会话超时: {session.user_name}")
+                    yield "data: 500\n\n"
+                    break
+                if now - idle_since >= self.heartbeat:
+                    idle_since = now
+                    # SSE 注释行，仅用于保活
+                    yield ": keep-alive\n\n"
+                # 先清除事件再取消息，取消息之后才放入的消息一定会再次唤醒
+                arrived.clear()
+                try:
+                    msg = session.queue.get_nowait()
+                except Empty:
+                    wait = min(idle_since + self.heartbeat, deadline) - now
+                    try:
+                        await asyncio.wait_for(arrived.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                idle_since = now
+                yield f"data: {msg}\n\n"
+                if msg in TERMINAL_STATES:
+                    break
+        finally:
+            session.queue.unwatch(loop, arrived)
+            self.close(session)
+
+    def close(self, session):
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        if session.future is not None and not session.future.done():
+            session.future.cancel()
+        print(f"清理登录会话: {session.user_name}")
+
+    def active_count(self):
+        """当前进行中的登录会话数"""
+        with self._lock:
+            return len(self._sessions)
+
+
+# 全局登录会话管理器实例
+login_manager = LoginSessionManager()
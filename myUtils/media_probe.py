@@ -0,0 +1,121 @@
+"""
+素材元数据模块
+素材登记后在进程池中读取时长、分辨率、编码和码率（只解析容器头部，见 utils/media_info.py），
+结果写入 file_records；发布前按平台限制检查时只需查表，不用再打开视频文件
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from utils.settings import BASE_DIR, MEDIA_PROBE_WORKERS
+from myUtils.db import db
+from utils.media_info import MediaInfoError, probe
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+
+# file_records 中的元数据列，与 utils.media_info.probe 的返回字段一致
+MEDIA_COLUMNS = ('duration', 'width', 'height', 'video_codec', 'audio_codec', 'bitrate')
+
+# 按 file_path 批量查询时每条 SQL 的参数个数上限
+LOOKUP_BATCH_SIZE = 500
+
+
+def save_media(record_id, info):
+    """写入元数据，info 为空字典表示无法读取（仍记录 probed_at，不再重复读取）"""
+    values = [info.get(column) for column in MEDIA_COLUMNS]
+    assignments = ', '.join(f"{column} = ?" for column in MEDIA_COLUMNS)
+    with db.connect() as conn:
+        conn.execute(f'UPDATE file_records SET {assignments}, probed_at = ? WHERE id = ?',
+                     values + [int(time.time()), record_id])
+
+
+def media_for_files(file_names):
+    """
+    按素材文件名（file_records.file_path）查询已读取的元数据
+    :return: {文件名: 元数据字典}，尚未读取的素材不在结果中
+    """
+    names = list(dict.fromkeys(str(name) for name in file_names))
+    media = {}
+    with db.connect() as conn:
+        for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+            batch = names[start:start + LOOKUP_BATCH_SIZE]
+            rows = conn.execute(f'''
+                SELECT file_path, {', '.join(MEDIA_COLUMNS)} FROM file_records
+                WHERE probed_at IS NOT NULL AND file_path IN ({', '.join('?' * len(batch))})
+            ''', batch).fetchall()
+            for row in rows:
+                media[row['file_path']] = {column: row[column] for column in MEDIA_COLUMNS}
+    return media
+
+
+class MediaProber(object):
+    """在进程池中读取素材元数据，进程池在第一次提交时才创建"""
+
+    def __init__(self, workers=MEDIA_PROBE_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # 统一使用 spawn：后端进程中有多个线程，fork 出的子进程可能继承被其他线程持有的锁
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def submit(self, record_id, path):
+        """提交一个素材，读取完成后在回调中写入数据库"""
+        future = self._pool().submit(probe, str(path))
+        future.add_done_callback(partial(self._save, record_id, path))
+        return future
+
+    def submit_records(self, records):
+        """提交 file_records 记录（字典或行），忽略没有文件路径的记录"""
+        for record in records:
+            if record['file_path']:
+                self.submit(record['id'], VIDEO_DIR / record['file_path'])
+
+    def _save(self, record_id, path, future):
+        if future.cancelled():
+            return
+        try:
+            info = future.result()
+        except MediaInfoError as e:
+            print(f"[WARN] 无法读取素材元数据 {path}: {e}")
+            info = {}
+        except Exception as e:
+            # 进程池被关闭或子进程异常退出，下次启动时由 backfill 重新读取
+            print(f"[ERROR] 读取素材元数据失败 {path}: {e}")
+            return
+        try:
+            save_media(record_id, info)
+        except Exception as e:
+            print(f"[ERROR] 保存素材元数据失败 {path}: {e}")
+
+    def backfill(self):
+        """为尚未读取元数据的旧记录提交读取任务"""
+        with db.connect() as conn:
+            rows = conn.execute('''
+                SELECT id, file_path FROM file_records WHERE probed_at IS NULL AND file_path IS NOT NULL
+            ''').fetchall()
+        rows = [row for row in rows if (VIDEO_DIR / row['file_path']).is_file()]
+        self.submit_records(rows)
+        if rows:
+            print(f"[INFO] 正在后台读取 {len(rows)} 个素材的元数据")
+        return len(rows)
+
+    def stop(self):
+        """关闭进程池，未开始的读取任务下次启动时由 backfill 重新提交"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局实例
+media_prober = MediaProber()
@@ -1,92 +1,69 @@
-import asyncio
 from pathlib import Path
 
-from conf import BASE_DIR
-from uploader.douyin_uploader.main import DouYinVideo
-from uploader.ks_uploader.main import KSVideo
-from uploader.tencent_uploader.main import TencentVideo
-from uploader.xiaohongshu_uploader.main import XiaoHongShuVideo
-from utils.constant import TencentZoneTypes
-from utils.files_times import generate_schedule_time_next_day
+from utils.settings import BASE_DIR, PLATFORM_DAILY_LIMITS, SCHEDULE_JITTER_MINUTES, USE_THUMBNAIL_AS_COVER
+from myUtils.media_probe import media_for_files
+from myUtils.publish_engine import PublishJob, PublishResult, run_publish_jobs
+from myUtils.thumbnails import covers_for_files
+from uploader.registry import get_platform
+from utils.files_times import plan_schedule
 
 
-def post_video_tencent(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0, is_draft=False):
-    # 生成文件的完整路径
-    account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
-    files = [Path(BASE_DIR / "videoFile" / file) for file in files]
-    if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
-    else:
-        publish_datetimes = [0 for i in range(len(files))]
-    for index, file in enumerate(files):
-        for cookie in account_file:
-            print(f"文件路径{str(file)}")
-            # 打印视频文件名、标题和 hashtag
-            print(f"视频文件名：{file}")
-            print(f"标题：{title}")
-            print(f"Hashtag：{tags}")
-            app = TencentVideo(title, str(file), tags, publish_datetimes[index], cookie, category, is_draft)
-            asyncio.run(app.main(), debug=False)
+def _publish_times(platform, files, account_file, enableTimer, videos_per_day, daily_times, start_days):
+    """为每个账号分配各视频的发布时间，返回 {账号 cookie 路径: [发布时间]}，未开启定时时均为 0"""
+    if not enableTimer:
+        return {cookie: [0] * len(files) for cookie in account_file}
+    return plan_schedule(len(files), account_file, daily_times, videos_per_day=videos_per_day or 1,
+                         start_days=start_days or 0, daily_limit=PLATFORM_DAILY_LIMITS.get(platform),
+                         jitter_minutes=SCHEDULE_JITTER_MINUTES)
 
 
-def post_video_DouYin(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0,
-                      thumbnail_path = '',
-                      productLink = '', productTitle = ''):
+def post_video(platform, title, files, tags, account_file, enableTimer=False, videos_per_day=1, daily_times=None,
+               start_days=0, options=None, on_result=None, is_cancelled=None):
+    """
+    把每个视频发布到每个账号，返回与 (视频, 账号) 组合一一对应的 PublishResult 列表
+    :param platform: 平台标识或平台名
+    :param options: 平台相关的发布参数（category、isDraft、thumbnail、productLink 等），平台不支持的字段会被忽略；
+                    支持封面的平台未传 thumbnail 时使用素材缩略图
+    """
+    platform = get_platform(platform)
     # 生成文件的完整路径
     account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
     files = [Path(BASE_DIR / "videoFile" / file) for file in files]
-    if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
-    else:
-        publish_datetimes = [0 for i in range(len(files))]
+    publish_datetimes = _publish_times(platform.id, files, account_file, enableTimer, videos_per_day, daily_times,
+                                       start_days)
+    # 素材登记时已读取元数据，这里只查一次表；开启 MEDIA_LIMITS_STRICT 时超出平台视频限制的组合不会启动浏览器
+    media = media_for_files(file.name for file in files)
+    options = options or {}
+    covers = {}
+    if USE_THUMBNAIL_AS_COVER and platform.capabilities.thumbnail and not options.get('thumbnail'):
+        covers = covers_for_files(file.name for file in files)
+    jobs, results = [], []
     for index, file in enumerate(files):
+        # 未指定封面时使用素材缩略图
+        file_options = dict(options, thumbnail=covers[file.name]) if file.name in covers else options
         for cookie in account_file:
-            print(f"文件路径{str(file)}")
-            # 打印视频文件名、标题和 hashtag
-            print(f"视频文件名：{file}")
-            print(f"标题：{title}")
-            print(f"Hashtag：{tags}")
-            app = DouYinVideo(title, str(file), tags, publish_datetimes[index], cookie, thumbnail_path, productLink, productTitle)
-            asyncio.run(app.main(), debug=False)
-
-
-def post_video_ks(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
-    # 生成文件的完整路径
-    account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
-    files = [Path(BASE_DIR / "videoFile" / file) for file in files]
-    if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(len(files), videos_per_day, daily_times,start_days)
-    else:
-        publish_datetimes = [0 for i in range(len(files))]
-    for index, file in enumerate(files):
-        for cookie in account_file:
-            print(f"文件路径{str(file)}")
-            # 打印视频文件名、标题和 hashtag
-            print(f"视频文件名：{file}")
-            print(f"标题：{title}")
-            print(f"Hashtag：{tags}")
-            app = KSVideo(title, str(file), tags, publish_datetimes[index], cookie)
-            asyncio.run(app.main(), debug=False)
-
-def post_video_xhs(title,files,tags,account_file,category=TencentZoneTypes.LIFESTYLE.value,enableTimer=False,videos_per_day = 1, daily_times=None,start_days = 0):
-    # 生成文件的完整路径
-    account_file = [Path(BASE_DIR / "cookiesFile" / file) for file in account_file]
-    files = [Path(BASE_DIR / "videoFile" / file) for file in files]
-    file_num = len(files)
-    if enableTimer:
-        publish_datetimes = generate_schedule_time_next_day(file_num, videos_per_day, daily_times,start_days)
-    else:
-        publish_datetimes = 0
-    for index, file in enumerate(files):
-        for cookie in account_file:
-            # 打印视频文件名、标题和 hashtag
-            print(f"视频文件名：{file}")
-            print(f"标题：{title}")
-            print(f"Hashtag：{tags}")
-            app = XiaoHongShuVideo(title, file, tags, publish_datetimes, cookie)
-            asyncio.run(app.main(), debug=False)
-
+            try:
+                for warning in platform.validate(file, cookie, title, tags, media.get(file.name)):
+                    print(f"[WARN] {warning}")
+            except ValueError as e:
+                # 参数有误的组合直接记为失败，不占用浏览器
+                result = PublishResult(PublishJob(platform.id, file, cookie, None), False, error=str(e))
+                if on_result is not None:
+                    on_result(result)
+                results.append(result)
+                continue
+            app = platform.build(title, file, tags, publish_datetimes[cookie][index], cookie, file_options)
+            jobs.append(PublishJob(platform.id, file, cookie, app))
+            results.append(None)
+    executed = iter(run_publish_jobs(jobs, on_result, is_cancelled) if jobs else [])
+    return [result if result is not None else next(executed) for result in results]
 
 
-# post_video("333",["demo.mp4"],"d","d")
-# post_video_DouYin("333",["demo.mp4"],"d","d")
\ No newline at end of file
+def post_video_by_payload(data, on_result=None, is_cancelled=None):
+    """按 /postVideo 的请求体发布视频，返回 PublishResult 列表"""
+    options = dict(data)
+    if options.get('category') == 0:
+        options['category'] = None
+    return post_video(data.get('type'), data.get('title'), data.get('fileList', []), data.get('tags'),
+                      data.get('accountList', []), data.get('enableTimer'), data.get('videosPerDay'),
+                      data.get('dailyTimes'), data.get('startDays'), options, on_result, is_cancelled)
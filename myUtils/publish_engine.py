@@ -0,0 +1,117 @@
+"""
+并发发布引擎
+把 (文件, 账号) 组合拆成独立的发布任务，在同一个事件循环中并发执行。
+全局、单平台、单账号三级限流：不同账号之间并行，同一账号同一时刻只会有一个任务在执行
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+
+from utils.settings import PUBLISH_MAX_CONCURRENCY, PUBLISH_MAX_PER_PLATFORM
+from utils.async_loop import background_loop
+from utils.browser_pool import use_browser_pool
+from utils.metrics import platform_name, upload_seconds, uploads_total
+
+
+class PublishJob(object):
+    """单个发布任务：一个文件发布到一个账号"""
+
+    def __init__(self, platform, file_path, account_file, uploader):
+        self.platform = platform
+        self.file_path = file_path
+        self.account_file = account_file
+        self.uploader = uploader  # 已构造好的上传器实例，需提供 async main()
+
+
+class PublishResult(object):
+    """单个发布任务的执行结果"""
+
+    def __init__(self, job, success, error=None, elapsed=0.0):
+        self.job = job
+        self.success = success
+        self.error = error
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            "platform": self.job.platform,
+            "file": str(self.job.file_path),
+            "account": str(self.job.account_file),
+            "success": self.success,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 2),
+        }
+
+
+class PublishEngine(object):
+    """并发发布引擎，同一个实例的多次 run 共用限流，须始终在同一个事件循环中调用"""
+
+    def __init__(self, max_concurrency=PUBLISH_MAX_CONCURRENCY, max_per_platform=PUBLISH_MAX_PER_PLATFORM):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_platform = max(1, max_per_platform)
+        self._global_limit = None
+        self._platform_limits = None
+        self._account_locks = None
+
+    def _limits(self):
+        # 在事件循环中首次使用时创建，之后所有批次共用
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._platform_limits = defaultdict(lambda: asyncio.Semaphore(self.max_per_platform))
+            self._account_locks = defaultdict(asyncio.Lock)
+        return self._global_limit, self._platform_limits, self._account_locks
+
+    async def run(self, jobs, on_result=None, is_cancelled=None):
+        """
+        并发执行全部任务，按传入顺序返回 PublishResult 列表
+        :param jobs: PublishJob 列表
+        :param on_result: 可选回调，每个任务结束时以 PublishResult 调用一次
+        :param is_cancelled: 可选回调，任务开始前调用，返回 True 时跳过该任务
+        两个回调可能读写数据库，在线程池中执行，不阻塞事件循环（生产模式下即 ASGI 服务器的事件循环）
+        """
+        global_limit, platform_limits, account_locks = self._limits()
+        loop = asyncio.get_running_loop()
+
+        async def run_job(job):
+            # 加锁顺序固定为 账号 -> 平台 -> 全局，排队等待账号的任务不会占用全局名额
+            async with account_locks[str(job.account_file)]:
+                async with platform_limits[job.platform]:
+                    async with global_limit:
+                        if is_cancelled is not None and await loop.run_in_executor(None, is_cancelled):
+                            result = PublishResult(job, False, error="cancelled")
+                            uploads_total.inc(platform=platform_name(job.platform), result='cancelled')
+                        else:
+                            result = await self._execute(job)
+            if on_result is not None:
+                await loop.run_in_executor(None, on_result, result)
+            return result
+
+        # 所有任务共用同一个浏览器池
+        async with use_browser_pool():
+            return list(await asyncio.gather(*(run_job(job) for job in jobs)))
+
+    @staticmethod
+    async def _execute(job):
+        start = time.monotonic()
+        try:
+            await job.uploader.main()
+            result = PublishResult(job, True, elapsed=time.monotonic() - start)
+        except Exception as e:
+            result = PublishResult(job, False, error=str(e), elapsed=time.monotonic() - start)
+        platform = platform_name(job.platform)
+        upload_seconds.observe(result.elapsed, platform=platform)
+        uploads_total.inc(platform=platform, result='success' if result.success else 'failure')
+        return result
+
+
+def run_publish_jobs(jobs, on_result=None, is_cancelled=None):
+    """
+    同步入口：在共享事件循环中执行一批发布任务并等待完成，返回 PublishResult 列表；
+    多个工作线程同时提交的任务共用同一个浏览器池和同一套限流
+    """
+    return background_loop.run(publish_engine.run(jobs, on_result, is_cancelled))
+
+
+# 全局发布引擎，所有批次都在 background_loop 中执行
+publish_engine = PublishEngine()
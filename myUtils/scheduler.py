@@ -0,0 +1,193 @@
+"""
+本地定时发布调度模块
+开启定时发布时不再去操作各平台的定时发布日期控件，而是把每个视频按发布时间写入 scheduled_jobs 表，
+调度线程用按时间排序的小顶堆只在最早的任务到期时醒来，到期后写入发布任务队列立即发布；
+后端重启时从数据库重建堆，错过的发布时间会立即补发。
+发布时间按账号分配：每个 (视频, 账号) 一个定时任务，避开该账号已排期的时间并遵守平台每日上限
+"""
+
+import heapq
+import json
+import threading
+import time
+
+from utils.settings import PLATFORM_DAILY_LIMITS, SCHEDULE_JITTER_MINUTES
+from myUtils.db import db
+from myUtils.job_queue import job_queue
+from uploader.registry import get_platform
+from utils.files_times import plan_schedule
+
+# 定时任务状态
+SCHEDULE_PENDING = 'pending'
+SCHEDULE_DISPATCHED = 'dispatched'  # 已写入发布任务队列
+SCHEDULE_CANCELLED = 'cancelled'
+
+# 最长休眠时间（秒），防止系统时间被调整后长时间不醒
+MAX_SLEEP = 60
+
+
+class PublishScheduler(object):
+    """基于 SQLite 持久化的定时发布调度器"""
+
+    def __init__(self, database=db, queue=job_queue):
+        self.db = database
+        self.queue = queue
+        self.is_running = False
+        self._heap = []  # (run_at, 定时任务 id)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        """从数据库重建待执行的定时任务并启动调度线程"""
+        if self.is_running:
+            return
+        with self.db.connect() as conn:
+            rows = conn.execute('''
+                SELECT id, run_at FROM scheduled_jobs WHERE status = ? ORDER BY run_at
+            ''', (SCHEDULE_PENDING,)).fetchall()
+        with self._cond:
+            # 已按 run_at 排序的列表本身就是合法的堆
+            self._heap = [(row['run_at'], row['id']) for row in rows]
+            self._stopping = False
+        overdue = sum(1 for run_at, _ in self._heap if run_at <= time.time())
+        self._thread = threading.Thread(target=self._loop, name="publish-scheduler", daemon=True)
+        self._thread.start()
+        self.is_running = True
+        print(f"[OK] 定时发布调度已启动，待执行 {len(rows)} 个，其中 {overdue} 个已错过发布时间将立即补发")
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.is_running = False
+
+    def schedule_many(self, items):
+        """
+        写入一批定时任务
+        :param items: [(/postVideo 请求体, 发布时间戳)]
+        :return: 定时任务 id 列表
+        """
+        ids = []
+        with self.db.connect() as conn:
+            for payload, run_at in items:
+                # 只有单账号的任务才参与按账号排期
+                accounts = payload.get('accountList') or []
+                account = accounts[0] if len(accounts) == 1 else None
+                cursor = conn.execute('''
+                    INSERT INTO scheduled_jobs (run_at, payload, status, account) VALUES (?, ?, ?, ?)
+                ''', (int(run_at), json.dumps(payload, ensure_ascii=False), SCHEDULE_PENDING, account))
+                ids.append(cursor.lastrowid)
+        with self._cond:
+            for (_, run_at), schedule_id in zip(items, ids):
+                heapq.heappush(self._heap, (int(run_at), schedule_id))
+            # 新任务可能比当前等待的更早到期
+            self._cond.notify_all()
+        return ids
+
+    def booked_times(self, accounts):
+        """一条查询取出这些账号尚未执行的定时任务时间，返回 {账号: [时间戳]}"""
+        accounts = list(accounts)
+        booked = {}
+        if not accounts:
+            return booked
+        with self.db.connect() as conn:
+            for start in range(0, len(accounts), 500):
+                chunk = accounts[start:start + 500]
+                rows = conn.execute(f'''
+                    SELECT account, run_at FROM scheduled_jobs
+                    WHERE account IN ({', '.join('?' * len(chunk))}) AND status = ? AND run_at > ?
+                ''', (*chunk, SCHEDULE_PENDING, int(time.time()))).fetchall()
+                for row in rows:
+                    booked.setdefault(row['account'], []).append(row['run_at'])
+        return booked
+
+    def schedule_payload(self, data):
+        """
+        按 /postVideo 请求体中的定时参数为每个 (视频, 账号) 分配发布时间，每个组合单独一个定时任务，
+        到期后以立即发布的方式执行（enableTimer 置为 False）
+        """
+        # type 可能是数字字符串或平台名，统一为平台标识后再查每日上限；不支持的平台抛出 ValueError
+        platform = get_platform(data.get('type'))
+        file_list = data.get('fileList', [])
+        account_list = data.get('accountList', [])
+        plan = plan_schedule(len(file_list), account_list, data.get('dailyTimes'),
+                             videos_per_day=data.get('videosPerDay') or 1, start_days=data.get('startDays') or 0,
+                             daily_limit=PLATFORM_DAILY_LIMITS.get(platform.id),
+                             jitter_minutes=SCHEDULE_JITTER_MINUTES, booked=self.booked_times(account_list),
+                             timestamps=True)
+        items = [(dict(data, fileList=[file], accountList=[account], enableTimer=False), run_at)
+                 for account in account_list
+                 for file, run_at in zip(file_list, plan[account])]
+        return self.schedule_many(items)
+
+    def list_schedules(self, status=None, limit=50, offset=0):
+        with self.db.connect() as conn:
+            if status:
+                rows = conn.execute('''
+                    SELECT * FROM scheduled_jobs WHERE status = ? ORDER BY run_at LIMIT ? OFFSET ?
+                ''', (status, limit, offset)).fetchall()
+            else:
+                rows = conn.execute('''
+                    SELECT * FROM scheduled_jobs ORDER BY run_at LIMIT ? OFFSET ?
+                ''', (limit, offset)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def cancel(self, schedule_id):
+        """取消尚未到期的定时任务；堆中的条目到期时会因状态不符被跳过"""
+        with self.db.connect() as conn:
+            cursor = conn.execute('''
+                UPDATE scheduled_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?
+            ''', (SCHEDULE_CANCELLED, schedule_id, SCHEDULE_PENDING))
+            return cursor.rowcount > 0
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(min(delay, MAX_SLEEP))
+                if self._stopping:
+                    return
+                now = time.time()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[1])
+            for schedule_id in due:
+                try:
+                    self._dispatch(schedule_id)
+                except Exception as e:
+                    print(f"[ERROR] 定时任务 {schedule_id} 派发失败: {e}")
+
+    def _dispatch(self, schedule_id):
+        # 改为 dispatched、写入发布任务和记录 job_id 在同一个事务中完成：
+        # 同一个定时任务只会派发一次，中途退出时整体回滚，下次启动仍按 pending 补发
+        with self.db.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            claimed = conn.execute('''
+                UPDATE scheduled_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?
+            ''', (SCHEDULE_DISPATCHED, schedule_id, SCHEDULE_PENDING)).rowcount > 0
+            if not claimed:
+                return
+            row = conn.execute('SELECT payload FROM scheduled_jobs WHERE id = ?', (schedule_id,)).fetchone()
+            job_id = self.queue.enqueue(json.loads(row['payload']), conn)
+            conn.execute('UPDATE scheduled_jobs SET job_id = ? WHERE id = ?', (job_id, schedule_id))
+        self.queue.notify()
+        print(f"[OK] 定时任务 {schedule_id} 已到期，发布任务 id: {job_id}")
+
+    @staticmethod
+    def _to_dict(row):
+        schedule = dict(row)
+        schedule['payload'] = json.loads(schedule['payload']) if schedule.get('payload') else None
+        return schedule
+
+
+# 全局定时发布调度器实例
+publish_scheduler = PublishScheduler()
@@ -0,0 +1,185 @@
+"""
+素材缩略图模块
+素材登记后在后台线程池中用 ffmpeg 截取一帧代表画面，再用 Pillow 缩放为多种尺寸，
+按内容哈希存放在 thumbnails 目录（内容相同的素材共用一份，文件内容不会变化）。
+small / medium 为 WebP，供素材列表展示；cover 为 JPEG，发布时作为抖音、TikTok 的默认封面
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.settings import BASE_DIR, THUMBNAIL_WORKERS
+from myUtils.db import db
+from utils.media_info import MediaInfoError, probe
+
+VIDEO_DIR = Path(BASE_DIR / "videoFile")
+THUMBNAIL_DIR = Path(BASE_DIR / "thumbnails")
+
+# 尺寸名 -> (长边像素, 格式, 质量)
+VARIANTS = {
+    'small': (320, 'WEBP', 75),
+    'medium': (640, 'WEBP', 80),
+    'cover': (1280, 'JPEG', 85),
+}
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg'}
+
+# 从视频 10% 处开始取帧，最多从第 10 秒开始，跳过片头的黑屏
+FRAME_OFFSET_RATIO = 0.1
+MAX_FRAME_OFFSET = 10
+# ffmpeg thumbnail 滤镜在连续多少帧中挑选最有代表性的一帧
+FRAME_CANDIDATES = 30
+
+
+class ThumbnailError(Exception):
+    """无法生成缩略图"""
+
+
+def thumbnail_path(content_hash, size):
+    """缩略图路径，按哈希前两位分目录"""
+    ext = EXTENSIONS[VARIANTS[size][1]]
+    return THUMBNAIL_DIR / content_hash[:2] / f"{content_hash}_{size}{ext}"
+
+
+def has_thumbnails(content_hash):
+    return all(thumbnail_path(content_hash, size).exists() for size in VARIANTS)
+
+
+def remove_thumbnails(content_hash):
+    for size in VARIANTS:
+        thumbnail_path(content_hash, size).unlink(missing_ok=True)
+
+
+def extract_frame(video_path, duration=None, timeout=60):
+    """用 ffmpeg 截取一帧（长边不超过最大尺寸），返回 PNG 数据"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise ThumbnailError("未安装 ffmpeg")
+    max_side = max(side for side, _, _ in VARIANTS.values())
+    offsets = [min(duration * FRAME_OFFSET_RATIO, MAX_FRAME_OFFSET)] if duration else []
+    # 指定的位置超出视频长度等情况下取不到帧时，从头再取一次
+    for offset in offsets + [0]:
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', f"{offset:.3f}", '-i', str(video_path),
+             '-vf', f"thumbnail={FRAME_CANDIDATES},scale='min({max_side},iw)':'min({max_side},ih)'"
+                    f":force_original_aspect_ratio=decrease",
+             '-frames:v', '1', '-f', 'image2pipe', '-c:v', 'png', '-'],
+            capture_output=True, timeout=timeout)
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    raise ThumbnailError(result.stderr.decode('utf-8', 'replace').strip() or "未能截取画面")
+
+
+def generate(content_hash, video_path):
+    """截取画面并生成各尺寸缩略图，先写临时文件再替换，读取方不会拿到写了一半的图片"""
+    from PIL import Image  # 只在生成缩略图时导入
+
+    try:
+        duration = probe(video_path)['duration']
+    except MediaInfoError:
+        duration = None
+    frame = Image.open(io.BytesIO(extract_frame(video_path, duration))).convert('RGB')
+    for size, (side, fmt, quality) in VARIANTS.items():
+        path = thumbnail_path(content_hash, size)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        image = frame.copy()
+        image.thumbnail((side, side))
+        temp_path = path.with_name(path.name + '.tmp')
+        image.save(temp_path, fmt, quality=quality)
+        os.replace(temp_path, path)
+
+
+def covers_for_files(file_names):
+    """
+    按素材文件名（file_records.file_path）查询已生成的封面
+    :return: {文件名: 封面路径}，没有封面的素材不在结果中
+    """
+    names = list(dict.fromkeys(str(name) for name in file_names))
+    if not names:
+        return {}
+    with db.connect() as conn:
+        rows = conn.execute(f'''
+            SELECT file_path, content_hash FROM file_records
+            WHERE content_hash IS NOT NULL AND file_path IN ({', '.join('?' * len(names))})
+        ''', names).fetchall()
+    covers = {}
+    for row in rows:
+        path = thumbnail_path(row['content_hash'], 'cover')
+        if path.exists():
+            covers[row['file_path']] = str(path)
+    return covers
+
+
+class ThumbnailGenerator(object):
+    """在固定大小的线程池中生成缩略图（ffmpeg 在子进程中运行），同一内容同时只生成一次"""
+
+    def __init__(self, workers=THUMBNAIL_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = None
+        self._running = set()  # 正在生成的内容哈希
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def submit(self, content_hash, video_path):
+        """提交一个素材，已生成或正在生成时忽略；返回是否提交"""
+        if not content_hash or has_thumbnails(content_hash):
+            return False
+        if shutil.which('ffmpeg') is None:
+            if not self._warned:
+                self._warned = True
+                print("[WARN] 未安装 ffmpeg，不生成素材缩略图")
+            return False
+        with self._lock:
+            if content_hash in self._running:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnail")
+            self._running.add(content_hash)
+            self._executor.submit(self._run, content_hash, Path(video_path))
+        return True
+
+    def submit_records(self, records):
+        """提交 file_records 记录（字典或行），忽略没有哈希或文件路径的记录"""
+        for record in records:
+            if record['content_hash'] and record['file_path']:
+                self.submit(record['content_hash'], VIDEO_DIR / record['file_path'])
+
+    def _run(self, content_hash, video_path):
+        try:
+            generate(content_hash, video_path)
+        except Exception as e:
+            print(f"[WARN] 生成素材缩略图失败 {video_path.name}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(content_hash)
+
+    def backfill(self):
+        """为还没有缩略图的旧素材提交生成任务"""
+        with db.connect() as conn:
+            rows = conn.execute('''
+                SELECT content_hash, MIN(file_path) AS file_path FROM file_records
+                WHERE content_hash IS NOT NULL AND file_path IS NOT NULL GROUP BY content_hash
+            ''').fetchall()
+        count = 0
+        for row in rows:
+            path = VIDEO_DIR / row['file_path']
+            if path.is_file() and self.submit(row['content_hash'], path):
+                count += 1
+        if count:
+            print(f"[INFO] 正在后台生成 {count} 个素材的缩略图")
+        return count
+
+    def stop(self):
+        """停止线程池，未开始的任务下次启动时由 backfill 重新提交"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局实例
+thumbnail_generator = ThumbnailGenerator()
@@ -0,0 +1,115 @@
+"""
+监控文件夹已处理文件索引
+把已导入（或因内容重复而跳过）的源文件按 (路径, 大小, 修改时间, 内容哈希) 持久化到 watched_files 表，
+重启后启动扫描只需遍历一次目录并用一条查询与索引比对；最近用到的条目缓存在有上限的 LRU 中
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from utils.settings import WATCH_INDEX_CACHE_SIZE
+from myUtils.db import db
+
+
+class WatchedFileIndex(object):
+    """源文件索引，键为源文件绝对路径"""
+
+    def __init__(self, database=db, capacity=WATCH_INDEX_CACHE_SIZE):
+        self.db = database
+        self.capacity = max(1, capacity)
+        self._cache = OrderedDict()  # 路径 -> (size, mtime_ns)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(path):
+        return os.path.abspath(str(path))
+
+    def _remember(self, path, signature):
+        with self._lock:
+            self._cache[path] = signature
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def is_processed(self, path, size, mtime_ns):
+        """大小和修改时间与索引一致即视为已处理，先查 LRU，未命中再查库"""
+        path = self.normalize(path)
+        with self._lock:
+            signature = self._cache.get(path)
+            if signature is not None:
+                self._cache.move_to_end(path)
+        if signature is None:
+            with self.db.connect() as conn:
+                row = conn.execute('SELECT size, mtime_ns FROM watched_files WHERE source_path = ?',
+                                   (path,)).fetchone()
+            if row is None:
+                return False
+            signature = (row['size'], row['mtime_ns'])
+            self._remember(path, signature)
+        return signature == (size, mtime_ns)
+
+    def load_folder(self, folder):
+        """一条范围查询（走主键索引）取出 folder 下所有已处理文件，返回 {路径: (size, mtime_ns)}"""
+        prefix = self.normalize(folder).rstrip(os.sep) + os.sep
+        # 以路径分隔符的下一个字符作为上界，等价于 LIKE 'prefix%' 但可以使用索引
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        with self.db.connect() as conn:
+            rows = conn.execute('''
+                SELECT source_path, size, mtime_ns FROM watched_files WHERE source_path >= ? AND source_path < ?
+            ''', (prefix, upper)).fetchall()
+        return {row['source_path']: (row['size'], row['mtime_ns']) for row in rows}
+
+    def diff(self, folder, files):
+        """
+        比对目录扫描结果与索引，返回需要处理的文件
+        :param files: [(路径, size, mtime_ns)]，通常来自 os.scandir 的缓存 stat
+        """
+        known = self.load_folder(folder)
+        changed = []
+        for path, size, mtime_ns in files:
+            path = self.normalize(path)
+            signature = known.get(path)
+            if signature == (size, mtime_ns):
+                self._remember(path, signature)
+            else:
+                changed.append(path)
+        return changed
+
+    def record_many(self, entries):
+        """
+        批量记录已处理的源文件
+        :param entries: [(路径, size, mtime_ns, content_hash, file_record_id)]
+        """
+        rows = [(self.normalize(path), size, mtime_ns, content_hash, record_id)
+                for path, size, mtime_ns, content_hash, record_id in entries]
+        if not rows:
+            return
+        with self.db.connect() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO watched_files (source_path, size, mtime_ns, content_hash, file_record_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+        for path, size, mtime_ns, _, _ in rows:
+            self._remember(path, (size, mtime_ns))
+
+
+def scan_folder(folder, extensions, recursive=False):
+    """遍历目录一次，直接使用 scandir 返回的 stat 信息，返回 [(路径, size, mtime_ns)]"""
+    results = []
+    stack = [str(folder)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and entry.name != ".uploading":
+                            stack.append(entry.path)
+                        continue
+                    if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in extensions:
+                        continue
+                    st = entry.stat()
+                    results.append((entry.path, st.st_size, st.st_mtime_ns))
+        except OSError as e:
+            print(f"[ERROR] 扫描文件夹失败: {e}")
+    return results
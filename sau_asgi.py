@@ -0,0 +1,106 @@
+"""
+后端生产模式入口
+用 uvicorn 提供 ASGI 服务：普通接口由 Flask 在线程池中处理，/login 的 SSE 推送直接在事件循环中执行，
+扫码登录、发布引擎和接口共用服务器的事件循环；收到 Ctrl+C / SIGTERM 后停止接收新请求，
+等待执行中的发布任务完成（最多 SHUTDOWN_DRAIN_TIMEOUT 秒）再退出。
+
+用法：python sau_asgi.py
+  或：uvicorn sau_asgi:app --host 0.0.0.0 --port 5409
+后台任务队列、登录会话和指标都保存在进程内，只能以单进程运行，并发由 SERVER_THREADS 控制
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from utils.settings import SERVER_HOST, SERVER_PORT, SERVER_THREADS
+from myUtils.login_manager import login_manager
+from sau_backend import app as flask_app, start_services, stop_services
+from utils.async_loop import background_loop
+from utils.wsgi_bridge import WsgiBridge
+
+# SSE 响应头，与 sau_backend 中 /login 一致，另外补上跨域头（该接口不经过 flask_cors）
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+    (b'access-control-allow-origin', b'*'),
+]
+
+
+class SauAsgiApp(object):
+    """ASGI 应用：处理 lifespan 事件和 /login，其余请求交给 Flask"""
+
+    def __init__(self, threads=SERVER_THREADS):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="sau-http")
+        self.wsgi = WsgiBridge(flask_app, self.executor)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/login' and scope['method'] == 'GET':
+            await self.login(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if not background_loop.attach(loop):
+                    print("[WARN] 共享事件循环已在其他线程启动，登录和发布不会使用服务器的事件循环")
+                await loop.run_in_executor(None, start_services)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # 发布任务在本事件循环中执行，等待期间事件循环必须继续运行，所以在线程中等待
+                await loop.run_in_executor(None, stop_services)
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def login(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        # 1 小红书 2 视频号 3 抖音 4 快手
+        type = query.get('type', [None])[0]
+        # 账号名
+        id = query.get('id', [None])[0]
+        session = login_manager.start(type, id)
+        if session is None:
+            body = json.dumps({"code": 400, "msg": "不支持的平台类型", "data": None}, ensure_ascii=False).encode('utf-8')
+            await send({'type': 'http.response.start', 'status': 400, 'headers': [
+                (b'content-type', b'application/json'), (b'access-control-allow-origin', b'*')]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        stream = login_manager.astream(session)
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': SSE_HEADERS})
+            async for chunk in stream:
+                if disconnected.is_set():
+                    break
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+            # 客户端断开时同样清理会话
+            await stream.aclose()
+
+
+app = SauAsgiApp()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    # 后台状态都在进程内，只能单进程运行
+    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT, workers=1, timeout_graceful_shutdown=10)
@@ -1,27 +1,66 @@
-import asyncio
+import inspect
 import os
-import sqlite3
-import threading
+import stat
 import time
 import uuid
 from pathlib import Path
-from queue import Queue
 from flask_cors import CORS
-from myUtils.auth import check_cookie
-from flask import Flask, request, jsonify, Response, render_template, send_from_directory
-from conf import BASE_DIR
-from myUtils.login import get_tencent_cookie, douyin_cookie_gen, get_ks_cookie, xiaohongshu_cookie_gen
-from myUtils.postVideo import post_video_tencent, post_video_DouYin, post_video_ks, post_video_xhs
+from flask import Flask, request, jsonify, Response, render_template, send_from_directory, send_file, g
+from werkzeug.security import safe_join
+from utils.settings import BASE_DIR, PUBLISH_SCHEDULE_MODE, SERVER_HOST, SERVER_PORT, SHUTDOWN_DRAIN_TIMEOUT, \
+    FILE_CACHE_MAX_AGE, USE_X_SENDFILE
+from myUtils.account_checker import account_checker
+from myUtils.chunk_upload import chunk_upload_manager, ChunkUploadError
+from myUtils.db import db
+from myUtils.file_index import backfill_hashes_in_background, save_with_hash, register_file
 from myUtils.folder_watcher import folder_watcher
+from myUtils.job_queue import job_queue
+from myUtils.listing import ACCOUNTS, FILES, ListQueryError, list_etag, list_rows
+from myUtils.login_manager import login_manager
+from myUtils.media_probe import media_prober
+from myUtils.scheduler import publish_scheduler
+from myUtils.thumbnails import VARIANTS as THUMBNAIL_SIZES, remove_thumbnails, thumbnail_generator, thumbnail_path
+from uploader.registry import get_platform
+from utils.async_loop import background_loop
+from utils.files_times import parse_daily_time
+from utils.metrics import registry
 
-active_queues = {}
 app = Flask(__name__)
 
 #允许所有来源跨域访问
 CORS(app)
 
-# 限制上传文件大小为160MB
+
+def ensure_sync(func):
+    # async 路由在共享事件循环中执行，不再为每个请求新建事件循环
+    if inspect.iscoroutinefunction(func):
+        return lambda *args, **kwargs: background_loop.run(func(*args, **kwargs))
+    return func
+
+
+app.ensure_sync = ensure_sync
+
+# 限制上传文件大小为160MB（大文件请使用 /uploadInit 分片上传，单个分片同样受此限制）
 app.config['MAX_CONTENT_LENGTH'] = 160 * 1024 * 1024
+# 由前置的 Apache / lighttpd 通过 sendfile 发送视频文件（X-Sendfile），后端只返回响应头
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
+
+http_request_seconds = registry.histogram('sau_http_request_seconds', '后端接口处理耗时', labels=('endpoint', 'status'))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    # SSE 等流式响应只统计到返回响应头为止
+    start = g.pop('request_start', None)
+    if start is not None:
+        http_request_seconds.observe(time.perf_counter() - start, endpoint=request.endpoint or 'unknown',
+                                     status=response.status_code)
+    return response
 
 # 获取当前目录（假设 index.html 和 assets 在这里）
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -80,9 +119,47 @@ def get_file():
 
     # 拼接完整路径
     file_path = str(Path(BASE_DIR / "videoFile"))
+    full_path = safe_join(file_path, filename)
+    if full_path is None:
+        return {"error": "Invalid filename"}, 400
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return {"error": "File not found"}, 404
+    # filename=. 或子目录名也能通过 safe_join，只发送普通文件
+    if not stat.S_ISREG(st.st_mode):
+        return {"error": "File not found"}, 404
+
+    # 返回文件：支持 Range（206 分段响应，播放器拖动进度只下载需要的部分）和 If-None-Match / If-Range；
+    # ETag 由文件大小和修改时间生成，无需读取文件内容
+    return send_file(full_path, conditional=True, etag=f"{st.st_size:x}-{st.st_mtime_ns:x}",
+                     max_age=FILE_CACHE_MAX_AGE)
+
+
+@app.route('/getThumbnail', methods=['GET'])
+def get_thumbnail():
+    """素材缩略图，size 可选 small / medium / cover；尚未生成时返回 404 并在后台生成"""
+    file_id = request.args.get('id')
+    size = request.args.get('size', 'small')
+    if not file_id or not file_id.isdigit() or size not in THUMBNAIL_SIZES:
+        return jsonify({
+            "code": 400,
+            "msg": f"Invalid id or size, size must be one of {', '.join(THUMBNAIL_SIZES)}",
+            "data": None
+        }), 400
+
+    with db.connect() as conn:
+        record = conn.execute('SELECT content_hash, file_path FROM file_records WHERE id = ?', (file_id,)).fetchone()
+    if not record or not record['content_hash']:
+        return jsonify({"code": 404, "msg": "Thumbnail not found", "data": None}), 404
 
-    # 返回文件
-    return send_from_directory(file_path,filename)
+    path = thumbnail_path(record['content_hash'], size)
+    if not path.exists():
+        thumbnail_generator.submit_records([record])
+        return jsonify({"code": 404, "msg": "Thumbnail not ready", "data": None}), 404
+    # 缩略图按内容哈希存放，内容不会变化，ETag 直接由哈希和尺寸生成
+    return send_file(path, conditional=True, etag=f"{record['content_hash'][:16]}-{size}",
+                     max_age=FILE_CACHE_MAX_AGE)
 
 
 @app.route('/uploadSave', methods=['POST'])
@@ -116,26 +193,22 @@ def upload_save():
 
         # 构造文件名和路径
         final_filename = f"{uuid_v1}_{filename}"
-        filepath = Path(BASE_DIR / "videoFile" / f"{uuid_v1}_{filename}")
+        filepath = Path(BASE_DIR / "videoFile" / final_filename)
 
-        # 保存文件
-        file.save(filepath)
+        # 保存文件，边写边计算内容哈希
+        content_hash, size = save_with_hash(file.stream, filepath)
 
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                                INSERT INTO file_records (filename, filesize, file_path)
-            VALUES (?, ?, ?)
-                                ''', (filename, round(float(os.path.getsize(filepath)) / (1024 * 1024),2), final_filename))
-            conn.commit()
-            print("[OK] 上传文件已记录")
+        # 内容已存在时复用已有素材记录，不重复存储
+        record, duplicate = register_file(filename, filepath, content_hash, size)
+        print("[OK] 上传文件与已有素材重复，已复用" if duplicate else "[OK] 上传文件已记录")
 
         return jsonify({
             "code": 200,
             "msg": "File uploaded and saved successfully",
             "data": {
-                "filename": filename,
-                "filepath": final_filename
+                "filename": record['filename'],
+                "filepath": record['file_path'],
+                "duplicate": duplicate
             }
         }), 200
 
@@ -147,38 +220,118 @@ def upload_save():
             "data": None
         }), 500
 
-@app.route('/getFiles', methods=['GET'])
-def get_all_files():
+# 分片断点续传上传 API：/uploadInit -> /uploadChunk（可并发、可重传）-> /uploadComplete
+
+@app.route('/uploadInit', methods=['POST'])
+def upload_init():
+    """创建分片上传会话，请求体：{"filename", "filesize", "chunkSize"(可选)}"""
+    data = request.get_json() or {}
+    # 获取自定义文件名（可选），与 /uploadSave 保持一致
+    filename = data.get('filename') or ''
+    custom_filename = data.get('customFilename')
+    if custom_filename:
+        filename = custom_filename + "." + filename.split('.')[-1]
     try:
-        # 使用 with 自动管理数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row  # 允许通过列名访问结果
-            cursor = conn.cursor()
+        session = chunk_upload_manager.init(filename, data.get('filesize'), data.get('chunkSize'))
+    except (ChunkUploadError, TypeError) as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    except Exception as e:
+        return jsonify({"code": 500, "msg": f"init upload failed: {e}", "data": None}), 500
+    return jsonify({"code": 200, "msg": "success", "data": session}), 200
 
-            # 查询所有记录
-            cursor.execute("SELECT * FROM file_records")
-            rows = cursor.fetchall()
-
-            # 将结果转为字典列表，并提取UUID
-            data = []
-            for row in rows:
-                row_dict = dict(row)
-                # 从 file_path 中提取 UUID (文件名的第一部分，下划线前)
-                if row_dict.get('file_path'):
-                    file_path_parts = row_dict['file_path'].split('_', 1)  # 只分割第一个下划线
-                    if len(file_path_parts) > 0:
-                        row_dict['uuid'] = file_path_parts[0]  # UUID 部分
-                    else:
-                        row_dict['uuid'] = ''
-                else:
-                    row_dict['uuid'] = ''
-                data.append(row_dict)
 
-            return jsonify({
-                "code": 200,
-                "msg": "success",
-                "data": data
-            }), 200
+@app.route('/uploadChunk', methods=['PUT', 'POST'])
+def upload_chunk():
+    """上传一个分片：?id=会话id&index=分片序号，请求体为分片原始字节（application/octet-stream）"""
+    upload_id = request.args.get('id')
+    index = request.args.get('index', type=int)
+    if not upload_id or index is None:
+        return jsonify({"code": 400, "msg": "id and index are required", "data": None}), 400
+    try:
+        # 直接读取请求流写入文件，不经过表单解析
+        session = chunk_upload_manager.write_chunk(upload_id, index, request.stream, request.content_length)
+    except ChunkUploadError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    except Exception as e:
+        return jsonify({"code": 500, "msg": f"upload chunk failed: {e}", "data": None}), 500
+    if session is None:
+        return jsonify({"code": 404, "msg": "upload not found", "data": None}), 404
+    return jsonify({"code": 200, "msg": "success", "data": session}), 200
+
+
+@app.route('/uploadStatus', methods=['GET'])
+def upload_status():
+    """查询上传会话进度和已收到的分片，断线重连后据此补传缺失分片"""
+    upload_id = request.args.get('id')
+    if not upload_id:
+        return jsonify({"code": 400, "msg": "id is required", "data": None}), 400
+    session = chunk_upload_manager.status(upload_id)
+    if session is None:
+        return jsonify({"code": 404, "msg": "upload not found", "data": None}), 404
+    return jsonify({"code": 200, "msg": "success", "data": session}), 200
+
+
+@app.route('/uploadComplete', methods=['POST'])
+def upload_complete():
+    """所有分片上传完毕后合并落盘并写入素材库，返回数据与 /uploadSave 相同"""
+    upload_id = request.args.get('id')
+    if not upload_id:
+        return jsonify({"code": 400, "msg": "id is required", "data": None}), 400
+    try:
+        result = chunk_upload_manager.complete(upload_id)
+    except ChunkUploadError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+    except Exception as e:
+        print(f"Upload failed: {e}")
+        return jsonify({"code": 500, "msg": f"upload failed: {e}", "data": None}), 500
+    if result is None:
+        return jsonify({"code": 404, "msg": "upload not found", "data": None}), 404
+    return jsonify({"code": 200, "msg": "File uploaded and saved successfully", "data": result}), 200
+
+
+@app.route('/cancelUpload', methods=['GET'])
+def cancel_upload():
+    """取消上传中的会话并删除临时文件"""
+    upload_id = request.args.get('id')
+    if not upload_id:
+        return jsonify({"code": 400, "msg": "id is required", "data": None}), 400
+    if not chunk_upload_manager.cancel(upload_id):
+        return jsonify({"code": 400, "msg": "上传会话不存在或已结束", "data": None}), 400
+    return jsonify({"code": 200, "msg": "upload cancelled", "data": None}), 200
+
+def list_response(spec, to_item):
+    """
+    列表接口的公共处理：数据未变化（If-None-Match 命中 ETag）时直接返回 304；
+    未传 limit / cursor 时 data 为全部记录，否则 data 为 {items, nextCursor, total}
+    """
+    params = request.args.to_dict()
+    etag = list_etag(spec, params)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        result = list_rows(spec, params)
+        if isinstance(result, tuple):
+            rows, next_cursor, total = result
+            data = {"items": [to_item(row) for row in rows], "nextCursor": next_cursor, "total": total}
+        else:
+            data = [to_item(row) for row in result]
+        response = jsonify({"code": 200, "msg": "success", "data": data})
+    response.set_etag(etag)
+    # 浏览器每次都带 If-None-Match 重新验证，未变化时只返回 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/getFiles', methods=['GET'])
+def get_all_files():
+    """
+    素材列表，支持 keyword（文件名模糊匹配）、uuid、hash 过滤，
+    sort=id|name|size|upload_time、order=asc|desc，limit + cursor 分页
+    """
+    try:
+        return list_response(FILES, dict)
+    except ListQueryError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
     except Exception as e:
         return jsonify({
             "code": 500,
@@ -189,26 +342,14 @@ def get_all_files():
 
 @app.route("/getAccounts", methods=['GET'])
 def getAccounts():
-    """快速获取所有账号信息，不进行cookie验证"""
+    """
+    快速获取账号信息，不进行cookie验证；支持 keyword（账号名模糊匹配）、platform、status 过滤，
+    sort=id|name|platform|status、order=asc|desc，limit + cursor 分页
+    """
     try:
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute('''
-            SELECT * FROM user_info''')
-            rows = cursor.fetchall()
-            rows_list = [list(row) for row in rows]
-
-            print("\n[INFO] 当前数据表内容（快速获取）：")
-            for row in rows:
-                print(row)
-
-            return jsonify(
-                {
-                    "code": 200,
-                    "msg": None,
-                    "data": rows_list
-                }), 200
+        return list_response(ACCOUNTS, list)
+    except ListQueryError as e:
+        return jsonify({"code": 400, "msg": str(e), "data": None}), 400
     except Exception as e:
         print(f"获取账号列表时出错: {str(e)}")
         return jsonify({
@@ -219,35 +360,26 @@ def getAccounts():
 
 
 @app.route("/getValidAccounts",methods=['GET'])
-async def getValidAccounts():
-    with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
+def getValidAccounts():
+    """返回缓存的账号校验结果，过期的账号在后台并发重新校验；refresh=1 时忽略缓存强制校验全部账号"""
+    force = request.args.get('refresh') == '1'
+    with db.connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
         SELECT * FROM user_info''')
         rows = cursor.fetchall()
-        rows_list = [list(row) for row in rows]
-        print("\n[INFO] 当前数据表内容：")
-        for row in rows:
-            print(row)
-        for row in rows_list:
-            flag = await check_cookie(row[1],row[2])
-            if not flag:
-                row[4] = 0
-                cursor.execute('''
-                UPDATE user_info 
-                SET status = ? 
-                WHERE id = ?
-                ''', (0,row[0]))
-                conn.commit()
-                print("[OK] 用户状态已更新")
-        for row in rows:
-            print(row)
-        return jsonify(
-                        {
-                            "code": 200,
-                            "msg": None,
-                            "data": rows_list
-                        }),200
+    rows_list = [list(row) for row in rows]
+
+    now = time.time()
+    stale = [(row['id'], row['type'], row['filePath']) for row in rows
+             if force or account_checker.is_stale(row['last_checked'], now)]
+    refreshing = account_checker.refresh_in_background(stale) or account_checker.is_refreshing
+    return jsonify(
+                    {
+                        "code": 200,
+                        "msg": "账号正在后台校验，状态稍后更新" if refreshing else None,
+                        "data": rows_list
+                    }),200
 
 @app.route('/deleteFile', methods=['GET'])
 def delete_file():
@@ -262,8 +394,7 @@ def delete_file():
 
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with db.connect() as conn:
             cursor = conn.cursor()
 
             # 查询要删除的记录
@@ -293,8 +424,17 @@ def delete_file():
 
             # 删除数据库记录
             cursor.execute("DELETE FROM file_records WHERE id = ?", (file_id,))
+            orphan_hash = record.get('content_hash') and not cursor.execute(
+                "SELECT 1 FROM file_records WHERE content_hash = ? LIMIT 1", (record['content_hash'],)).fetchone()
             conn.commit()
 
+        # 提交成功后，没有其他素材使用同一内容时再删除缩略图
+        if orphan_hash:
+            try:
+                remove_thumbnails(record['content_hash'])
+            except OSError as e:
+                print(f"[WARN] 删除素材缩略图失败: {e}")
+
         return jsonify({
             "code": 200,
             "msg": "File deleted successfully",
@@ -317,8 +457,7 @@ def delete_account():
 
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with db.connect() as conn:
             cursor = conn.cursor()
 
             # 查询要删除的记录
@@ -360,17 +499,11 @@ def login():
     # 账号名
     id = request.args.get('id')
 
-    # 模拟一个用于异步通信的队列
-    status_queue = Queue()
-    active_queues[id] = status_queue
-
-    def on_close():
-        print(f"清理队列: {id}")
-        del active_queues[id]
-    # 启动异步任务线程
-    thread = threading.Thread(target=run_async_function, args=(type,id,status_queue), daemon=True)
-    thread.start()
-    response = Response(sse_stream(status_queue,), mimetype='text/event-stream')
+    # 登录流程在共享事件循环中执行，二维码和状态通过会话队列推送
+    session = login_manager.start(type, id)
+    if session is None:
+        return jsonify({"code": 400, "msg": "不支持的平台类型", "data": None}), 400
+    response = Response(login_manager.stream(session), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
     response.headers['X-Accel-Buffering'] = 'no'  # 关键：禁用 Nginx 缓冲
     response.headers['Content-Type'] = 'text/event-stream'
@@ -381,47 +514,32 @@ def login():
 def postVideo():
     # 获取JSON数据
     data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"code": 400, "msg": "Expected a JSON object", "data": None}), 400
 
-    # 从JSON数据中提取fileList和accountList
-    file_list = data.get('fileList', [])
-    account_list = data.get('accountList', [])
-    type = data.get('type')
-    title = data.get('title')
-    tags = data.get('tags')
-    category = data.get('category')
-    enableTimer = data.get('enableTimer')
-    if category == 0:
-        category = None
-    productLink = data.get('productLink', '')
-    productTitle = data.get('productTitle', '')
-    thumbnail_path = data.get('thumbnail', '')
-    is_draft = data.get('isDraft', False)  # 新增参数：是否保存为草稿
-
-    videos_per_day = data.get('videosPerDay')
-    daily_times = data.get('dailyTimes')
-    start_days = data.get('startDays')
     # 打印获取到的数据（仅作为示例）
-    print("File List:", file_list)
-    print("Account List:", account_list)
-    match type:
-        case 1:
-            post_video_xhs(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                               start_days)
-        case 2:
-            post_video_tencent(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                               start_days, is_draft)
-        case 3:
-            post_video_DouYin(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                      start_days, thumbnail_path, productLink, productTitle)
-        case 4:
-            post_video_ks(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                      start_days)
-    # 返回响应给客户端
+    print("File List:", data.get('fileList', []))
+    print("Account List:", data.get('accountList', []))
+    # 定时发布由本地调度器在发布时间到达时再写入任务队列
+    if data.get('enableTimer') and PUBLISH_SCHEDULE_MODE == 'local':
+        try:
+            schedule_ids = publish_scheduler.schedule_payload(data)
+        except ValueError as e:
+            # dailyTimes 格式有误等
+            return jsonify({"code": 400, "msg": str(e), "data": None}), 400
+        return jsonify(
+            {
+                "code": 200,
+                "msg": None,
+                "data": {"scheduleIds": schedule_ids}
+            }), 200
+    # 写入任务队列后立即返回，由后台工作线程执行发布
+    job_id = job_queue.enqueue(data)
     return jsonify(
         {
             "code": 200,
             "msg": None,
-            "data": None
+            "data": {"jobId": job_id}
         }), 200
 
 
@@ -436,8 +554,7 @@ def updateUserinfo():
     userName = data.get('userName')
     try:
         # 获取数据库连接
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with db.connect() as conn:
             cursor = conn.cursor()
 
             # 更新数据库记录
@@ -468,45 +585,124 @@ def postVideoBatch():
 
     if not isinstance(data_list, list):
         return jsonify({"error": "Expected a JSON array"}), 400
-    for data in data_list:
-        # 从JSON数据中提取fileList和accountList
-        file_list = data.get('fileList', [])
-        account_list = data.get('accountList', [])
-        type = data.get('type')
-        title = data.get('title')
-        tags = data.get('tags')
-        category = data.get('category')
-        enableTimer = data.get('enableTimer')
-        if category == 0:
-            category = None
-        productLink = data.get('productLink', '')
-        productTitle = data.get('productTitle', '')
-
-        videos_per_day = data.get('videosPerDay')
-        daily_times = data.get('dailyTimes')
-        start_days = data.get('startDays')
-        # 打印获取到的数据（仅作为示例）
-        print("File List:", file_list)
-        print("Account List:", account_list)
-        match type:
-            case 1:
-                return
-            case 2:
-                post_video_tencent(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                                   start_days)
-            case 3:
-                post_video_DouYin(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                          start_days, productLink, productTitle)
-            case 4:
-                post_video_ks(title, file_list, tags, account_list, category, enableTimer, videos_per_day, daily_times,
-                          start_days)
-    # 返回响应给客户端
+    for index, data in enumerate(data_list):
+        if not isinstance(data, dict):
+            return jsonify({"code": 400, "msg": f"第 {index + 1} 个任务不是 JSON 对象", "data": None}), 400
+    # 每个元素对应一个发布任务，开启定时发布的交给本地调度器
+    local_schedule = PUBLISH_SCHEDULE_MODE == 'local'
+    scheduled = [data for data in data_list if local_schedule and data.get('enableTimer')]
+    immediate = [data for data in data_list if not (local_schedule and data.get('enableTimer'))]
+    # 先检查定时参数，避免部分任务已写入后才发现格式错误
+    for index, data in enumerate(data_list):
+        try:
+            if local_schedule and data.get('enableTimer'):
+                get_platform(data.get('type'))
+                for value in data.get('dailyTimes') or []:
+                    parse_daily_time(value)
+        except ValueError as e:
+            return jsonify({"code": 400, "msg": f"第 {index + 1} 个任务: {e}", "data": None}), 400
+    job_ids = job_queue.enqueue_many(immediate) if immediate else []
+    schedule_ids = []
+    for data in scheduled:
+        schedule_ids.extend(publish_scheduler.schedule_payload(data))
     return jsonify(
         {
             "code": 200,
             "msg": None,
+            "data": {"jobIds": job_ids, "scheduleIds": schedule_ids}
+        }), 200
+
+
+# 发布任务相关 API
+
+@app.route('/getJobs', methods=['GET'])
+def get_jobs():
+    """分页获取发布任务列表，可按状态过滤"""
+    status = request.args.get('status')
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    try:
+        return jsonify({
+            "code": 200,
+            "msg": "success",
+            "data": job_queue.list_jobs(status, limit, offset)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "code": 500,
+            "msg": f"获取任务列表失败: {str(e)}",
             "data": None
+        }), 500
+
+
+@app.route('/getJob', methods=['GET'])
+def get_job():
+    """获取单个发布任务的状态和进度"""
+    job_id = request.args.get('id')
+    if not job_id or not job_id.isdigit():
+        return jsonify({"code": 400, "msg": "Invalid or missing job ID", "data": None}), 400
+
+    job = job_queue.get_job(int(job_id))
+    if not job:
+        return jsonify({"code": 404, "msg": "job not found", "data": None}), 404
+    return jsonify({"code": 200, "msg": "success", "data": job}), 200
+
+
+@app.route('/cancelJob', methods=['GET'])
+def cancel_job():
+    """取消排队中或执行中的发布任务"""
+    job_id = request.args.get('id')
+    if not job_id or not job_id.isdigit():
+        return jsonify({"code": 400, "msg": "Invalid or missing job ID", "data": None}), 400
+
+    if not job_queue.cancel(int(job_id)):
+        return jsonify({"code": 400, "msg": "任务不存在或已结束", "data": None}), 400
+    return jsonify({"code": 200, "msg": "job cancelled", "data": None}), 200
+
+
+@app.route('/retryJob', methods=['GET'])
+def retry_job():
+    """重新执行失败或已取消的发布任务"""
+    job_id = request.args.get('id')
+    if not job_id or not job_id.isdigit():
+        return jsonify({"code": 400, "msg": "Invalid or missing job ID", "data": None}), 400
+
+    if not job_queue.retry(int(job_id)):
+        return jsonify({"code": 400, "msg": "只能重试已结束的失败或已取消任务", "data": None}), 400
+    return jsonify({"code": 200, "msg": "job requeued", "data": None}), 200
+
+# 定时发布相关 API
+
+@app.route('/getSchedules', methods=['GET'])
+def get_schedules():
+    """分页获取本地定时发布任务（按发布时间排序），可按状态过滤"""
+    status = request.args.get('status')
+    limit = request.args.get('limit', 50, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    try:
+        return jsonify({
+            "code": 200,
+            "msg": "success",
+            "data": publish_scheduler.list_schedules(status, limit, offset)
         }), 200
+    except Exception as e:
+        return jsonify({
+            "code": 500,
+            "msg": f"获取定时任务失败: {str(e)}",
+            "data": None
+        }), 500
+
+
+@app.route('/cancelSchedule', methods=['GET'])
+def cancel_schedule():
+    """取消尚未到期的定时发布任务"""
+    schedule_id = request.args.get('id')
+    if not schedule_id or not schedule_id.isdigit():
+        return jsonify({"code": 400, "msg": "Invalid or missing schedule ID", "data": None}), 400
+
+    if not publish_scheduler.cancel(int(schedule_id)):
+        return jsonify({"code": 400, "msg": "定时任务不存在或已执行", "data": None}), 400
+    return jsonify({"code": 200, "msg": "schedule cancelled", "data": None}), 200
 
 # Cookie文件上传API
 @app.route('/uploadCookie', methods=['POST'])
@@ -546,8 +742,7 @@ def upload_cookie():
             }), 400
 
         # 从数据库获取账号的文件路径
-        with sqlite3.connect(Path(BASE_DIR / "db" / "database.db")) as conn:
-            conn.row_factory = sqlite3.Row
+        with db.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT filePath FROM user_info WHERE id = ?', (account_id,))
             result = cursor.fetchone()
@@ -629,40 +824,6 @@ def download_cookie():
         }), 500
 
 
-# 包装函数：在线程中运行异步函数
-def run_async_function(type,id,status_queue):
-    match type:
-        case '1':
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(xiaohongshu_cookie_gen(id, status_queue))
-            loop.close()
-        case '2':
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(get_tencent_cookie(id,status_queue))
-            loop.close()
-        case '3':
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(douyin_cookie_gen(id,status_queue))
-            loop.close()
-        case '4':
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(get_ks_cookie(id,status_queue))
-            loop.close()
-
-# SSE 流生成器函数
-def sse_stream(status_queue):
-    while True:
-        if not status_queue.empty():
-            msg = status_queue.get()
-            yield f"data: {msg}\n\n"
-        else:
-            # 避免 CPU 占满
-            time.sleep(0.1)
-
 # 文件夹监控相关 API
 
 @app.route('/getWatchFolder', methods=['GET'])
@@ -675,7 +836,9 @@ def get_watch_folder():
             "msg": "success",
             "data": {
                 "watchPath": status.get('watch_path', ''),
-                "isRunning": status.get('is_running', False)
+                "isRunning": status.get('is_running', False),
+                "recursive": status.get('recursive', False),
+                "pending": status.get('pending', 0)
             }
         }), 200
     except Exception as e:
@@ -712,7 +875,8 @@ def set_watch_folder():
             folder_watcher.stop_watching()
 
         # 开始监控新文件夹
-        success = folder_watcher.start_watching(folder_path)
+        # recursive 为 true 时同时监控子文件夹，不传则使用配置 WATCH_RECURSIVE
+        success = folder_watcher.start_watching(folder_path, data.get('recursive'))
 
         if success:
             return jsonify({
@@ -762,5 +926,47 @@ def stop_watch_folder():
         }), 500
 
 
+# 运行指标（Prometheus 文本格式）
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def start_services():
+    """启动后台服务，开发模式和生产模式（sau_asgi.py）共用"""
+    # 执行数据库表结构迁移
+    db.migrate()
+    backfill_hashes_in_background()
+    # 读取旧素材的视频元数据、生成缺少的缩略图
+    media_prober.backfill()
+    thumbnail_generator.backfill()
+    # 启动后台发布任务队列（会继续执行上次未完成的任务）
+    job_queue.start()
+    # 启动本地定时发布调度（错过发布时间的任务会立即补发）
+    publish_scheduler.start()
+    # 清理长时间未完成的分片上传临时文件
+    chunk_upload_manager.cleanup_expired()
+
+
+def stop_services(timeout=SHUTDOWN_DRAIN_TIMEOUT):
+    """停止接收新的发布任务，等待执行中的任务完成（最多 timeout 秒）后退出"""
+    print("[INFO] 正在停止后台服务，等待执行中的发布任务完成...")
+    publish_scheduler.stop(timeout=5)
+    if folder_watcher.is_running:
+        folder_watcher.stop_watching()
+    media_prober.stop()
+    thumbnail_generator.stop()
+    busy = job_queue.stop(timeout)
+    if busy:
+        print(f"[WARN] 仍有 {busy} 个发布任务未完成，下次启动时重新执行")
+    else:
+        print("[OK] 后台服务已停止")
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0' ,port=5409)
+    # 开发模式：Werkzeug 开发服务器，生产部署请使用 python sau_asgi.py
+    start_services()
+    try:
+        app.run(host=SERVER_HOST, port=SERVER_PORT, threaded=True)
+    finally:
+        stop_services()
@@ -7,9 +7,9 @@ export const accountApi = {
     return http.get('/getValidAccounts')
   },
 
-  // 获取账号列表（不带验证，快速加载）
-  getAccounts() {
-    return http.get('/getAccounts')
+  // 获取账号列表（不带验证，快速加载）；传入 { limit, cursor, keyword, platform, status, sort, order } 时按页获取
+  getAccounts(params) {
+    return http.get('/getAccounts', params)
   },
 
   // 添加账号
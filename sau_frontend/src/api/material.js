@@ -2,9 +2,9 @@ import { http } from '@/utils/request'
 
 // 素材管理API
 export const materialApi = {
-  // 获取所有素材
-  getAllMaterials: () => {
-    return http.get('/getFiles')
+  // 获取所有素材；传入 { limit, cursor, keyword, sort, order } 时按页获取
+  getAllMaterials: (params) => {
+    return http.get('/getFiles', params)
   },
   
   // 上传素材
@@ -28,6 +28,11 @@ export const materialApi = {
     return `${import.meta.env.VITE_API_BASE_URL || 'http://localhost:5409'}/getFile?filename=${filename}`
   },
 
+  // 获取素材缩略图URL，size 可选 small / medium / cover
+  getMaterialThumbnailUrl: (id, size = 'small') => {
+    return `${import.meta.env.VITE_API_BASE_URL || 'http://localhost:5409'}/getThumbnail?id=${id}&size=${size}`
+  },
+
   // 文件夹监控相关 API
   // 获取当前监控的文件夹配置
   getWatchFolder: () => {
@@ -1,21 +1,21 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
 
-from playwright.async_api import Playwright, async_playwright
+from playwright.async_api import BrowserContext, async_playwright
 import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH, LOCAL_CHROME_HEADLESS
 from utils.base_social_media import set_init_script
+from utils.browser_pool import pooled_context
 from utils.files_times import get_absolute_path
 from utils.log import kuaishou_logger
+from utils.metrics import stage_timer
+from utils.upload_watcher import UploadWatcher
 
 
 async def cookie_auth(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=LOCAL_CHROME_HEADLESS)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -76,28 +76,16 @@ class KSVideo(object):
         kuaishou_logger.error("视频出错了，重新上传中")
         await page.locator('div.progress-div [class^="upload-btn-input"]').set_input_files(self.file_path)
 
-    async def upload(self, playwright: Playwright) -> None:
-        # 使用 Chromium 浏览器启动一个浏览器实例
-        print(self.local_executable_path)
-        if self.local_executable_path:
-            browser = await playwright.chromium.launch(
-                headless=self.headless,
-                executable_path=self.local_executable_path,
-            )
-        else:
-            browser = await playwright.chromium.launch(
-                headless=self.headless
-            )  # 创建一个浏览器上下文，使用指定的 cookie 文件
-        context = await browser.new_context(storage_state=f"{self.account_file}")
-        context = await set_init_script(context)
+    async def upload(self, context: BrowserContext) -> None:
         # 创建一个新的页面
         page = await context.new_page()
-        # 访问指定的 URL
-        await page.goto("https://cp.kuaishou.com/article/publish/video")
-        kuaishou_logger.info('正在上传-------{}.mp4'.format(self.title))
-        # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
-        kuaishou_logger.info('正在打开主页...')
-        await page.wait_for_url("https://cp.kuaishou.com/article/publish/video")
+        with stage_timer('kuaishou', 'page_load'):
+            # 访问指定的 URL
+            await page.goto("https://cp.kuaishou.com/article/publish/video")
+            kuaishou_logger.info('正在上传-------{}.mp4'.format(self.title))
+            # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
+            kuaishou_logger.info('正在打开主页...')
+            await page.wait_for_url("https://cp.kuaishou.com/article/publish/video")
         # 点击 "上传视频" 按钮
         upload_button = page.locator("button[class^='_upload-btn']")
         await upload_button.wait_for(state='visible')  # 确保按钮可见
@@ -119,6 +107,7 @@ class KSVideo(object):
         if await new_feature_button.count() > 0:
             await new_feature_button.click()
 
+        metadata = stage_timer('kuaishou', 'metadata_fill')
         kuaishou_logger.info("正在填充标题和话题...")
         await page.get_by_text("描述").locator("xpath=following-sibling::div").click()
         kuaishou_logger.info("clear existing title")
@@ -134,68 +123,53 @@ class KSVideo(object):
             kuaishou_logger.info("正在添加第%s个话题" % index)
             await page.keyboard.type(f"#{tag} ")
             await asyncio.sleep(2)
-
-        max_retries = 60  # 设置最大重试次数,最大等待时间为 2 分钟
-        retry_count = 0
-
-        while retry_count < max_retries:
-            try:
-                # 获取包含 '上传中' 文本的元素数量
-                number = await page.locator("text=上传中").count()
-
-                if number == 0:
-                    kuaishou_logger.success("视频上传完毕")
-                    break
-                else:
-                    if retry_count % 5 == 0:
-                        kuaishou_logger.info("正在上传视频中...")
-                    await asyncio.sleep(2)
-            except Exception as e:
-                kuaishou_logger.error(f"检查上传状态时发生错误: {e}")
-                await asyncio.sleep(2)  # 等待 2 秒后重试
-            retry_count += 1
-
-        if retry_count == max_retries:
-            kuaishou_logger.warning("超过最大重试次数，视频上传可能未完成。")
+        metadata.stop()
+
+        # 监听 '上传中' 元素消失，上传一结束立即继续，不再每 2 秒轮询
+        watcher = UploadWatcher(page, logger=kuaishou_logger)
+        kuaishou_logger.info("正在上传视频中...")
+        with stage_timer('kuaishou', 'file_transfer'):
+            uploaded = await watcher.wait_for_upload(done="text=上传中", done_state='detached')
+        if uploaded:
+            kuaishou_logger.success("视频上传完毕")
+        else:
+            kuaishou_logger.warning("等待上传超时，视频上传可能未完成。")
 
         # 定时任务
         if self.publish_date != 0:
             await self.set_schedule_time(page, self.publish_date)
 
         # 判断视频是否发布成功
-        while True:
+        async def click_publish():
+            publish_button = page.get_by_text("发布", exact=True)
+            if await publish_button.count() > 0:
+                await publish_button.click()
+            # 等待确认弹窗出现后立即点击
+            confirm_button = page.get_by_text("确认发布")
             try:
-                publish_button = page.get_by_text("发布", exact=True)
-                if await publish_button.count() > 0:
-                    await publish_button.click()
-
-                await asyncio.sleep(1)
-                confirm_button = page.get_by_text("确认发布")
-                if await confirm_button.count() > 0:
-                    await confirm_button.click()
-
-                # 等待页面跳转，确认发布成功
-                await page.wait_for_url(
-                    "https://cp.kuaishou.com/article/manage/video?status=2&from=publish",
-                    timeout=5000,
-                )
-                kuaishou_logger.success("视频发布成功")
-                break
-            except Exception as e:
-                kuaishou_logger.info(f"视频正在发布中... 错误: {e}")
-                await page.screenshot(full_page=True)
-                await asyncio.sleep(1)
+                await confirm_button.wait_for(timeout=3000)
+            except Exception:
+                return
+            await confirm_button.click()
+
+        # 等待页面跳转，确认发布成功
+        with stage_timer('kuaishou', 'publish_confirm'):
+            published = await watcher.wait_for_publish(
+                "https://cp.kuaishou.com/article/manage/video?status=2&from=publish", click=click_publish)
+        if not published:
+            raise TimeoutError("视频发布超时")
+        kuaishou_logger.success("视频发布成功")
 
         await context.storage_state(path=self.account_file)  # 保存cookie
         kuaishou_logger.info('cookie更新完毕！')
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
-        # 关闭浏览器上下文和浏览器实例
-        await context.close()
-        await browser.close()
 
     async def main(self):
-        async with async_playwright() as playwright:
-            await self.upload(playwright)
+        # 从浏览器池借用一个使用指定 cookie 文件的浏览器上下文，结束后自动归还
+        with stage_timer('kuaishou', 'browser_launch') as launch:
+            async with pooled_context(storage_state=f"{self.account_file}", headless=self.headless) as context:
+                launch.stop()
+                await self.upload(context)
 
     async def set_schedule_time(self, page, publish_date):
         kuaishou_logger.info("click schedule")
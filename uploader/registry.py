@@ -0,0 +1,242 @@
+"""
+平台注册表
+每个平台用一个 PlatformSpec 描述，提供统一的上传器接口：
+setup（校验/生成 cookie）、validate（发布前检查参数）、build / upload（构造上传器并发布）和 capabilities（平台限制）。
+后端发布、定时发布、账号校验和命令行都通过这里按平台标识分发，新增平台只需要在文件末尾注册。
+注册表只记录 "模块路径:属性名"，第一次用到某个平台时才导入对应模块，
+后端和命令行启动时不会因此引入 playwright、xhs 等重量级依赖，只上传一个平台时也只导入该平台的上传器
+"""
+
+import importlib
+import os
+import threading
+
+from utils.settings import MEDIA_LIMITS_STRICT
+
+
+def resolve(target):
+    """按 'package.module:attr' 导入并返回属性"""
+    module_name, _, attr = target.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# 主流平台都能直接发布的视频编码
+COMMON_VIDEO_CODECS = ('h264', 'hevc')
+
+
+class Capabilities(object):
+    """
+    平台限制，超出限制的标题和话题会被上传器截断；
+    视频时长、大小和编码限制按各平台公开规则估计，默认只提示，MEDIA_LIMITS_STRICT 开启时发布前直接失败
+    """
+
+    def __init__(self, max_title_length=None, max_tags=None, schedule=True, thumbnail=False, product_link=False,
+                 category=False, draft=False, max_duration=None, max_size_mb=None, video_codecs=None):
+        self.max_title_length = max_title_length  # None 表示不限制
+        self.max_tags = max_tags
+        self.max_duration = max_duration  # 视频最长秒数
+        self.max_size_mb = max_size_mb  # 视频最大 MB
+        self.video_codecs = tuple(video_codecs) if video_codecs else None  # 允许的视频编码
+        self.schedule = schedule  # 定时发布
+        self.thumbnail = thumbnail  # 自定义封面
+        self.product_link = product_link  # 商品链接
+        self.category = category  # 原创声明分类
+        self.draft = draft  # 保存为草稿
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class PlatformSpec(object):
+    """单个平台的描述，上传器类等属性在首次访问时解析并缓存"""
+
+    def __init__(self, id, name, uploader, setup, cookie_checker=None, login=None, options=(), capabilities=None):
+        """
+        :param options: 上传器构造函数在 account_file 之后依次接收的参数，
+                        每项为 (发布请求中的字段名, 默认值)
+        """
+        self.id = id
+        self.name = name
+        self.options = tuple(options)
+        self.capabilities = capabilities or Capabilities()
+        self._targets = {
+            'uploader': uploader,  # 上传器类，需提供 async main()
+            'setup': setup,  # async setup(account_file, handle=False)，校验 cookie，handle 为 True 时失效则重新登录
+            'cookie_checker': cookie_checker,  # async check(account_file) -> bool，后端校验账号用
+            'login': login,  # async login(user_name, status_queue)，后端扫码登录用
+        }
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        value = self._resolved.get(key)
+        if value is None:
+            target = self._targets[key]
+            if target is None:
+                raise NotImplementedError(f"平台 {self.name} 不支持 {key}")
+            with self._lock:
+                value = self._resolved.get(key)
+                if value is None:
+                    value = self._resolved[key] = resolve(target)
+        return value
+
+    def supports(self, key):
+        return self._targets.get(key) is not None
+
+    @property
+    def uploader(self):
+        return self._get('uploader')
+
+    @property
+    def setup(self):
+        return self._get('setup')
+
+    @property
+    def cookie_checker(self):
+        return self._get('cookie_checker')
+
+    @property
+    def login(self):
+        return self._get('login')
+
+    def check_media(self, media, size_mb=None):
+        """
+        按视频元数据（utils.media_info.probe 的结果）检查平台的时长、大小和编码限制
+        :return: 不符合的原因列表，元数据缺失的项不检查
+        """
+        errors = []
+        capabilities = self.capabilities
+        duration = media.get('duration')
+        if capabilities.max_duration and duration and duration > capabilities.max_duration:
+            errors.append(f"{self.name} 视频最长 {capabilities.max_duration // 60} 分钟，当前 {duration / 60:.1f} 分钟")
+        if capabilities.max_size_mb and size_mb and size_mb > capabilities.max_size_mb:
+            errors.append(f"{self.name} 视频最大 {capabilities.max_size_mb} MB，当前 {size_mb:.0f} MB")
+        codec = media.get('video_codec')
+        if capabilities.video_codecs and codec and codec not in capabilities.video_codecs:
+            errors.append(f"{self.name} 可能不支持 {codec} 编码的视频，建议转码为 {' / '.join(capabilities.video_codecs)}")
+        return errors
+
+    def check_media_or_raise(self, media, size_mb=None, strict=None):
+        """
+        检查视频限制：strict（默认取 MEDIA_LIMITS_STRICT）为 True 时不符合即抛出 ValueError，
+        否则返回提示列表
+        """
+        problems = self.check_media(media, size_mb)
+        if problems and (MEDIA_LIMITS_STRICT if strict is None else strict):
+            raise ValueError("；".join(problems))
+        return problems
+
+    def validate(self, file_path, account_file, title='', tags=(), media=None):
+        """
+        发布前检查参数，视频或 cookie 文件不存在时抛出 ValueError，
+        返回超出平台限制（会被截断或可能被平台拒绝）的提示列表
+        :param media: 视频元数据，None 表示未知，不检查视频限制
+        """
+        if not os.path.exists(file_path):
+            raise ValueError(f"视频文件不存在: {file_path}")
+        if not os.path.exists(account_file):
+            raise ValueError(f"cookie 文件不存在: {account_file}")
+        warnings = []
+        if media:
+            warnings.extend(self.check_media_or_raise(media, os.path.getsize(file_path) / (1024 * 1024)))
+        capabilities = self.capabilities
+        if capabilities.max_title_length and title and len(title) > capabilities.max_title_length:
+            warnings.append(f"{self.name} 标题最多 {capabilities.max_title_length} 个字，超出部分会被截断")
+        if capabilities.max_tags is not None and tags and len(tags) > capabilities.max_tags:
+            warnings.append(f"{self.name} 最多添加 {capabilities.max_tags} 个话题，多余的会被忽略")
+        return warnings
+
+    def build(self, title, file_path, tags, publish_date, account_file, options=None):
+        """构造上传器实例，options 为发布请求（或同名字段的字典），只取本平台支持的字段"""
+        options = options or {}
+        args = [options.get(key, default) for key, default in self.options]
+        return self.uploader(title, str(file_path), tags, publish_date, account_file, *args)
+
+    async def upload(self, title, file_path, tags, publish_date, account_file, options=None):
+        """构造上传器并立即执行发布"""
+        return await self.build(title, file_path, tags, publish_date, account_file, options).main()
+
+
+class PlatformRegistry(object):
+    """平台注册表，可按平台标识（int 或数字字符串）或平台名查找"""
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}
+
+    def register(self, spec):
+        self._by_id[spec.id] = spec
+        self._by_name[spec.name] = spec
+        return spec
+
+    def get(self, key):
+        """找不到时返回 None"""
+        if isinstance(key, str) and key.isdigit():
+            key = int(key)
+        if isinstance(key, int):
+            return self._by_id.get(key)
+        return self._by_name.get(key)
+
+    def names(self):
+        return list(self._by_name)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+
+# 全局平台注册表，平台标识与 user_info.type / 前端保持一致
+platforms = PlatformRegistry()
+platforms.register(PlatformSpec(
+    1, 'xiaohongshu',
+    uploader='uploader.xiaohongshu_uploader.main:XiaoHongShuVideo',
+    setup='uploader.xiaohongshu_uploader.main:xiaohongshu_setup',
+    cookie_checker='myUtils.auth:cookie_auth_xhs',
+    login='myUtils.login:xiaohongshu_cookie_gen',
+    capabilities=Capabilities(max_title_length=30, max_duration=60 * 60, max_size_mb=20 * 1024,
+                              video_codecs=COMMON_VIDEO_CODECS),
+))
+platforms.register(PlatformSpec(
+    2, 'tencent',
+    uploader='uploader.tencent_uploader.main:TencentVideo',
+    setup='uploader.tencent_uploader.main:weixin_setup',
+    cookie_checker='myUtils.auth:cookie_auth_tencent',
+    login='myUtils.login:get_tencent_cookie',
+    options=(('category', None), ('isDraft', False)),
+    capabilities=Capabilities(category=True, draft=True, max_duration=8 * 60 * 60, max_size_mb=20 * 1024,
+                              video_codecs=COMMON_VIDEO_CODECS),
+))
+platforms.register(PlatformSpec(
+    3, 'douyin',
+    uploader='uploader.douyin_uploader.main:DouYinVideo',
+    setup='uploader.douyin_uploader.main:douyin_setup',
+    cookie_checker='myUtils.auth:cookie_auth_douyin',
+    login='myUtils.login:douyin_cookie_gen',
+    options=(('thumbnail', None), ('productLink', ''), ('productTitle', '')),
+    capabilities=Capabilities(max_title_length=30, thumbnail=True, product_link=True, max_duration=60 * 60,
+                              max_size_mb=16 * 1024, video_codecs=COMMON_VIDEO_CODECS),
+))
+platforms.register(PlatformSpec(
+    4, 'kuaishou',
+    uploader='uploader.ks_uploader.main:KSVideo',
+    setup='uploader.ks_uploader.main:ks_setup',
+    cookie_checker='myUtils.auth:cookie_auth_ks',
+    login='myUtils.login:get_ks_cookie',
+    capabilities=Capabilities(max_tags=3, max_duration=60 * 60, max_size_mb=4 * 1024,
+                              video_codecs=COMMON_VIDEO_CODECS),
+))
+platforms.register(PlatformSpec(
+    5, 'tiktok',
+    uploader='uploader.tk_uploader.main_chrome:TiktokVideo',
+    setup='uploader.tk_uploader.main_chrome:tiktok_setup',
+    options=(('thumbnail', None),),
+    capabilities=Capabilities(thumbnail=True, max_duration=60 * 60, max_size_mb=10 * 1024,
+                              video_codecs=COMMON_VIDEO_CODECS),
+))
+
+
+def get_platform(key):
+    """按平台标识或平台名获取 PlatformSpec，不存在时抛出 ValueError"""
+    spec = platforms.get(key)
+    if spec is None:
+        raise ValueError(f"不支持的平台: {key}")
+    return spec
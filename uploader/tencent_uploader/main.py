@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
 
-from playwright.async_api import Playwright, async_playwright
+from playwright.async_api import BrowserContext, async_playwright
 import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH, LOCAL_CHROME_HEADLESS
 from utils.base_social_media import set_init_script
+from utils.browser_pool import pooled_context
 from utils.files_times import get_absolute_path
 from utils.log import tencent_logger
+from utils.metrics import stage_timer
+from utils.upload_watcher import UploadWatcher
 
 
 def format_str_for_short_title(origin_title: str) -> str:
@@ -32,10 +35,7 @@ def format_str_for_short_title(origin_title: str) -> str:
 
 
 async def cookie_auth(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=LOCAL_CHROME_HEADLESS)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -135,46 +135,42 @@ class TencentVideo(object):
         file_input = page.locator('input[type="file"]')
         await file_input.set_input_files(self.file_path)
 
-    async def upload(self, playwright: Playwright) -> None:
-        # 使用 Chromium (这里使用系统内浏览器，用chromium 会造成h264错误
-        browser = await playwright.chromium.launch(headless=self.headless, executable_path=self.local_executable_path)
-        # 创建一个浏览器上下文，使用指定的 cookie 文件
-        context = await browser.new_context(storage_state=f"{self.account_file}")
-        context = await set_init_script(context)
-
+    async def upload(self, context: BrowserContext) -> None:
         # 创建一个新的页面
         page = await context.new_page()
-        # 访问指定的 URL
-        await page.goto("https://channels.weixin.qq.com/platform/post/create")
-        tencent_logger.info(f'[+]正在上传-------{self.title}.mp4')
-        # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
-        await page.wait_for_url("https://channels.weixin.qq.com/platform/post/create")
+        with stage_timer('tencent', 'page_load'):
+            # 访问指定的 URL
+            await page.goto("https://channels.weixin.qq.com/platform/post/create")
+            tencent_logger.info(f'[+]正在上传-------{self.title}.mp4')
+            # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
+            await page.wait_for_url("https://channels.weixin.qq.com/platform/post/create")
         # await page.wait_for_selector('input[type="file"]', timeout=10000)
         file_input = page.locator('input[type="file"]')
         await file_input.set_input_files(self.file_path)
-        # 填充标题和话题
-        await self.add_title_tags(page)
-        # 添加商品
-        # await self.add_product(page)
-        # 合集功能
-        await self.add_collection(page)
-        # 原创选择
-        await self.add_original(page)
+        with stage_timer('tencent', 'metadata_fill'):
+            # 填充标题和话题
+            await self.add_title_tags(page)
+            # 添加商品
+            # await self.add_product(page)
+            # 合集功能
+            await self.add_collection(page)
+            # 原创选择
+            await self.add_original(page)
         # 检测上传状态
-        await self.detect_upload_status(page)
+        watcher = UploadWatcher(page, logger=tencent_logger)
+        with stage_timer('tencent', 'file_transfer'):
+            await self.detect_upload_status(page, watcher)
         if self.publish_date != 0:
             await self.set_schedule_time_tencent(page, self.publish_date)
         # 添加短标题
         await self.add_short_title(page)
 
-        await self.click_publish(page)
+        with stage_timer('tencent', 'publish_confirm'):
+            await self.click_publish(page, watcher)
 
         await context.storage_state(path=f"{self.account_file}")  # 保存cookie
         tencent_logger.success('  [-]cookie更新完毕！')
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
-        # 关闭浏览器上下文和浏览器实例
-        await context.close()
-        await browser.close()
 
     async def add_short_title(self, page):
         short_title_element = page.get_by_text("短标题", exact=True).locator("..").locator(
@@ -184,61 +180,34 @@ class TencentVideo(object):
             short_title = format_str_for_short_title(self.title)
             await short_title_element.fill(short_title)
 
-    async def click_publish(self, page):
-        while True:
-            try:
-                if self.is_draft:
-                    # 点击"保存草稿"按钮
-                    draft_button = page.locator('div.form-btns button:has-text("保存草稿")')
-                    if await draft_button.count():
-                        await draft_button.click()
-                    # 等待跳转到草稿箱页面或确认保存成功
-                    await page.wait_for_url("**/post/list**", timeout=5000)  # 使用通配符匹配包含post/list的URL
-                    tencent_logger.success("  [-]视频草稿保存成功")
-                else:
-                    # 点击"发表"按钮
-                    publish_button = page.locator('div.form-btns button:has-text("发表")')
-                    if await publish_button.count():
-                        await publish_button.click()
-                    await page.wait_for_url("https://channels.weixin.qq.com/platform/post/list", timeout=5000)
-                    tencent_logger.success("  [-]视频发布成功")
-                break
-            except Exception as e:
-                current_url = page.url
-                if self.is_draft:
-                    # 检查是否在草稿相关的页面
-                    if "post/list" in current_url or "draft" in current_url:
-                        tencent_logger.success("  [-]视频草稿保存成功")
-                        break
-                else:
-                    # 检查是否在发布列表页面
-                    if "https://channels.weixin.qq.com/platform/post/list" in current_url:
-                        tencent_logger.success("  [-]视频发布成功")
-                        break
-                tencent_logger.exception(f"  [-] Exception: {e}")
-                tencent_logger.info("  [-] 视频正在发布中...")
-                await asyncio.sleep(0.5)
-
-    async def detect_upload_status(self, page):
-        while True:
-            # 匹配删除按钮，代表视频上传完毕，如果不存在，代表视频正在上传，则等待
-            try:
-                # 匹配删除按钮，代表视频上传完毕
-                if "weui-desktop-btn_disabled" not in await page.get_by_role("button", name="发表").get_attribute(
-                        'class'):
-                    tencent_logger.info("  [-]视频上传完毕")
-                    break
-                else:
-                    tencent_logger.info("  [-] 正在上传视频中...")
-                    await asyncio.sleep(2)
-                    # 出错了视频出错
-                    if await page.locator('div.status-msg.error').count() and await page.locator(
-                            'div.media-status-content div.tag-inner:has-text("删除")').count():
-                        tencent_logger.error("  [-] 发现上传出错了...准备重试")
-                        await self.handle_upload_error(page)
-            except:
-                tencent_logger.info("  [-] 正在上传视频中...")
-                await asyncio.sleep(2)
+    async def click_publish(self, page, watcher):
+        if self.is_draft:
+            # 点击"保存草稿"按钮，跳转到草稿箱页面即保存成功
+            button = page.locator('div.form-btns button:has-text("保存草稿")')
+            done_url = lambda url: "post/list" in url or "draft" in url
+        else:
+            # 点击"发表"按钮，跳转到发布列表页面即发布成功
+            button = page.locator('div.form-btns button:has-text("发表")')
+            done_url = lambda url: "https://channels.weixin.qq.com/platform/post/list" in url
+
+        async def click():
+            if await button.count():
+                await button.click()
+
+        if not await watcher.wait_for_publish(done_url, click=click):
+            raise TimeoutError("视频发布超时")
+        tencent_logger.success("  [-]视频草稿保存成功" if self.is_draft else "  [-]视频发布成功")
+
+    async def detect_upload_status(self, page, watcher):
+        # "发表"按钮变为可用代表视频上传完毕；同时出现错误提示和"删除"按钮时删除后重新上传
+        tencent_logger.info("  [-] 正在上传视频中...")
+        if not await watcher.wait_for_upload(
+                done='div.form-btns button:has-text("发表"):not(.weui-desktop-btn_disabled)',
+                failed='body:has(div.status-msg.error)'
+                       ':has(div.media-status-content div.tag-inner:has-text("删除"))',
+                on_failure=lambda: self.handle_upload_error(page)):
+            raise TimeoutError("视频上传超时")
+        tencent_logger.info("  [-]视频上传完毕")
 
     async def add_title_tags(self, page):
         await page.locator("div.input-editor").click()
@@ -281,5 +250,9 @@ class TencentVideo(object):
                 await page.locator('button:has-text("声明原创"):visible').click()
 
     async def main(self):
-        async with async_playwright() as playwright:
-            await self.upload(playwright)
+        # 从浏览器池借用一个使用指定 cookie 文件的浏览器上下文，结束后自动归还
+        # 浏览器池使用 LOCAL_CHROME_PATH 指定的系统浏览器，用 chromium 会造成h264错误
+        with stage_timer('tencent', 'browser_launch') as launch:
+            async with pooled_context(storage_state=f"{self.account_file}", headless=self.headless) as context:
+                launch.stop()
+                await self.upload(context)
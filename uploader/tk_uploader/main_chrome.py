@@ -8,7 +8,7 @@ import asyncio
 
 from conf import LOCAL_CHROME_PATH, LOCAL_CHROME_HEADLESS
 from uploader.tk_uploader.tk_config import Tk_Locator
-from utils.base_social_media import set_init_script
+from utils.base_social_media import set_init_script, apply_url_overrides
 from utils.files_times import get_absolute_path
 from utils.log import tiktok_logger
 
@@ -150,6 +150,7 @@ class TiktokVideo(object):
         browser = await playwright.chromium.launch(headless=self.headless, executable_path=self.local_executable_path)
         context = await browser.new_context(storage_state=f"{self.account_file}")
         # context = await set_init_script(context)
+        await apply_url_overrides(context)
         page = await context.new_page()
 
         # change language to eng first
@@ -0,0 +1,35 @@
+"""
+小红书签名 HTTP 服务
+提供 main.sign() 所需的 XHS_SERVER/sign 接口，内部使用常驻预热页面的签名服务
+启动方式：python -m uploader.xhs_uploader.sign_server
+"""
+
+from urllib.parse import urlparse
+
+from flask import Flask, request, jsonify
+
+from conf import XHS_SERVER
+from uploader.xhs_uploader.sign_service import sign_service
+
+app = Flask(__name__)
+
+
+@app.route('/sign', methods=['POST'])
+def sign():
+    data = request.get_json() or {}
+    try:
+        return jsonify(sign_service.sign(data.get('uri'), data.get('data'), data.get('a1', ''),
+                                         data.get('web_session', '')))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """签名耗时与命中率统计"""
+    return jsonify(sign_service.stats())
+
+
+if __name__ == '__main__':
+    server = urlparse(XHS_SERVER)
+    app.run(host=server.hostname or '127.0.0.1', port=server.port or 11901, threaded=True)
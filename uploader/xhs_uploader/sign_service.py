@@ -0,0 +1,179 @@
+"""
+小红书签名服务
+常驻一个浏览器，按 a1 cookie 维护若干已加载 window._webmsxyw 的预热页面，
+签名只需在空闲页面上执行一次 evaluate，不再为每次签名启动浏览器
+"""
+
+import asyncio
+import pathlib
+import threading
+import time
+from collections import defaultdict
+
+from playwright.async_api import async_playwright
+
+from utils.settings import BASE_DIR, LOCAL_CHROME_HEADLESS, XHS_SIGN_PAGES_PER_A1
+from utils.async_loop import BackgroundLoop
+
+XHS_HOME_URL = "https://www.xiaohongshu.com"
+
+
+class XhsSignService(object):
+    """小红书签名服务，所有浏览器操作都在服务自己的后台事件循环中执行"""
+
+    def __init__(self, pages_per_a1=XHS_SIGN_PAGES_PER_A1, headless=LOCAL_CHROME_HEADLESS, max_retries=3):
+        self.pages_per_a1 = max(1, pages_per_a1)
+        self.headless = headless
+        self.max_retries = max_retries
+        self._loop = BackgroundLoop("xhs-sign")
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = None
+        self._idle_pages = defaultdict(list)  # a1 -> 空闲的预热页面
+        self._page_counts = defaultdict(int)  # a1 -> 已创建（含创建中）的页面数，读写都持有 _stats_lock
+        self._page_changed = defaultdict(asyncio.Condition)  # a1 -> 页面归还或丢弃时通知等待者
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'hits': 0,  # 直接使用预热页面的次数
+            'misses': 0,  # 需要新建页面的次数
+            'failures': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+        }
+
+    def sign(self, uri, data=None, a1="", web_session="", timeout=60):
+        """同步签名接口，返回 {"x-s": ..., "x-t": ...}"""
+        start = time.perf_counter()
+        try:
+            signs, hit = self._loop.run(self._sign(uri, data, a1), timeout)
+        except Exception:
+            self._record(time.perf_counter() - start, hit=None)
+            raise
+        self._record(time.perf_counter() - start, hit=hit)
+        return signs
+
+    def _record(self, latency, hit):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            if hit is None:
+                self._stats['failures'] += 1
+            elif hit:
+                self._stats['hits'] += 1
+            else:
+                self._stats['misses'] += 1
+            self._stats['total_latency'] += latency
+            self._stats['max_latency'] = max(self._stats['max_latency'], latency)
+
+    def stats(self):
+        """签名耗时和预热页面命中率统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            warm_pages = dict(self._page_counts)
+        served = stats['hits'] + stats['misses']
+        return {
+            'requests': stats['requests'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'failures': stats['failures'],
+            'hit_rate': round(stats['hits'] / served, 4) if served else 0,
+            'avg_latency_ms': round(stats['total_latency'] * 1000 / stats['requests'], 2) if stats['requests'] else 0,
+            'max_latency_ms': round(stats['max_latency'] * 1000, 2),
+            'warm_pages': warm_pages,
+        }
+
+    async def _sign(self, uri, data, a1):
+        last_error = None
+        for _ in range(self.max_retries):
+            page, hit = await self._acquire(a1)
+            try:
+                encrypt_params = await page.evaluate("([url, data]) => window._webmsxyw(url, data)", [uri, data])
+            except asyncio.CancelledError:
+                # 调用方等待超时后取消了签名，页面上可能还有未完成的 evaluate，丢弃而不是归还
+                await self._discard(a1, page)
+                raise
+            except Exception as e:
+                # 页面失效（跳转、脚本未加载等），丢弃后换一个页面重试
+                last_error = e
+                await self._discard(a1, page)
+                continue
+            await self._release(a1, page)
+            return {
+                "x-s": encrypt_params["X-s"],
+                "x-t": str(encrypt_params["X-t"])
+            }, hit
+        raise Exception(f"重试了这么多次还是无法签名成功，寄寄寄: {last_error}")
+
+    async def _acquire(self, a1):
+        changed = self._page_changed[a1]
+        async with changed:
+            # 每次被唤醒都重新检查：可能有页面归还，也可能有页面被丢弃而空出名额
+            while True:
+                idle = self._idle_pages[a1]
+                if idle:
+                    return idle.pop(), True
+                with self._stats_lock:
+                    if self._page_counts[a1] < self.pages_per_a1:
+                        self._page_counts[a1] += 1
+                        break
+                await changed.wait()
+        try:
+            return await self._new_page(a1), False
+        except BaseException:
+            await self._free_slot(a1)
+            raise
+
+    async def _release(self, a1, page):
+        """归还页面"""
+        changed = self._page_changed[a1]
+        async with changed:
+            self._idle_pages[a1].append(page)
+            # 等待者被取消时通知可能落空，唤醒全部等待者各自重新检查
+            changed.notify_all()
+
+    async def _free_slot(self, a1):
+        changed = self._page_changed[a1]
+        async with changed:
+            with self._stats_lock:
+                self._page_counts[a1] -= 1
+            changed.notify_all()
+
+    async def _discard(self, a1, page):
+        await self._free_slot(a1)
+        try:
+            await page.context.close()
+        except Exception:
+            pass
+
+    async def _ensure_browser(self):
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                # 如果一直失败可尝试设置成 False 让其打开浏览器查看状态
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            return self._browser
+
+    async def _new_page(self, a1):
+        browser = await self._ensure_browser()
+        browser_context = await browser.new_context()
+        await browser_context.add_init_script(path=pathlib.Path(BASE_DIR / "utils/stealth.min.js"))
+        context_page = await browser_context.new_page()
+        try:
+            await context_page.goto(XHS_HOME_URL)
+            await browser_context.add_cookies([
+                {'name': 'a1', 'value': a1, 'domain': ".xiaohongshu.com", 'path': "/"}]
+            )
+            await context_page.reload()
+            # 设置 cookie 后等待签名函数就绪，替代原先固定的 sleep(2)
+            await context_page.wait_for_function("() => typeof window._webmsxyw === 'function'", timeout=15000)
+        except Exception:
+            await browser_context.close()
+            raise
+        return context_page
+
+
+# 进程内共享的签名服务实例
+sign_service = XhsSignService()
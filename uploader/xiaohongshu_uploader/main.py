@@ -1,20 +1,20 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
 
-from playwright.async_api import Playwright, async_playwright, Page
+from playwright.async_api import BrowserContext, async_playwright, Page
 import os
 import asyncio
 
 from conf import LOCAL_CHROME_PATH, LOCAL_CHROME_HEADLESS
 from utils.base_social_media import set_init_script
+from utils.browser_pool import pooled_context
 from utils.log import xiaohongshu_logger
+from utils.metrics import stage_timer
+from utils.upload_watcher import UploadWatcher
 
 
 async def cookie_auth(account_file):
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=LOCAL_CHROME_HEADLESS)
-        context = await browser.new_context(storage_state=account_file)
-        context = await set_init_script(context)
+    async with pooled_context(storage_state=account_file) as context:
         # 创建一个新的页面
         page = await context.new_page()
         # 访问指定的 URL
@@ -23,8 +23,6 @@ async def cookie_auth(account_file):
             await page.wait_for_url("https://creator.xiaohongshu.com/creator-micro/content/upload", timeout=5000)
         except:
             print("[+] 等待5秒 cookie 失效")
-            await context.close()
-            await browser.close()
             return False
         # 2024.06.17 抖音创作者中心改版
         if await page.get_by_text('手机号登录').count() or await page.get_by_text('扫码登录').count():
@@ -106,62 +104,32 @@ class XiaoHongShuVideo(object):
         xiaohongshu_logger.info('视频出错了，重新上传中')
         await page.locator('div.progress-div [class^="upload-btn-input"]').set_input_files(self.file_path)
 
-    async def upload(self, playwright: Playwright) -> None:
-        # 使用 Chromium 浏览器启动一个浏览器实例
-        if self.local_executable_path:
-            browser = await playwright.chromium.launch(headless=self.headless, executable_path=self.local_executable_path)
-        else:
-            browser = await playwright.chromium.launch(headless=self.headless)
-        # 创建一个浏览器上下文，使用指定的 cookie 文件
-        context = await browser.new_context(
-            viewport={"width": 1600, "height": 900},
-            storage_state=f"{self.account_file}"
-        )
-        context = await set_init_script(context)
-
+    async def upload(self, context: BrowserContext) -> None:
         # 创建一个新的页面
         page = await context.new_page()
-        # 访问指定的 URL
-        await page.goto("https://creator.xiaohongshu.com/publish/publish?from=homepage&target=video")
-        xiaohongshu_logger.info(f'[+]正在上传-------{self.title}.mp4')
-        # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
-        xiaohongshu_logger.info(f'[-] 正在打开主页...')
-        await page.wait_for_url("https://creator.xiaohongshu.com/publish/publish?from=homepage&target=video")
+        with stage_timer('xiaohongshu', 'page_load'):
+            # 访问指定的 URL
+            await page.goto("https://creator.xiaohongshu.com/publish/publish?from=homepage&target=video")
+            xiaohongshu_logger.info(f'[+]正在上传-------{self.title}.mp4')
+            # 等待页面跳转到指定的 URL，没进入，则自动等待到超时
+            xiaohongshu_logger.info(f'[-] 正在打开主页...')
+            await page.wait_for_url("https://creator.xiaohongshu.com/publish/publish?from=homepage&target=video")
         # 点击 "上传视频" 按钮
         await page.locator("div[class^='upload-content'] input[class='upload-input']").set_input_files(self.file_path)
 
-        # 等待页面跳转到指定的 URL 2025.01.08修改在原有基础上兼容两种页面
-        while True:
-            try:
-                # 等待upload-input元素出现
-                upload_input = await page.wait_for_selector('input.upload-input', timeout=3000)
-                # 获取下一个兄弟元素
-                preview_new = await upload_input.query_selector(
-                    'xpath=following-sibling::div[contains(@class, "preview-new")]')
-                if preview_new:
-                    # 在preview-new元素中查找包含"上传成功"的stage元素
-                    stage_elements = await preview_new.query_selector_all('div.stage')
-                    upload_success = False
-                    for stage in stage_elements:
-                        text_content = await page.evaluate('(element) => element.textContent', stage)
-                        if '上传成功' in text_content:
-                            upload_success = True
-                            break
-                    if upload_success:
-                        xiaohongshu_logger.info("[+] 检测到上传成功标识!")
-                        break  # 成功检测到上传成功后跳出循环
-                    else:
-                        print("  [-] 未找到上传成功标识，继续等待...")
-                else:
-                    print("  [-] 未找到预览元素，继续等待...")
-                    await asyncio.sleep(1)
-            except Exception as e:
-                print(f"  [-] 检测过程出错: {str(e)}，重新尝试...")
-                await asyncio.sleep(0.5)  # 等待0.5秒后重新尝试
+        # 等待预览区出现"上传成功"标识，出现即继续，不再轮询
+        watcher = UploadWatcher(page, logger=xiaohongshu_logger)
+        with stage_timer('xiaohongshu', 'file_transfer'):
+            uploaded = await watcher.wait_for_upload(
+                done='input.upload-input ~ div[class*="preview-new"] div.stage:has-text("上传成功")')
+        if not uploaded:
+            raise TimeoutError("视频上传超时")
+        xiaohongshu_logger.info("[+] 检测到上传成功标识!")
 
         # 填充标题和话题
         # 检查是否存在包含输入框的元素
         # 这里为了避免页面变化，故使用相对位置定位：作品标题父级右侧第一个元素的input子元素
+        metadata = stage_timer('xiaohongshu', 'metadata_fill')
         await asyncio.sleep(1)
         xiaohongshu_logger.info(f'  [-] 正在填充标题和话题...')
         title_container = page.locator('div.plugin.title-container').locator('input.d-text')
@@ -180,6 +148,7 @@ class XiaoHongShuVideo(object):
             await page.type(css_selector, "#" + tag)
             await page.press(css_selector, "Space")
         xiaohongshu_logger.info(f'总共添加{len(self.tags)}个话题')
+        metadata.stop()
 
         # while True:
         #     # 判断重新上传按钮是否存在，如果不存在，代表视频正在上传，则等待
@@ -218,30 +187,24 @@ class XiaoHongShuVideo(object):
             await self.set_schedule_time_xiaohongshu(page, self.publish_date)
 
         # 判断视频是否发布成功
-        while True:
-            try:
-                # 等待包含"定时发布"文本的button元素出现并点击
-                if self.publish_date != 0:
-                    await page.locator('button:has-text("定时发布")').click()
-                else:
-                    await page.locator('button:has-text("发布")').click()
-                await page.wait_for_url(
-                    "https://creator.xiaohongshu.com/publish/success?**",
-                    timeout=3000
-                )  # 如果自动跳转到作品页面，则代表发布成功
-                xiaohongshu_logger.success("  [-]视频发布成功")
-                break
-            except:
-                xiaohongshu_logger.info("  [-] 视频正在发布中...")
-                await page.screenshot(full_page=True)
-                await asyncio.sleep(0.5)
+        async def click_publish():
+            # 定时发布时按钮文本为"定时发布"
+            if self.publish_date != 0:
+                await page.locator('button:has-text("定时发布")').click()
+            else:
+                await page.locator('button:has-text("发布")').click()
+
+        # 如果自动跳转到作品页面，则代表发布成功
+        with stage_timer('xiaohongshu', 'publish_confirm'):
+            published = await watcher.wait_for_publish("https://creator.xiaohongshu.com/publish/success?**",
+                                                       click=click_publish)
+        if not published:
+            raise TimeoutError("视频发布超时")
+        xiaohongshu_logger.success("  [-]视频发布成功")
 
         await context.storage_state(path=self.account_file)  # 保存cookie
         xiaohongshu_logger.success('  [-]cookie更新完毕！')
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
-        # 关闭浏览器上下文和浏览器实例
-        await context.close()
-        await browser.close()
     
     async def set_thumbnail(self, page: Page, thumbnail_path: str):
         if thumbnail_path:
@@ -362,7 +325,14 @@ class XiaoHongShuVideo(object):
             return False
 
     async def main(self):
-        async with async_playwright() as playwright:
-            await self.upload(playwright)
+        # 从浏览器池借用一个使用指定 cookie 文件的浏览器上下文，结束后自动归还
+        with stage_timer('xiaohongshu', 'browser_launch') as launch:
+            async with pooled_context(
+                    storage_state=f"{self.account_file}",
+                    headless=self.headless,
+                    viewport={"width": 1600, "height": 900},
+            ) as context:
+                launch.stop()
+                await self.upload(context)
 
 
@@ -0,0 +1,68 @@
+"""
+后台事件循环模块
+在一个守护线程中常驻运行 asyncio 事件循环，供同步代码（Flask 路由等）提交协程，
+避免每个请求都新建线程和事件循环。
+生产模式下由 ASGI 服务器的事件循环接管（attach），登录、发布与接口共用同一个事件循环
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+
+class BackgroundLoop(object):
+    """常驻后台线程中的事件循环，首次提交协程时启动"""
+
+    def __init__(self, name="sau-event-loop"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def attach(self, loop):
+        """改用外部已在运行的事件循环（须在首次提交协程之前调用），返回是否成功"""
+        with self._lock:
+            if self._loop is not None and self._loop is not loop:
+                return False
+            self._loop = loop
+            return True
+
+    def in_loop_thread(self):
+        """当前线程是否就是事件循环所在线程，此时不能调用 run() 阻塞等待"""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, coro):
+        """提交协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """提交协程并阻塞等待结果，不能在事件循环线程中调用；等待超时时取消协程"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在事件循环线程中阻塞等待协程")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+# 全局共享的后台事件循环
+background_loop = BackgroundLoop()
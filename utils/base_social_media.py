@@ -1,7 +1,8 @@
+import re
 from pathlib import Path
 from typing import List
 
-from conf import BASE_DIR
+from utils.settings import BASE_DIR, PLATFORM_BASE_URL_OVERRIDES
 
 SOCIAL_MEDIA_DOUYIN = "douyin"
 SOCIAL_MEDIA_TENCENT = "tencent"
@@ -21,4 +22,22 @@ def get_cli_action() -> List[str]:
 async def set_init_script(context):
     stealth_js_path = Path(BASE_DIR / "utils/stealth.min.js")
     await context.add_init_script(path=stealth_js_path)
+    await apply_url_overrides(context)
+    return context
+
+
+async def apply_url_overrides(context, overrides=None):
+    """
+    把发往平台域名的请求转发到 PLATFORM_BASE_URL_OVERRIDES 中配置的地址（例如本地模拟服务器），
+    页面地址仍是原平台地址，上传器中的 URL 判断无需修改
+    """
+    overrides = PLATFORM_BASE_URL_OVERRIDES if overrides is None else overrides
+    for origin, base_url in overrides.items():
+        origin = origin.rstrip('/')
+
+        async def forward(route, origin=origin, base_url=base_url.rstrip('/')):
+            response = await route.fetch(url=base_url + route.request.url[len(origin):])
+            await route.fulfill(response=response)
+
+        await context.route(re.compile('^' + re.escape(origin) + '(/|$)'), forward)
     return context
@@ -0,0 +1,221 @@
+"""
+浏览器池模块
+进程内维护固定数量的常驻 Chromium 浏览器，按需分发携带账号 storage_state 的 BrowserContext，用完归还，
+避免每个 文件 × 账号 组合都重新启动一次浏览器
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from utils.settings import LOCAL_CHROME_PATH, LOCAL_CHROME_HEADLESS, BROWSER_POOL_SIZE, BROWSER_POOL_MAX_CONTEXTS, \
+    BROWSER_POOL_RECYCLE_AFTER
+from utils.base_social_media import set_init_script
+from utils.metrics import browser_launch_seconds
+
+
+class PooledBrowser(object):
+    """池中的单个浏览器及其使用计数"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.active_contexts = 0  # 当前借出的上下文数量
+        self.total_uses = 0  # 累计借出次数
+        self.retiring = False  # 达到回收次数后不再分配，等上下文全部归还后关闭
+
+
+class BrowserPool(object):
+    """浏览器池，Playwright 对象绑定事件循环，因此每个事件循环各自持有一个池"""
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_contexts=BROWSER_POOL_MAX_CONTEXTS,
+                 recycle_after=BROWSER_POOL_RECYCLE_AFTER, headless=LOCAL_CHROME_HEADLESS,
+                 executable_path=LOCAL_CHROME_PATH, launch_args=None):
+        self.size = max(1, size)
+        self.max_contexts = max(1, max_contexts)
+        self.recycle_after = recycle_after
+        self.headless = headless
+        self.executable_path = executable_path or None
+        self.launch_args = launch_args
+        self.ref_count = 0  # use_browser_pool 的嵌套使用计数
+        self._playwright = None
+        self._browsers = []
+        self._launching = 0
+        self._owners = {}  # context -> PooledBrowser
+        self._condition = asyncio.Condition()
+        self._closed = False
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        options = {'headless': self.headless}
+        if self.executable_path:
+            options['executable_path'] = self.executable_path
+        if self.launch_args:
+            options['args'] = self.launch_args
+        with browser_launch_seconds.time():
+            browser = await self._playwright.chromium.launch(**options)
+        return PooledBrowser(browser)
+
+    def _pick(self):
+        """选出负载最低且仍可分配的浏览器，顺便剔除已断开的浏览器"""
+        self._browsers = [slot for slot in self._browsers if slot.browser.is_connected()]
+        candidates = [slot for slot in self._browsers
+                      if not slot.retiring and slot.active_contexts < self.max_contexts]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda slot: slot.active_contexts)
+
+    def _checkout(self, slot):
+        slot.active_contexts += 1
+        slot.total_uses += 1
+        if self.recycle_after and slot.total_uses >= self.recycle_after:
+            slot.retiring = True
+        return slot
+
+    async def _reserve(self):
+        async with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("浏览器池已关闭")
+                slot = self._pick()
+                if slot is not None:
+                    return self._checkout(slot)
+                if len(self._browsers) + self._launching < self.size:
+                    self._launching += 1
+                    break
+                await self._condition.wait()
+
+        # 启动浏览器较慢，放在锁外进行
+        try:
+            slot = await self._launch()
+        except Exception:
+            async with self._condition:
+                self._launching -= 1
+                self._condition.notify_all()
+            raise
+        async with self._condition:
+            self._launching -= 1
+            self._condition.notify_all()
+            if not self._closed:
+                self._browsers.append(slot)
+                return self._checkout(slot)
+            # 最后一个启动中的浏览器负责停止 close() 之后才创建的 playwright
+            playwright = None
+            if self._launching == 0:
+                playwright, self._playwright = self._playwright, None
+        # 启动期间浏览器池已被关闭，close() 不会再处理这个浏览器，需要在这里关闭
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+        if playwright is not None:
+            await playwright.stop()
+        raise RuntimeError("浏览器池已关闭")
+
+    async def _give_back(self, slot):
+        async with self._condition:
+            slot.active_contexts -= 1
+            retire = slot.retiring and slot.active_contexts == 0
+            if retire and slot in self._browsers:
+                self._browsers.remove(slot)
+            self._condition.notify_all()
+        if retire:
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+
+    async def acquire(self, storage_state=None, **context_options):
+        """借出一个新的 BrowserContext"""
+        slot = await self._reserve()
+        try:
+            context = await slot.browser.new_context(storage_state=storage_state, **context_options)
+            context = await set_init_script(context)
+        except Exception:
+            await self._give_back(slot)
+            raise
+        self._owners[context] = slot
+        return context
+
+    async def release(self, context):
+        """归还 BrowserContext，上下文本身会被关闭"""
+        slot = self._owners.pop(context, None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+        if slot is not None:
+            await self._give_back(slot)
+
+    @asynccontextmanager
+    async def context(self, storage_state=None, **context_options):
+        context = await self.acquire(storage_state, **context_options)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    def stats(self):
+        return {
+            'browsers': len(self._browsers),
+            'contexts': sum(slot.active_contexts for slot in self._browsers),
+        }
+
+    async def close(self):
+        async with self._condition:
+            self._closed = True
+            browsers, self._browsers = self._browsers, []
+            self._condition.notify_all()
+        for slot in browsers:
+            try:
+                await slot.browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+# 每个 (事件循环, headless) 对应一个浏览器池
+_pools = {}
+
+
+def pool_stats():
+    """所有浏览器池合计的浏览器数和借出的上下文数"""
+    stats = {'browsers': 0, 'contexts': 0}
+    for pool in list(_pools.values()):
+        for key, value in pool.stats().items():
+            stats[key] += value
+    return stats
+
+
+@asynccontextmanager
+async def use_browser_pool(headless=None, **options):
+    """
+    获取当前事件循环的浏览器池，不存在则创建；最后一个使用者退出时关闭池。
+    options 仅在创建池时生效
+    """
+    if headless is None:
+        headless = LOCAL_CHROME_HEADLESS
+    key = (asyncio.get_running_loop(), headless)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = BrowserPool(headless=headless, **options)
+        _pools[key] = pool
+    pool.ref_count += 1
+    try:
+        yield pool
+    finally:
+        pool.ref_count -= 1
+        if pool.ref_count == 0:
+            _pools.pop(key, None)
+            await pool.close()
+
+
+@asynccontextmanager
+async def pooled_context(storage_state=None, headless=None, **context_options):
+    """从浏览器池借出一个上下文，退出时自动归还"""
+    async with use_browser_pool(headless) as pool:
+        async with pool.context(storage_state, **context_options) as context:
+            yield context
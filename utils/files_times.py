@@ -1,3 +1,4 @@
+import random
 from datetime import timedelta
 
 from datetime import datetime
@@ -5,6 +6,9 @@ from pathlib import Path
 
 from conf import BASE_DIR
 
+# Default times to publish videos if not provided
+DEFAULT_DAILY_TIMES = [6, 11, 14, 16, 22]
+
 
 def get_absolute_path(relative_path: str, base_dir: str = None) -> str:
     # Convert the relative path to an absolute path
@@ -57,27 +61,184 @@ def generate_schedule_time_next_day(total_videos, videos_per_day = 1, daily_time
 
     if daily_times is None:
         # Default times to publish videos if not provided
-        daily_times = [6, 11, 14, 16, 22]
+        daily_times = DEFAULT_DAILY_TIMES
 
     if videos_per_day > len(daily_times):
         raise ValueError("videos_per_day should not exceed the length of daily_times")
 
-    # Generate timestamps
-    schedule = []
-    current_time = datetime.now()
-
-    for video in range(total_videos):
-        day = video // videos_per_day + start_days + 1  # +1 to start from the next day
-        daily_video_index = video % videos_per_day
-
-        # Calculate the time for the current video
-        hour = daily_times[daily_video_index]
-        time_offset = timedelta(days=day, hours=hour - current_time.hour, minutes=-current_time.minute,
-                                seconds=-current_time.second, microseconds=-current_time.microsecond)
-        timestamp = current_time + time_offset
-
-        schedule.append(timestamp)
+    # Build each publishing day and each slot offset once, then combine them,
+    # instead of constructing a timedelta for every video.
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    total_days = -(-total_videos // videos_per_day)
+    days = [midnight + timedelta(days=day + start_days + 1) for day in range(total_days)]
+    hours = [timedelta(hours=hour) for hour in daily_times[:videos_per_day]]
+    schedule = [day + hour for day in days for hour in hours][:total_videos]
 
     if timestamps:
         schedule = [int(time.timestamp()) for time in schedule]
     return schedule
+
+
+def parse_daily_time(value):
+    """Convert an hour (10, 10.5, "10") or an "HH:MM" string to minutes after midnight."""
+    try:
+        if isinstance(value, str):
+            hour, _, minute = value.strip().partition(':')
+            minutes = int(hour) * 60 + int(minute or 0)
+        else:
+            minutes = int(round(float(value) * 60))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid daily time: {value!r}")
+    if not 0 <= minutes < 24 * 60:
+        raise ValueError(f"invalid daily time: {value!r}")
+    return minutes
+
+
+class SlotCalendar(object):
+    """
+    Publishing calendar of a single account.
+
+    Every day is split into len(daily_times) slots stored in one flat bytearray
+    (1 = booked), plus a per-day counter used to enforce the daily limit. Only
+    days that already hold bookings are searched slot by slot (bytearray.find);
+    the free days after them are filled with index arithmetic.
+    """
+
+    def __init__(self, first_day, daily_minutes, daily_limit):
+        """daily_minutes: slot times as minutes after midnight, in order of preference."""
+        self.first_day = first_day
+        self.per_day = len(daily_minutes)
+        self.daily_limit = max(1, min(daily_limit, self.per_day))
+        self._minute_index = {}
+        self._hour_index = {}
+        for index, minutes in enumerate(daily_minutes):
+            self._minute_index.setdefault(minutes, index)
+            self._hour_index.setdefault(minutes // 60, index)
+        self.slots = bytearray()
+        self.counts = []
+
+    def _grow(self, days):
+        if days > len(self.counts):
+            self.slots.extend(bytes((days - len(self.counts)) * self.per_day))
+            self.counts.extend([0] * (days - len(self.counts)))
+
+    def book(self, when):
+        """Mark an existing booking; it counts toward that day's limit even if it is not on a slot."""
+        day = (when.date() - self.first_day.date()).days
+        if day < 0:
+            return
+        self._grow(day + 1)
+        self.counts[day] += 1
+        # Jittered bookings land a few minutes after their slot; match by hour when not exact
+        index = self._minute_index.get(when.hour * 60 + when.minute, self._hour_index.get(when.hour))
+        if index is not None:
+            self.slots[day * self.per_day + index] = 1
+
+    def take(self, count):
+        """Book the earliest `count` free slots and return their slot indices in order."""
+        taken = []
+        per_day, limit = self.per_day, self.daily_limit
+        for day in range(len(self.counts)):
+            if len(taken) >= count:
+                return taken
+            room = min(limit - self.counts[day], count - len(taken))
+            position = day * per_day
+            end = position + per_day
+            while room > 0:
+                position = self.slots.find(0, position, end)
+                if position < 0:
+                    break
+                self.slots[position] = 1
+                taken.append(position)
+                self.counts[day] += 1
+                room -= 1
+                position += 1
+
+        # Days past the last booking are empty: the first `limit` slots of each day are free
+        remaining = count - len(taken)
+        if remaining > 0:
+            first = len(self.counts)
+            full_days, rest = divmod(remaining, limit)
+            taken.extend((first + k // limit) * per_day + k % limit for k in range(remaining))
+            pattern = b'\x01' * limit + b'\x00' * (per_day - limit)
+            self.slots.extend(pattern * full_days)
+            self.counts.extend([limit] * full_days)
+            if rest:
+                self.slots.extend(b'\x01' * rest + b'\x00' * (per_day - rest))
+                self.counts.append(rest)
+        return taken
+
+
+def plan_schedule(file_count, accounts, daily_times=None, videos_per_day=1, start_days=0, daily_limit=None,
+                  jitter_minutes=0, booked=None, timestamps=False, seed=None):
+    """
+    Assign conflict-free publishing times for many files across many accounts.
+
+    Every account publishes every file, one slot per file, skipping slots that
+    are already booked for that account and never exceeding the daily limit.
+
+    Args:
+    - file_count: Number of files each account has to publish.
+    - accounts: Account identifiers (e.g. cookie file names).
+    - daily_times: Times of the day that may be used as slots, as hours (10) or "HH:MM"
+      strings, in order of preference: when fewer slots than given are used per day,
+      the first ones are used. Each account's times are returned in chronological order.
+    - videos_per_day: Maximum number of videos per account per day.
+    - start_days: Start from after start_days (0 means tomorrow).
+    - daily_limit: Platform daily cap per account, applied on top of videos_per_day.
+    - jitter_minutes: Shift each account's times forward by one random offset of
+      0..jitter_minutes minutes (drawn once per account, so accounts sharing the same
+      slots still publish at different moments).
+    - booked: Optional {account: [datetime or timestamp]} of existing bookings.
+    - timestamps: Return timestamps instead of datetime objects.
+    - seed: Optional random seed for reproducible jitter.
+
+    Returns:
+    - {account: [time of file 0, time of file 1, ...]}
+    """
+    # Keep the caller's order (it decides which times are used), only drop duplicates
+    daily_minutes = list(dict.fromkeys(parse_daily_time(value) for value in (daily_times or DEFAULT_DAILY_TIMES)))
+    limit = min(videos_per_day or 1, daily_limit or len(daily_minutes), len(daily_minutes))
+    if limit <= 0:
+        raise ValueError("videos_per_day and daily_limit should be positive integers")
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=start_days + 1)
+    booked = booked or {}
+    rng = random.Random(seed)
+    jitter = max(0, int(jitter_minutes * 60))
+
+    # Slot index -> publishing time, shared by every account and extended on demand
+    hours = [timedelta(minutes=minutes) for minutes in daily_minutes]
+    table = []
+
+    def times_of(indices):
+        if indices and indices[-1] >= len(table):
+            day = len(table) // len(hours)
+            while len(table) <= indices[-1]:
+                start = first_day + timedelta(days=day)
+                table.extend(int((start + hour).timestamp()) if timestamps else start + hour for hour in hours)
+                day += 1
+        return [table[index] for index in indices]
+
+    def shift(times):
+        # One draw per account instead of one per time: planning cost stays dominated by the slot search
+        offset = rng.randrange(jitter)
+        if not timestamps:
+            offset = timedelta(seconds=offset)
+        return [when + offset for when in times]
+
+    # Accounts without bookings all get the same slots, computed once
+    shared = None
+    plan = {}
+    for account in accounts:
+        bookings = booked.get(account)
+        if bookings:
+            calendar = SlotCalendar(first_day, daily_minutes, limit)
+            for when in bookings:
+                calendar.book(datetime.fromtimestamp(when) if isinstance(when, (int, float)) else when)
+            times = sorted(times_of(sorted(calendar.take(file_count))))
+        else:
+            if shared is None:
+                shared = sorted(times_of(SlotCalendar(first_day, daily_minutes, limit).take(file_count)))
+            times = list(shared)
+        plan[account] = shift(times) if jitter else times
+    return plan
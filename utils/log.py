@@ -1,8 +1,19 @@
+import os
+import time
 from pathlib import Path
 from sys import stdout
 from loguru import logger
 
-from conf import BASE_DIR
+from utils.settings import BASE_DIR, LOG_MODE, LOG_DIAGNOSE, LOG_JSON
+
+# 环境变量优先于 conf 中的配置，例如 SAU_LOG_MODE=sync SAU_LOG_DIAGNOSE=1
+LOG_MODE = os.environ.get('SAU_LOG_MODE', LOG_MODE)
+LOG_DIAGNOSE = os.environ.get('SAU_LOG_DIAGNOSE', str(LOG_DIAGNOSE)).lower() in ('1', 'true', 'yes')
+LOG_JSON = os.environ.get('SAU_LOG_JSON', str(LOG_JSON)).lower() in ('1', 'true', 'yes')
+
+LOG_FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}\n"
+LOG_ROTATION = 10 * 1024 * 1024  # 单个日志文件达到该大小后轮转
+LOG_RETENTION = 10 * 24 * 60 * 60  # 轮转后的日志文件保留时长（秒）
 
 
 def log_formatter(record: dict) -> str:
@@ -23,6 +34,66 @@ def log_formatter(record: dict) -> str:
     return f"<fg #70acde>{{time:YYYY-MM-DD HH:mm:ss}}</fg #70acde> | <fg {color}>{{level}}</fg {color}>: <light-white>{{message}}</light-white>\n"
 
 
+class BusinessLogFile(object):
+    """单个业务模块的日志文件，按大小轮转并清理过期的轮转文件"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._size = 0
+
+    def write(self, message: str):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._size = self._file.tell()
+        data = message if message.endswith('\n') else message + '\n'
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data.encode('utf-8'))
+        if self._size >= LOG_ROTATION:
+            self.rotate()
+
+    def rotate(self):
+        self.close()
+        stamp = time.strftime('%Y-%m-%d_%H-%M-%S')
+        os.replace(self.path, self.path.with_name(f"{self.path.stem}.{stamp}_{time.time_ns() % 10 ** 6:06d}{self.path.suffix}"))
+        expire = time.time() - LOG_RETENTION
+        for rotated in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"):
+            try:
+                if rotated.stat().st_mtime < expire:
+                    rotated.unlink()
+            except OSError:
+                pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BusinessLogRouter(object):
+    """
+    所有业务日志共用的一个 sink，按 record["extra"]["business_name"] 分发到各自的日志文件，
+    代替每个业务一个带过滤函数的文件 sink（每条日志都要执行一遍全部过滤函数）
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def register(self, log_name: str, file_path: str):
+        self.files[log_name] = BusinessLogFile(Path(BASE_DIR / file_path))
+
+    def write(self, message):
+        log_file = self.files.get(message.record["extra"].get("business_name"))
+        if log_file is not None:
+            log_file.write(message)
+
+    def stop(self):
+        for log_file in self.files.values():
+            log_file.close()
+
+
 def create_logger(log_name: str, file_path: str):
     """
     Create custom logger for different business modules.
@@ -30,18 +101,21 @@ def create_logger(log_name: str, file_path: str):
     :param str file_path: Optional path to log file
     :returns: Configured logger
     """
-    def filter_record(record):
-        return record["extra"].get("business_name") == log_name
-
-    Path(BASE_DIR / file_path).parent.mkdir(exist_ok=True)
-    logger.add(Path(BASE_DIR / file_path), filter=filter_record, level="INFO", rotation="10 MB", retention="10 days", backtrace=True, diagnose=True)
+    business_router.register(log_name, file_path)
     return logger.bind(business_name=log_name)
 
 
 # Remove all existing handlers
 logger.remove()
+# async 模式下所有 sink 都由 loguru 的后台线程写入，调用方只负责入队；diagnose 会在异常中输出变量值，生产环境默认关闭
+LOG_ENQUEUE = LOG_MODE != 'sync'
 # Add a standard console handler
-logger.add(stdout, colorize=True, format=log_formatter)
+logger.add(stdout, colorize=True, format=log_formatter, enqueue=LOG_ENQUEUE,
+           backtrace=LOG_DIAGNOSE, diagnose=LOG_DIAGNOSE)
+
+business_router = BusinessLogRouter()
+logger.add(business_router, level="INFO", format=LOG_FILE_FORMAT, serialize=LOG_JSON, enqueue=LOG_ENQUEUE,
+           filter=lambda record: "business_name" in record["extra"], backtrace=LOG_DIAGNOSE, diagnose=LOG_DIAGNOSE)
 
 douyin_logger = create_logger('douyin', 'logs/douyin.log')
 tencent_logger = create_logger('tencent', 'logs/tencent.log')
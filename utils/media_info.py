@@ -0,0 +1,188 @@
+"""
+视频元数据读取
+MP4 / MOV / M4V 直接解析容器头部（moov 中的 mvhd / tkhd / stsd），只读取几 KB 到几 MB，不解码任何帧；
+其他容器在系统安装了 ffprobe 时交给 ffprobe。
+本模块不依赖 conf 和数据库，可以在子进程中执行
+"""
+
+import json
+import os
+import shutil
+import struct
+import subprocess
+
+# 可直接解析的容器
+ISO_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
+# moov 超过该大小时放弃解析（正常视频的 moov 只有几 KB 到几 MB）
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+# 采样描述中的编码标识 -> 编码名（与 ffprobe 的 codec_name 一致）
+CODEC_NAMES = {
+    b'avc1': 'h264', b'avc3': 'h264',
+    b'hvc1': 'hevc', b'hev1': 'hevc',
+    b'av01': 'av1', b'vp09': 'vp9', b'vp08': 'vp8',
+    b'mp4v': 'mpeg4', b'jpeg': 'mjpeg', b'mjpa': 'mjpeg',
+    b'apch': 'prores', b'apcn': 'prores', b'apcs': 'prores', b'apco': 'prores', b'ap4h': 'prores',
+    b'mp4a': 'aac', b'ac-3': 'ac3', b'ec-3': 'eac3', b'Opus': 'opus', b'fLaC': 'flac', b'.mp3': 'mp3',
+    b'lpcm': 'pcm', b'sowt': 'pcm', b'twos': 'pcm',
+}
+
+
+class MediaInfoError(Exception):
+    """无法读取视频元数据"""
+
+
+def _boxes(data, offset=0, end=None):
+    """遍历 data[offset:end] 中的 box，产出 (类型, 内容起始, 内容结束)"""
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            break
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _read_moov(f):
+    """按顶层 box 跳转找到 moov 并整体读出，mdat 等大块数据直接 seek 跳过"""
+    file_size = os.fstat(f.fileno()).st_size
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        size, kind = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1 and len(header) >= 16:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            break
+        if kind == b'moov':
+            if size > MAX_MOOV_SIZE:
+                raise MediaInfoError("moov 过大")
+            f.seek(offset + header_size)
+            return f.read(size - header_size)
+        offset += size
+    raise MediaInfoError("未找到 moov")
+
+
+def _find(data, start, end, path):
+    """按路径查找第一个子 box，例如 (b'mdia', b'hdlr')"""
+    for kind, body_start, body_end in _boxes(data, start, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return body_start, body_end
+            found = _find(data, body_start, body_end, path[1:])
+            if found:
+                return found
+    return None
+
+
+def _parse_track(data, start, end):
+    """返回 (handler 类型, 编码名, 宽, 高)"""
+    handler, codec, width, height = None, None, None, None
+    hdlr = _find(data, start, end, (b'mdia', b'hdlr'))
+    if hdlr:
+        handler = data[hdlr[0] + 8:hdlr[0] + 12]
+    stsd = _find(data, start, end, (b'mdia', b'minf', b'stbl', b'stsd'))
+    if stsd and stsd[1] - stsd[0] >= 16:
+        # version/flags(4) entry_count(4)，随后第一个采样描述 size(4) format(4)
+        fourcc = data[stsd[0] + 12:stsd[0] + 16]
+        codec = CODEC_NAMES.get(fourcc, fourcc.decode('latin-1').strip())
+        if handler == b'vide' and stsd[1] - stsd[0] >= 44:
+            # 视觉采样描述：reserved(6) data_reference_index(2) pre_defined/reserved(16) width(2) height(2)
+            width, height = struct.unpack_from('>HH', data, stsd[0] + 8 + 8 + 24)
+    tkhd = _find(data, start, end, (b'tkhd',))
+    if handler == b'vide' and tkhd and tkhd[1] > tkhd[0]:
+        version = data[tkhd[0]]
+        matrix_offset = tkhd[0] + (4 + 32 + 16 if version == 1 else 4 + 20 + 16)
+        if matrix_offset + 8 <= tkhd[1]:
+            a, b = struct.unpack_from('>ii', data, matrix_offset)
+            # 旋转 90 / 270 度的视频，显示尺寸需要交换宽高
+            if a == 0 and b != 0 and width and height:
+                width, height = height, width
+    return handler, codec, width, height
+
+
+def probe_iso(path):
+    """解析 MP4 / MOV 容器头部"""
+    with open(path, 'rb') as f:
+        moov = _read_moov(f)
+        file_size = os.fstat(f.fileno()).st_size
+    info = {'duration': None, 'width': None, 'height': None, 'video_codec': None, 'audio_codec': None,
+            'bitrate': None}
+    mvhd = _find(moov, 0, len(moov), (b'mvhd',))
+    # version 0：version/flags(4) 创建/修改时间(4+4) timescale(4) duration(4)；version 1 的时间和时长为 8 字节
+    if mvhd and mvhd[1] - mvhd[0] >= 20:
+        if moov[mvhd[0]] == 1:
+            if mvhd[1] - mvhd[0] < 32:
+                raise MediaInfoError("mvhd 不完整")
+            timescale, duration = struct.unpack_from('>IQ', moov, mvhd[0] + 4 + 16)
+        else:
+            timescale, duration = struct.unpack_from('>II', moov, mvhd[0] + 4 + 8)
+        if timescale:
+            info['duration'] = round(duration / timescale, 3)
+    for kind, start, end in _boxes(moov):
+        if kind != b'trak':
+            continue
+        handler, codec, width, height = _parse_track(moov, start, end)
+        if handler == b'vide' and info['video_codec'] is None:
+            info.update(video_codec=codec, width=width, height=height)
+        elif handler == b'soun' and info['audio_codec'] is None:
+            info['audio_codec'] = codec
+    if info['duration']:
+        info['bitrate'] = int(file_size * 8 / info['duration'])
+    return info
+
+
+def probe_ffprobe(path, timeout=30):
+    """用 ffprobe 读取元数据（只读容器和流信息，不解码）"""
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        raise MediaInfoError("未安装 ffprobe")
+    output = subprocess.run(
+        [ffprobe, '-v', 'error', '-show_entries', 'format=duration,bit_rate:stream=codec_type,codec_name,width,height',
+         '-of', 'json', str(path)],
+        capture_output=True, timeout=timeout, check=True).stdout
+    result = json.loads(output or b'{}')
+    fmt = result.get('format', {})
+    info = {'duration': None, 'width': None, 'height': None, 'video_codec': None, 'audio_codec': None,
+            'bitrate': None}
+    if fmt.get('duration'):
+        info['duration'] = round(float(fmt['duration']), 3)
+    if fmt.get('bit_rate'):
+        info['bitrate'] = int(fmt['bit_rate'])
+    for stream in result.get('streams', []):
+        if stream.get('codec_type') == 'video' and info['video_codec'] is None:
+            info.update(video_codec=stream.get('codec_name'), width=stream.get('width'), height=stream.get('height'))
+        elif stream.get('codec_type') == 'audio' and info['audio_codec'] is None:
+            info['audio_codec'] = stream.get('codec_name')
+    return info
+
+
+def probe(path):
+    """
+    读取视频元数据，返回 {duration(秒), width, height, video_codec, audio_codec, bitrate(bit/s)}；
+    无法读取时抛出 MediaInfoError
+    """
+    path = str(path)
+    if path.lower().endswith(ISO_EXTENSIONS):
+        try:
+            return probe_iso(path)
+        except (MediaInfoError, struct.error, IndexError):
+            pass  # 扩展名与实际容器不符、文件头部损坏等情况，交给 ffprobe
+    try:
+        return probe_ffprobe(path)
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        raise MediaInfoError(str(e))
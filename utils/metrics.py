@@ -0,0 +1,211 @@
+"""
+进程内指标模块
+提供计数器、直方图和采集时回调的仪表盘指标，由 /metrics 以 Prometheus 文本格式输出；
+记录一次指标只是加锁后累加几个数字，可以放在上传流程等热路径中
+"""
+
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# 默认的耗时分桶（秒），覆盖从毫秒级的数据库查询到数分钟的视频上传
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# 平台标识 -> 指标中使用的平台名
+PLATFORM_NAMES = {1: 'xiaohongshu', 2: 'tencent', 3: 'douyin', 4: 'kuaishou', 5: 'tiktok'}
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter(object):
+    """只增不减的计数器"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in items]
+
+
+class Histogram(object):
+    """按分桶统计的耗时分布"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 标签 -> [各分桶计数..., 总和, 总数]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        names = self.labels + ('le',)
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(names, key + ("+Inf",))} {state[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {state[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {state[-1]}')
+        return lines
+
+
+class Gauge(object):
+    """采集时才调用回调取值的仪表盘指标，回调返回数值或 {标签值元组: 数值}"""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labels = tuple(labels)
+
+    def collect(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"[ERROR] 采集指标 {self.name} 失败: {e}")
+            return []
+        if not isinstance(value, dict):
+            return [f'{self.name} {value}']
+        return [f'{self.name}{_format_labels(self.labels, key)} {item}' for key, item in value.items()]
+
+
+class MetricsRegistry(object):
+    """指标注册表，同名指标只注册一次"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, callback, labels=()):
+        return self._register(Gauge(name, documentation, callback, labels))
+
+    def render(self):
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+# 全局指标注册表
+registry = MetricsRegistry()
+
+upload_stage_seconds = registry.histogram(
+    'sau_upload_stage_seconds', '上传各阶段耗时（browser_launch / page_load / file_transfer / metadata_fill / publish_confirm）',
+    labels=('platform', 'stage'))
+upload_seconds = registry.histogram('sau_upload_seconds', '单个发布任务总耗时', labels=('platform',))
+uploads_total = registry.counter('sau_uploads_total', '发布任务数，result 为 success / failure / cancelled',
+                                 labels=('platform', 'result'))
+cookie_check_seconds = registry.histogram('sau_cookie_check_seconds', '账号 cookie 校验耗时', labels=('platform',))
+sqlite_seconds = registry.histogram('sau_sqlite_seconds', '一次数据库连接使用（查询及事务提交）的耗时',
+                                    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+browser_launch_seconds = registry.histogram('sau_browser_launch_seconds', '浏览器池启动一个浏览器的耗时')
+
+
+def _browser_pool_stat(key):
+    # 浏览器池模块会导入 playwright，尚未被导入时说明还没有启动过浏览器，不为采集指标而导入它
+    browser_pool = sys.modules.get('utils.browser_pool')
+    return browser_pool.pool_stats()[key] if browser_pool is not None else 0
+
+
+registry.gauge('sau_active_browsers', '浏览器池中常驻的浏览器数', lambda: _browser_pool_stat('browsers'))
+registry.gauge('sau_active_contexts', '浏览器池借出的上下文数', lambda: _browser_pool_stat('contexts'))
+
+
+def platform_name(platform):
+    return PLATFORM_NAMES.get(platform, str(platform))
+
+
+class StageTimer(object):
+    """
+    记录上传某个阶段的耗时，可作为 with 语句使用，也可以提前调用 stop() 结束计时，
+    例如浏览器上下文借出后立即结束 browser_launch 阶段
+    """
+
+    def __init__(self, platform, stage):
+        self.platform = platform_name(platform)
+        self.stage = stage
+        self.start = time.perf_counter()
+        self.elapsed = None
+
+    def stop(self):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.start
+            upload_stage_seconds.observe(self.elapsed, platform=self.platform, stage=self.stage)
+        return self.elapsed
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def stage_timer(platform, stage):
+    """用法：with stage_timer('douyin', 'page_load'): ..."""
+    return StageTimer(platform, stage)
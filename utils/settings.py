@@ -0,0 +1,32 @@
+"""
+配置读取模块
+以 conf.py 为准；升级后旧的 conf.py 中缺少的新配置项使用 conf.example.py 中的默认值，
+并在启动时列出缺少的配置项，不必为了升级立即修改 conf.py
+"""
+
+import runpy
+from pathlib import Path
+
+import conf
+
+EXAMPLE_PATH = Path(__file__).resolve().parent.parent / "conf.example.py"
+
+
+def _load():
+    """返回 (全部配置项, 使用默认值的配置项名称列表)"""
+    try:
+        defaults = {name: value for name, value in runpy.run_path(str(EXAMPLE_PATH)).items() if name.isupper()}
+    except FileNotFoundError:
+        defaults = {}
+    settings = dict(defaults)
+    settings.update({name: getattr(conf, name) for name in dir(conf) if name.isupper()})
+    missing = [name for name in defaults if not hasattr(conf, name)]
+    return settings, missing
+
+
+_settings, MISSING_SETTINGS = _load()
+globals().update(_settings)
+
+if MISSING_SETTINGS:
+    print(f"[WARN] conf.py 缺少 {len(MISSING_SETTINGS)} 个配置项，已使用 conf.example.py 中的默认值: "
+          f"{', '.join(MISSING_SETTINGS)}")
@@ -0,0 +1,116 @@
+"""
+上传进度监听模块
+用 Playwright 的事件等待（元素出现/消失、页面跳转）代替固定间隔的轮询，
+上传或发布一完成立即返回；整个等待过程共用一个总超时，仅在开启调试时截图
+"""
+
+import asyncio
+import time
+from pathlib import Path
+
+from utils.settings import BASE_DIR, UPLOAD_WAIT_TIMEOUT, DEBUG_SCREENSHOTS
+
+
+class UploadWatcher(object):
+    """绑定到单个页面的上传/发布完成检测器"""
+
+    def __init__(self, page, timeout=UPLOAD_WAIT_TIMEOUT, logger=None):
+        self.page = page
+        self.timeout = timeout
+        self.logger = logger
+        self._deadline = time.monotonic() + timeout
+
+    def remaining_ms(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+    def _log(self, level, message):
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+    async def debug_screenshot(self, name):
+        """仅在 DEBUG_SCREENSHOTS 开启时保存截图"""
+        if not DEBUG_SCREENSHOTS:
+            return
+        screenshot_dir = Path(BASE_DIR / "logs" / "screenshots")
+        screenshot_dir.mkdir(parents=True, exist_ok=True)
+        await self.page.screenshot(path=screenshot_dir / f"{name}_{int(time.time())}.png", full_page=True)
+
+    async def wait_for_upload(self, done, done_state='attached', failed=None, on_failure=None):
+        """
+        等待视频上传完成
+        :param done: 上传完成的标志元素选择器
+        :param done_state: 标志元素进入该状态即视为完成，如 'attached'（出现）或 'detached'（消失）
+        :param failed: 上传失败的标志元素选择器
+        :param on_failure: 出现失败标志时调用的协程函数（通常为重新上传），之后继续等待
+        :return: 总超时内完成返回 True，否则返回 False
+        """
+        while True:
+            timeout = self.remaining_ms()
+            if timeout <= 0:
+                break
+            waiters = {
+                'done': asyncio.ensure_future(
+                    self.page.locator(done).first.wait_for(state=done_state, timeout=timeout)),
+            }
+            if failed:
+                waiters['failed'] = asyncio.ensure_future(
+                    self.page.locator(failed).first.wait_for(state='attached', timeout=timeout))
+            outcome = await self._first_success(waiters)
+            if outcome is None:
+                break
+            if outcome == 'failed':
+                self._log('error', "  [-] 发现上传出错了... 准备重试")
+                await self.debug_screenshot("upload_failed")
+                if on_failure is not None:
+                    await on_failure()
+                # 等失败标志消失后再继续监听，避免重复触发
+                try:
+                    await self.page.locator(failed).first.wait_for(state='detached', timeout=self.remaining_ms())
+                except Exception:
+                    break
+                continue
+            return True
+        await self.debug_screenshot("upload_timeout")
+        return False
+
+    async def wait_for_publish(self, url, click=None, retry_interval=5):
+        """
+        等待发布成功后的页面跳转
+        :param url: 发布成功后跳转的 URL（支持通配符或判断函数）
+        :param click: 点击发布按钮的协程函数；在 retry_interval 秒内未跳转时再次点击（按钮可能尚未可用）
+        :return: 总超时内跳转返回 True，否则返回 False
+        """
+        while True:
+            timeout = self.remaining_ms()
+            if timeout <= 0:
+                break
+            if click is not None:
+                try:
+                    await click()
+                except Exception as e:
+                    self._log('info', f"  [-] 点击发布按钮失败: {e}")
+            try:
+                await self.page.wait_for_url(url, timeout=min(timeout, retry_interval * 1000))
+                return True
+            except Exception:
+                self._log('info', "  [-] 视频正在发布中...")
+        await self.debug_screenshot("publish_timeout")
+        return False
+
+    @staticmethod
+    async def _first_success(waiters):
+        """返回第一个成功结束的等待项名称，全部失败（超时）时返回 None"""
+        pending = set(waiters.values())
+        names = {task: name for name, task in waiters.items()}
+        try:
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    if task.exception() is None:
+                        return names[task]
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            # 回收被取消的任务，避免 "Task exception was never retrieved"
+            await asyncio.gather(*pending, return_exceptions=True)
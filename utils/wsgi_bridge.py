@@ -0,0 +1,164 @@
+"""
+WSGI -> ASGI 适配模块
+在线程池中执行 Flask 等 WSGI 应用，响应体分块写回 ASGI 服务器。
+asgiref 的 WsgiToAsgi 默认把所有请求放到同一个线程中串行执行，这里每个请求各占线程池中的一个线程
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+
+# 请求体超过该大小时写入临时文件，避免分片上传占用内存
+SPOOL_MAX_SIZE = 1024 * 1024
+# 发送文件（send_file / send_from_directory）时每次读取的字节数
+FILE_CHUNK_SIZE = 256 * 1024
+
+
+class ClientDisconnected(Exception):
+    """客户端已断开连接，停止发送响应体"""
+
+
+class FileWrapper(object):
+    """
+    wsgi.file_wrapper 实现，忽略框架传入的 8KB 缓冲区，按 FILE_CHUNK_SIZE 读取，减少跨线程发送次数；
+    支持 seek，Werkzeug 处理 Range 请求时直接跳到起始位置，而不是从头读取再丢弃
+    """
+
+    def __init__(self, file, buffer_size=None):
+        self.file = file
+
+    def seekable(self):
+        return hasattr(self.file, 'seek') and hasattr(self.file, 'tell')
+
+    def seek(self, *args):
+        self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.file.read(FILE_CHUNK_SIZE)
+        if not data:
+            raise StopIteration()
+        return data
+
+    def close(self):
+        if hasattr(self.file, 'close'):
+            self.file.close()
+
+
+def build_environ(scope, body):
+    """按 ASGI http scope 构造 WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'wsgi.file_wrapper': FileWrapper,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = client[0], str(client[1])
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        # 重复的请求头按 WSGI 约定用逗号合并
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class WsgiBridge(object):
+    """把 WSGI 应用包装成 ASGI 应用（仅处理 http 请求）"""
+
+    def __init__(self, wsgi_app, executor=None):
+        self.wsgi_app = wsgi_app
+        self.executor = executor  # None 表示使用事件循环的默认线程池
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        disconnected = threading.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = None
+        try:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                more_body = message.get('more_body', False)
+            body.seek(0)
+            # 视频拖动进度时播放器会中断当前请求，发现断开后不再继续读取文件
+            watcher = asyncio.ensure_future(watch_disconnect())
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self._run, scope, body, send, loop, disconnected)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            body.close()
+
+    def _run(self, scope, body, send, loop, disconnected):
+        """在线程池中执行 WSGI 应用，通过事件循环逐块发送响应"""
+        response = {}
+
+        def call(message):
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def send_headers():
+            if not response.get('sent'):
+                call({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                response['sent'] = True
+
+        def write(data):
+            send_headers()
+            call({'type': 'http.response.body', 'body': bytes(data), 'more_body': True})
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return write
+
+        result = self.wsgi_app(build_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    write(chunk)
+            send_headers()
+            call({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except ClientDisconnected:
+            pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()